@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from state_machine import EXPANDED_STATE
+
+# Columns whose change makes a day's adjusted demand stale
+HASHED_COLUMNS = ['Time', 'Occupancy Level (%)', 'Energy Demand (kWh)', 'State']
+
+
+@dataclass(frozen=True)
+class AreaIntensityModel:
+    """
+    Energy demand scaled with the floor area in use.
+
+    The measured demand corresponds to reference_area. fixed_fraction of it
+    (ventilation, equipment, standby) does not depend on the area; the rest
+    scales with the area of the building's current state.
+    """
+    expanded_area: float = 135.0
+    contracted_area: float = 65.0
+    reference_area: float = 135.0
+    fixed_fraction: float = 0.0
+
+    def factors(self, expanded):
+        """Ratio of adjusted to measured demand for each expanded flag."""
+        area = np.where(np.asarray(expanded, dtype=bool), self.expanded_area, self.contracted_area)
+        return self.fixed_fraction + (1 - self.fixed_fraction) * area / self.reference_area
+
+
+def adjusted_hourly_demand(data, model):
+    """
+    Adjusted demand of every hour.
+
+    Parameters:
+        data (DataFrame): Hourly rows with 'Energy Demand (kWh)' and 'State'.
+        model (AreaIntensityModel): Area-intensity model.
+
+    Returns:
+        ndarray: Adjusted energy demand in kWh.
+    """
+    expanded = (data['State'] == EXPANDED_STATE).to_numpy()
+    return data['Energy Demand (kWh)'].to_numpy(dtype=float) * model.factors(expanded)
+
+
+def daily_adjusted_demand(data, model):
+    """
+    Daily measured and adjusted demand, in the layout of the former static CSV.
+
+    Returns:
+        DataFrame: 'Date', mean 'Occupancy Level (%)', and the daily sums of
+            'Energy Demand (kWh)' and 'Adjusted Energy Demand (kWh)', indexed by day.
+    """
+    days = pd.to_datetime(data['Time']).dt.normalize()
+    daily = pd.DataFrame({
+        'Occupancy Level (%)': data['Occupancy Level (%)'].to_numpy(dtype=float),
+        'Energy Demand (kWh)': data['Energy Demand (kWh)'].to_numpy(dtype=float),
+        'Adjusted Energy Demand (kWh)': adjusted_hourly_demand(data, model)
+    }, index=pd.DatetimeIndex(days, name='Day')).groupby(level='Day').agg({
+        'Occupancy Level (%)': 'mean',
+        'Energy Demand (kWh)': 'sum',
+        'Adjusted Energy Demand (kWh)': 'sum'
+    })
+    daily.insert(0, 'Date', daily.index.date)
+    return daily
+
+
+def day_hashes(data):
+    """
+    Fingerprint of each day's rows.
+
+    Returns:
+        Series: uint64 hash per day, indexed by day.
+    """
+    rows = pd.util.hash_pandas_object(data[HASHED_COLUMNS], index=False).to_numpy()
+    days, inverse = np.unique(pd.to_datetime(data['Time']).to_numpy().astype('datetime64[D]'), return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    starts = np.searchsorted(inverse[order], np.arange(len(days)))
+    # Wrapping uint64 sums: independent of row order within a day
+    hashes = np.add.reduceat(rows[order], starts) if len(rows) else np.array([], dtype=np.uint64)
+    return pd.Series(hashes, index=pd.DatetimeIndex(days, name='Day'))
+
+
+class AdjustedDemandEngine:
+    """
+    Daily adjusted demand kept in step with the hourly data.
+
+    update() hashes each day's rows and recomputes only the days that are new
+    or changed, so appending live readings costs the days they touch.
+    """
+
+    def __init__(self, model=None):
+        self.model = model or AreaIntensityModel()
+        self._hashes = pd.Series(dtype=np.uint64)
+        self._daily = None
+        self.recomputed_days = 0
+
+    def update(self, data):
+        """
+        Bring the daily table up to date with data.
+
+        Parameters:
+            data (DataFrame): Hourly rows with the HASHED_COLUMNS.
+
+        Returns:
+            DataFrame: The daily table of daily_adjusted_demand.
+        """
+        hashes = day_hashes(data)
+        previous = self._hashes.reindex(hashes.index)
+        changed = hashes.index[previous.isna().to_numpy() | (previous.to_numpy() != hashes.to_numpy())]
+        self.recomputed_days = len(changed)
+
+        if self._daily is None or len(changed) == len(hashes):
+            daily = daily_adjusted_demand(data, self.model)
+        else:
+            daily = self._daily[self._daily.index.isin(hashes.index) & ~self._daily.index.isin(changed)]
+            if len(changed):
+                rows = pd.to_datetime(data['Time']).dt.normalize().isin(changed).to_numpy()
+                daily = pd.concat([daily, daily_adjusted_demand(data[rows], self.model)]).sort_index()
+        self._hashes = hashes
+        self._daily = daily
+        return daily
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+# Dimensions of the cube; every chart aggregate is a roll-up over a subset of these
+CUBE_KEYS = ['Week', 'Month', 'Hour', 'Day Type', 'State']
+
+MEASURES = ['Energy Demand (kWh)', 'Occupancy Level (%)']
+
+
+def day_type(times):
+    """Label timestamps as 'Weekday' or 'Weekend' without a Python-level apply."""
+    return np.where(times.dt.dayofweek.to_numpy() < 5, 'Weekday', 'Weekend')
+
+
+class AggregateCube:
+    """
+    Sum and count of the hourly measures keyed by Week/Month/Hour/Day Type/State.
+
+    The cube is built once from the hourly table; charts roll it up to the
+    dimensions they need instead of grouping the raw rows again. The cube
+    never hands out its own table: slices and the table property return
+    new DataFrames, so callers cannot change it.
+    """
+
+    def __init__(self, table):
+        self._table = table
+
+    @classmethod
+    def from_data(cls, data, measures=None):
+        """
+        Build the cube from the prepared hourly data.
+
+        Parameters:
+            data (DataFrame): Hourly data with columns ['Time', 'Week', 'Month', 'State'] and the measures.
+            measures (list): Measure columns to aggregate, defaults to MEASURES.
+
+        Returns:
+            AggregateCube: The materialized cube.
+        """
+        measures = measures or MEASURES
+        times = pd.to_datetime(data['Time'])
+        keys = pd.DataFrame({
+            'Week': data['Week'].array,
+            'Month': data['Month'].array,
+            'Hour': times.dt.hour.to_numpy(),
+            'Day Type': day_type(times),
+            'State': data['State'].array
+        })
+        values = pd.DataFrame({measure: data[measure].array for measure in measures})
+        grouped = pd.concat([keys, values], axis=1).groupby(CUBE_KEYS, observed=True, sort=True)[measures]
+        return cls.from_parts(grouped.sum(), grouped.count())
+
+    @classmethod
+    def from_parts(cls, sums, counts):
+        """Assemble a cube from per-key sums and counts (both indexed by CUBE_KEYS)."""
+        table = pd.concat(
+            [sums.add_suffix(' sum'), counts.add_suffix(' count')],
+            axis=1
+        ).reset_index()
+        return cls(table)
+
+    @property
+    def table(self):
+        """Copy of the underlying table with one row per cube cell."""
+        return self._table.copy()
+
+    @property
+    def measures(self):
+        return [column[:-len(' sum')] for column in self._table.columns if column.endswith(' sum')]
+
+    def slice(self, by, measures=None, how='sum'):
+        """
+        Roll the cube up to the given dimensions.
+
+        Parameters:
+            by (list): Cube dimensions to keep, e.g. ['Week', 'State'].
+            measures (list): Measures to return, defaults to all measures in the cube.
+            how (str): 'sum', 'mean' or 'count'.
+
+        Returns:
+            DataFrame: One row per combination of the kept dimensions.
+        """
+        measures = measures or self.measures
+        columns = [f'{measure} sum' for measure in measures] + [f'{measure} count' for measure in measures]
+        rolled = self._table.groupby(list(by), observed=True, sort=True)[columns].sum()
+
+        result = pd.DataFrame(index=rolled.index)
+        for measure in measures:
+            if how == 'sum':
+                result[measure] = rolled[f'{measure} sum']
+            elif how == 'count':
+                result[measure] = rolled[f'{measure} count']
+            elif how == 'mean':
+                result[measure] = rolled[f'{measure} sum'] / rolled[f'{measure} count']
+            else:
+                raise ValueError(f"Unknown aggregation '{how}'.")
+        return result.reset_index()
+
+    def weekly_by_state(self):
+        """Weekly energy demand per building state."""
+        return self.slice(['Week', 'State'], ['Energy Demand (kWh)'])
+
+    def monthly_by_state(self):
+        """Monthly energy demand per building state."""
+        return self.slice(['Month', 'State'], ['Energy Demand (kWh)'])
+
+    def monthly_summary(self):
+        """Monthly mean occupancy and energy demand."""
+        return self.slice(['Month'], ['Occupancy Level (%)', 'Energy Demand (kWh)'], how='mean')
+
+    def state_totals(self):
+        """Total energy demand per building state."""
+        return self.slice(['State'], ['Energy Demand (kWh)'])
+
+    def hourly_profile(self):
+        """Mean energy demand and occupancy per hour of day and day type."""
+        return self.slice(['Hour', 'Day Type'], ['Energy Demand (kWh)', 'Occupancy Level (%)'], how='mean')
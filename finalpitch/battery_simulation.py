@@ -0,0 +1,199 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+HOURS_PER_YEAR = 8760
+
+# Hours simulated per block; bounds memory for multi-year runs and sweeps
+DEFAULT_CHUNK_HOURS = HOURS_PER_YEAR
+
+
+def align_to_times(values, times):
+    """
+    Look up an hourly typical-year series (8760 values) for arbitrary timestamps.
+
+    Each timestamp takes the value with the same month, day and hour, so
+    multi-year demand reuses the typical weather year (29 February uses
+    28 February).
+
+    Parameters:
+        values (array): Hourly values of a non-leap year, starting 1 January 00:00.
+        times (Series): Timestamps to align with.
+
+    Returns:
+        ndarray: One value per timestamp.
+    """
+    values = np.asarray(values)
+    times = pd.DatetimeIndex(pd.to_datetime(times))
+    # Day of a non-leap year: drop the leap day offset from March onwards
+    day = times.dayofyear.to_numpy() - 1
+    leap = times.is_leap_year & (times.month > 2)
+    day = np.where(leap, day - 1, day)
+    hour_of_year = np.minimum(day * 24 + times.hour.to_numpy(), len(values) - 1)
+    return values[hour_of_year]
+
+
+def _compose_scan(a, lo, hi):
+    """
+    Inclusive prefix composition of the steps s -> clip(s + a, lo, hi) along the last axis.
+
+    Compositions of such steps keep the same form, so a Hillis-Steele scan
+    needs only log2(hours) vectorized passes instead of a loop per hour.
+    """
+    a, lo, hi = a.copy(), lo.copy(), hi.copy()
+    n = a.shape[-1]
+    shift = 1
+    while shift < n:
+        # Apply the step ending at t after the prefix ending at t - shift
+        prev_a, prev_lo, prev_hi = a[..., :-shift], lo[..., :-shift], hi[..., :-shift]
+        cur_a, cur_lo, cur_hi = a[..., shift:], lo[..., shift:], hi[..., shift:]
+        new_lo = np.clip(prev_lo + cur_a, cur_lo, cur_hi)
+        new_hi = np.clip(prev_hi + cur_a, cur_lo, cur_hi)
+        new_a = prev_a + cur_a
+        a[..., shift:], lo[..., shift:], hi[..., shift:] = new_a, new_lo, new_hi
+        shift *= 2
+    return a, lo, hi
+
+
+def simulate_self_consumption(load, generation, capacity=0.0, power=None, charge_efficiency=0.95,
+                              discharge_efficiency=0.95, initial_soc=0.0, chunk_hours=DEFAULT_CHUNK_HOURS):
+    """
+    Hourly net-load simulation with an optional battery dispatched for self-consumption.
+
+    Surplus PV charges the battery and deficits discharge it, within its
+    capacity and power limits; the rest is exported or imported. capacity,
+    power and initial_soc may be arrays to simulate several batteries at once
+    (one row per battery).
+
+    Parameters:
+        load (array): Demand in kWh per hour.
+        generation (array): PV generation in kWh per hour.
+        capacity (float or array): Usable battery capacity in kWh; 0 disables the battery.
+        power (float or array): Charge/discharge limit in kW, defaults to unlimited.
+        charge_efficiency (float): Fraction of charged energy stored.
+        discharge_efficiency (float): Fraction of discharged energy delivered.
+        initial_soc (float or array): Stored energy at the start, in kWh.
+        chunk_hours (int): Hours simulated per block.
+
+    Returns:
+        dict: Arrays of shape (batteries, hours) for 'soc', 'charge', 'discharge',
+            'self_consumption', 'export' and 'import' in kWh.
+    """
+    load = np.asarray(load, dtype=float)
+    generation = np.asarray(generation, dtype=float)
+    capacity = np.atleast_1d(np.asarray(capacity, dtype=float))[:, None]
+    power = np.full_like(capacity, np.inf) if power is None else np.atleast_1d(np.asarray(power, dtype=float))[:, None]
+    capacity, power = np.broadcast_arrays(capacity, power)
+    initial_soc = np.minimum(np.atleast_1d(np.asarray(initial_soc, dtype=float)), capacity[:, 0])
+    soc = initial_soc.copy()
+
+    direct = np.minimum(load, generation)
+    surplus = generation - direct
+    deficit = load - direct
+
+    # Energy the battery would store (+) or give (-) each hour if it had room
+    wanted = np.where(
+        surplus > 0,
+        np.minimum(surplus, power) * charge_efficiency,
+        -np.minimum(deficit, power) / discharge_efficiency
+    )
+
+    soc_blocks = []
+    for start in range(0, len(load), chunk_hours):
+        block = wanted[:, start:start + chunk_hours]
+        lo = np.zeros_like(block)
+        hi = np.broadcast_to(capacity, block.shape).copy()
+        a, lo, hi = _compose_scan(block, lo, hi)
+        block_soc = np.clip(soc[:, None] + a, lo, hi)
+        soc_blocks.append(block_soc)
+        soc = block_soc[:, -1]
+    soc_series = np.concatenate(soc_blocks, axis=1) if soc_blocks else np.zeros((capacity.shape[0], 0))
+
+    # Energy flows follow from the change in stored energy each hour
+    delta = np.diff(soc_series, axis=1, prepend=initial_soc[:, None])
+    charge = np.maximum(delta, 0) / charge_efficiency
+    discharge = np.maximum(-delta, 0) * discharge_efficiency
+    return {
+        'soc': soc_series,
+        'charge': charge,
+        'discharge': discharge,
+        'self_consumption': direct + discharge,
+        'export': np.maximum(surplus - charge, 0),
+        'import': np.maximum(deficit - discharge, 0)
+    }
+
+
+def summarize(load, generation, result):
+    """
+    Annualised totals of a simulation.
+
+    Returns:
+        DataFrame: One row per battery with totals in kWh, the self-consumption
+            ratio (share of PV used on site) and autarky (share of load covered by PV).
+    """
+    years = max(len(load) / HOURS_PER_YEAR, 1e-9)
+    total_generation = float(np.sum(generation))
+    total_load = float(np.sum(load))
+    self_consumption = result['self_consumption'].sum(axis=1)
+    return pd.DataFrame({
+        'Generation (kWh/yr)': total_generation / years,
+        'Load (kWh/yr)': total_load / years,
+        'Self-consumption (kWh/yr)': self_consumption / years,
+        'Export (kWh/yr)': result['export'].sum(axis=1) / years,
+        'Import (kWh/yr)': result['import'].sum(axis=1) / years,
+        'Self-consumption ratio': self_consumption / total_generation if total_generation else np.nan,
+        'Autarky': self_consumption / total_load if total_load else np.nan
+    })
+
+
+def balance_curve(load, profile, yields, capacity=0.0, power=None):
+    """
+    Annual balance of a PV profile scaled to several annual yields.
+
+    Self-consumption does not grow in proportion to the PV size, so cost
+    models that scale the yield interpolate along this table instead.
+
+    Parameters:
+        load (array): Demand in kWh per hour.
+        profile (array): Hourly shape of the generation, e.g. the plane-of-array irradiance.
+        yields (array): Annual generation in kWh to simulate, in increasing order.
+        capacity (float): Usable battery capacity in kWh.
+        power (float): Charge/discharge limit in kW.
+
+    Returns:
+        DataFrame: The columns of summarize, one row per yield.
+    """
+    profile = np.asarray(profile, dtype=float)
+    annual = profile.sum() / max(len(profile) / HOURS_PER_YEAR, 1e-9)
+    rows = []
+    for target in yields:
+        generation = profile * (target / annual if annual else 0.0)
+        result = simulate_self_consumption(load, generation, capacity=capacity, power=power)
+        rows.append(summarize(load, generation, result))
+    return pd.concat(rows, ignore_index=True)
+
+
+def benchmark(years=(1, 10, 50), batteries=1, seed=0):
+    """Print the simulation time per simulated year for synthetic multi-year series."""
+    rng = np.random.default_rng(seed)
+    for count in years:
+        hours = HOURS_PER_YEAR * count
+        hour_of_day = np.arange(hours) % 24
+        load = 8 + 6 * rng.random(hours)
+        generation = np.clip(np.sin((hour_of_day - 6) / 14 * np.pi), 0, None) * 20 * rng.random(hours)
+        capacities = np.linspace(0, 50, batteries)
+        start = time.perf_counter()
+        simulate_self_consumption(load, generation, capacity=capacities, power=10.0)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>4} years x {batteries} batteries: {elapsed:.3f} s "
+              f"({elapsed / count * 1000:.2f} ms per simulated year)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the battery dispatch simulation.')
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--batteries', type=int, default=1)
+    args = parser.parse_args()
+    benchmark(args.years, args.batteries)
@@ -0,0 +1,246 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from aggregate_cube import AggregateCube
+from battery_simulation import simulate_self_consumption
+from data_loader import prepare_demand_data
+from heatmap_energy_occupancy import heatmap_energy_occupancy
+from radiation_ingest import normalize_radiation_file
+from radiation_profile import SAMPLE_FILES, build_radiation_profile
+from stacked_bar_chart import stacked_bar_chart
+from state_machine import sweep_thresholds
+from synthetic_data import (
+    RADIATION_POINTS, SCALES, synthetic_demand, synthetic_radiation_day, write_radiation_dir
+)
+from year_generation import calculate_radiation
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Allowed slowdown / memory growth against the baseline before a result is flagged
+TIME_TOLERANCE = 1.5
+MEMORY_TOLERANCE = 1.2
+
+# Runs below this many seconds are too noisy to flag
+MIN_FLAGGED_SECONDS = 0.05
+
+
+# Each benchmark has a setup(scale, workdir) returning the arguments of run(...)
+# and the number of input rows; only run is measured.
+def _setup_demand_csv(scale, workdir):
+    path = os.path.join(workdir, f'demand_{scale}.csv')
+    data = synthetic_demand(**SCALES[scale])
+    data.to_csv(path, index=False)
+    return (path,), len(data)
+
+
+def _run_data_prep(path):
+    return prepare_demand_data(pd.read_csv(path))
+
+
+def _setup_prepared(scale, workdir):
+    data = prepare_demand_data(synthetic_demand(**SCALES[scale]))
+    return (data,), len(data)
+
+
+def _run_stacked_bar(data):
+    cube = AggregateCube.from_data(data)
+    return stacked_bar_chart('Weekly', cube.weekly_by_state(), cube.monthly_by_state())
+
+
+def _setup_radiation_dir(scale, workdir):
+    directory = write_radiation_dir(os.path.join(workdir, f'radiation_{scale}'), points=RADIATION_POINTS * scale)
+    return (directory,), 4 * RADIATION_POINTS * scale
+
+
+def _setup_sample_days(scale, workdir):
+    # The measured days the yearly profile interpolates, named after the day they sample
+    directory = os.path.join(workdir, f'sample_days_{scale}')
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i, file_name in enumerate(SAMPLE_FILES):
+        day, month = file_name[len('incident_radiation_'):-len('.csv')].split('_')
+        path = os.path.join(directory, file_name)
+        day_frame = synthetic_radiation_day(f'2025-{month}-{day}', points=RADIATION_POINTS * scale, seed=i)
+        day_frame.to_csv(path, index=False)
+        paths.append(path)
+    return (paths,), len(SAMPLE_FILES) * RADIATION_POINTS * scale
+
+
+def _setup_gap_file(scale, workdir):
+    path = os.path.join(workdir, f'incident_radiation_21_06_{scale}.csv')
+    synthetic_radiation_day('2025-06-21', points=RADIATION_POINTS * scale, time_format='elapsed',
+                            gap_fraction=0.05).to_csv(path, index=False)
+    return (path,), RADIATION_POINTS * scale
+
+
+def _setup_dispatch(scale, workdir):
+    data = synthetic_demand(**SCALES[scale])
+    load = data['Energy Demand (kWh)'].to_numpy()
+    return (load, load[::-1] * 0.8), len(load)
+
+
+def _setup_occupancy(scale, workdir):
+    data = synthetic_demand(**SCALES[scale])
+    return (data['Time'], data['Occupancy Level (%)'].to_numpy()), len(data)
+
+
+BENCHMARKS = {
+    'data_prep': (_setup_demand_csv, _run_data_prep),
+    'heatmap': (_setup_prepared, heatmap_energy_occupancy),
+    'stacked_bar': (_setup_prepared, _run_stacked_bar),
+    'calculate_radiation': (_setup_radiation_dir, calculate_radiation),
+    'yearly_simulation': (_setup_sample_days, build_radiation_profile),
+    'gap_filling': (_setup_gap_file, lambda path: normalize_radiation_file(path, date='2025-06-21')),
+    'battery_dispatch': (_setup_dispatch, lambda load, generation: simulate_self_consumption(
+        load, generation, capacity=20.0, power=5.0)),
+    'threshold_sweep': (_setup_occupancy, lambda times, occupancy: sweep_thresholds(
+        times, occupancy, range(20, 55, 5), range(45, 85, 5), min_dwell=24))
+}
+
+
+def measure(func, args, repeat=3):
+    """
+    Time a call and record its peak memory.
+
+    The wall time is the best of repeat untraced runs; the peak comes from one
+    extra run under tracemalloc, which slows execution down.
+
+    Returns:
+        tuple: (seconds, peak bytes allocated during the call).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_suite(scales=(1, 10), names=None, repeat=3, workdir=None):
+    """
+    Run the benchmarks on synthetic data at each scale.
+
+    Parameters:
+        scales (iterable): Keys of SCALES.
+        names (iterable): Benchmarks to run, defaults to all of BENCHMARKS.
+        repeat (int): Timed runs per benchmark.
+        workdir (str): Directory for generated files, defaults to a temporary one.
+
+    Returns:
+        DataFrame: One row per benchmark and scale with rows, seconds and peak MB.
+    """
+    names = list(names or BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise KeyError(f"Unknown benchmarks: {sorted(unknown)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = workdir or tmp
+        for scale in scales:
+            for name in names:
+                setup, run = BENCHMARKS[name]
+                args, rows = setup(scale, workdir)
+                seconds, peak = measure(run, args, repeat=repeat)
+                results.append({
+                    'benchmark': name,
+                    'scale': scale,
+                    'rows': rows,
+                    'seconds': seconds,
+                    'peak_mb': peak / 2 ** 20
+                })
+                print(f"{name:>20} {scale:>5}x {rows:>10} rows {seconds:9.3f} s {peak / 2 ** 20:9.1f} MB")
+    return pd.DataFrame(results)
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """
+    Flag results that got slower or use more memory than the baseline.
+
+    Parameters:
+        results (DataFrame): Output of run_suite.
+        baseline (DataFrame): Earlier output of run_suite.
+
+    Returns:
+        DataFrame: results with the baseline values, the ratios and a 'regression' column.
+    """
+    merged = results.merge(
+        baseline[['benchmark', 'scale', 'seconds', 'peak_mb']],
+        on=['benchmark', 'scale'], how='left', suffixes=('', '_baseline')
+    )
+    merged['time_ratio'] = merged['seconds'] / merged['seconds_baseline']
+    merged['memory_ratio'] = merged['peak_mb'] / merged['peak_mb_baseline']
+    slower = (merged['time_ratio'] > time_tolerance) & (merged['seconds'] > MIN_FLAGGED_SECONDS)
+    larger = merged['memory_ratio'] > memory_tolerance
+    merged['regression'] = slower | larger
+    return merged
+
+
+def save_results(results, path):
+    """Record results as JSON together with the machine they were measured on."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'machine': platform.platform(),
+            'python': platform.python_version(),
+            'results': results.to_dict('records')
+        }, f, indent=2)
+
+
+def load_results(path):
+    """Read results recorded by save_results."""
+    with open(path, encoding='utf-8') as f:
+        return pd.DataFrame(json.load(f)['results'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark loading, aggregation, chart and simulation code.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10], choices=sorted(SCALES),
+                        help='dataset size multipliers')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark')
+    parser.add_argument('-o', '--output', help='record the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.scales, args.only, repeat=args.repeat)
+    if args.output:
+        save_results(results, args.output)
+    if args.save_baseline:
+        save_results(results, args.baseline)
+        print(f"Baseline saved to: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    compared = compare(results, load_results(args.baseline))
+    regressions = compared[compared['regression']]
+    for row in regressions.itertuples(index=False):
+        print(f"REGRESSION {row.benchmark} {row.scale}x: {row.time_ratio:.2f}x time, "
+              f"{row.memory_ratio:.2f}x memory")
+    if regressions.empty:
+        print('No regressions against the baseline.')
+    return 1 if len(regressions) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,571 @@
+import argparse
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import CUBE_KEYS, MEASURES, AggregateCube
+from state_machine import (
+    CONTRACT_THRESHOLD, CONTRACTED_STATE, EXPAND_THRESHOLD, EXPANDED_STATE, MIN_DWELL_HOURS, STATE_THRESHOLD,
+    StateTracker, state_labels
+)
+
+# Rows read per chunk; peak memory scales with the chunk size, not with the file
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Bytes parsed at once by each worker when a CSV file is split across processes
+DEFAULT_BLOCK_BYTES = 64 << 20
+
+# Every cube cell has a fixed slot: ISO week (0-53) x month x hour x day type x state.
+# A partial aggregate is a dense array over these slots, so folding chunks is an addition
+# and its size does not depend on the data.
+CELL_SHAPE = (54, 12, 24, 2, 2)
+CELLS = int(np.prod(CELL_SHAPE))
+DAY_TYPES = ['Weekday', 'Weekend']
+STATES = [CONTRACTED_STATE, EXPANDED_STATE]  # Order of the state codes
+
+
+def valid_rows(chunk):
+    """Rows of a raw chunk with a valid time, 'Time' parsed; prepare_demand_data drops the others too."""
+    times = pd.to_datetime(chunk['Time'], errors='coerce')
+    return chunk.assign(Time=times)[times.notna().to_numpy()]
+
+
+def chunk_cells(chunk, expanded):
+    """
+    Derive the cube cell of every row of a chunk on the fly.
+
+    Parameters:
+        chunk (DataFrame): Rows from valid_rows.
+        expanded (array): Building state of each row, True when expanded.
+
+    Returns:
+        ndarray: Flat cell index per row.
+    """
+    times = chunk['Time']
+    return np.ravel_multi_index((
+        times.dt.isocalendar().week.to_numpy(dtype=np.int64),
+        times.dt.month.to_numpy(dtype=np.int64) - 1,
+        times.dt.hour.to_numpy(dtype=np.int64),
+        (times.dt.dayofweek.to_numpy(dtype=np.int64) >= 5).astype(np.int64),
+        np.asarray(expanded, dtype=np.int64)
+    ), CELL_SHAPE)
+
+
+def aggregate_chunk(chunk, expanded, measures=None):
+    """
+    Sum and count the measures of one chunk per cube cell.
+
+    Parameters:
+        chunk (DataFrame): Rows from valid_rows.
+        expanded (array): Building state of each row, True when expanded.
+        measures (list): Measure columns, defaults to MEASURES.
+
+    Returns:
+        tuple: (rows, sums, counts) arrays over all CELLS; sums and counts have one row per measure.
+    """
+    measures = measures or MEASURES
+    cells = chunk_cells(chunk, expanded)
+    rows = np.bincount(cells, minlength=CELLS)
+    sums = np.zeros((len(measures), CELLS))
+    counts = np.zeros((len(measures), CELLS), dtype=np.int64)
+    for i, measure in enumerate(measures):
+        values = chunk[measure].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        sums[i] = np.bincount(cells[present], weights=values[present], minlength=CELLS)
+        counts[i] = np.bincount(cells[present], minlength=CELLS)
+    return rows, sums, counts
+
+
+def _add(total, part):
+    # Partial aggregates have the same shape, so folding them is an addition
+    return part if total is None else tuple(a + b for a, b in zip(total, part))
+
+
+def _with_state(part, expanded):
+    # Move an aggregate of contracted rows to the expanded state: the state is the last cell axis
+    if not expanded:
+        return part
+    moved = tuple(np.zeros_like(values) for values in part)
+    for values, target in zip(part, moved):
+        target[..., 1::2] = values[..., 0::2]
+    return moved
+
+
+def _by_building(chunk):
+    # Positions of the rows of each building; rows without a 'Building' column are one building
+    if 'Building' not in chunk.columns:
+        return [(None, np.arange(len(chunk)))]
+    return chunk.groupby('Building', sort=False, observed=True).indices.items()
+
+
+def _columns(available, measures):
+    # Columns the cube needs, with 'Building' when the file has one
+    columns = ['Time', *dict.fromkeys(['Occupancy Level (%)', *measures])]
+    return ['Building', *columns] if 'Building' in available else columns
+
+
+class _Decided:
+    # Rows and aggregates whose state was decided while folding one chunk; the rows of all
+    # buildings are aggregated together
+
+    def __init__(self, measures):
+        self.measures = measures
+        self.frames = []
+        self.states = []
+        self.parts = []
+
+    def add_rows(self, rows, expanded):
+        self.frames.append(rows)
+        self.states.append(np.broadcast_to(expanded, len(rows)))
+
+    def add(self, part):
+        self.parts.append(part)
+
+    def collect(self):
+        parts = self.parts
+        if self.frames:
+            rows = pd.concat(self.frames, ignore_index=True)
+            parts = [aggregate_chunk(rows, np.concatenate(self.states), self.measures), *parts]
+        return parts
+
+
+class _StateFold:
+    # The rows of one building folded in order, with its state carried across chunks. The readings
+    # of a request that has not lasted min_dwell hours yet are pending; the tracker decides them all
+    # at once, so they are held as rows, fewer than the dwell, and as one aggregate at the
+    # contracted state for the requests replayed from aggregate_byte_range.
+
+    def __init__(self, tracker, measures):
+        self.tracker = tracker
+        self.measures = measures
+        self.rows = None  # Pending rows
+        self.part = None  # Aggregate of the other pending readings
+
+    def _decide(self, expanded, decided):
+        if self.rows is not None:
+            decided.add_rows(self.rows, expanded)
+        if self.part is not None:
+            decided.add(_with_state(self.part, expanded))
+        self.rows = self.part = None
+
+    def feed(self, rows, decided):
+        held = self.tracker.pending
+        expanded = self.tracker.feed(rows['Time'], rows['Occupancy Level (%)'])
+        if held and len(expanded):
+            self._decide(expanded[0], decided)
+            expanded = expanded[held:]
+        if len(expanded):
+            decided.add_rows(rows.iloc[:len(expanded)], expanded)
+        if len(expanded) < len(rows):
+            rest = rows.iloc[len(expanded):]
+            self.rows = rest if self.rows is None else pd.concat([self.rows, rest])
+
+    def _place(self, held, runs, part, decided):
+        # runs: (expanded, readings) pairs from the tracker for the pending readings, then part's
+        if held and runs:
+            self._decide(runs[0][0], decided)
+        if sum(readings for _, readings in runs) > held:
+            decided.add(_with_state(part, runs[-1][0]))
+        else:
+            self.part = _add(self.part, part)
+
+    def feed_run(self, request, readings, part, decided):
+        held = self.tracker.pending
+        self._place(held, self.tracker.feed_run(request, readings), part, decided)
+
+    def feed_dropped(self, request, readings, part, decided):
+        held = self.tracker.pending
+        self._place(held, self.tracker.feed_dropped(request, readings), part, decided)
+
+    def resume(self, tracker, rows, part, decided):
+        # Continue after rows aggregated elsewhere that started with a request lasting min_dwell
+        # hours: the readings pending here were dropped by it
+        self.finish(decided)
+        self.tracker, self.rows, self.part = tracker, rows, part
+
+    def finish(self, decided):
+        if self.tracker.pending:
+            self._decide(self.tracker.kept, decided)
+            self.tracker.flush()
+
+
+class _BuildingFolds:
+    # A _StateFold per building, each with its own tracker and sampling step
+
+    def __init__(self, template, measures):
+        self.template = template
+        self.measures = measures
+        self.folds = {}
+
+    def get(self, building, tracker=None):
+        if building not in self.folds:
+            self.folds[building] = _StateFold(tracker or self.template.copy(), self.measures)
+        return self.folds[building]
+
+    def feed(self, chunk, decided):
+        for building, positions in _by_building(chunk):
+            self.get(building).feed(chunk.iloc[positions], decided)
+
+    def finish(self, decided):
+        for fold in self.folds.values():
+            fold.finish(decided)
+
+
+class _RangeLead:
+    # The rows of one building at the start of a byte range, before the first request lasting
+    # min_dwell hours other than the first one: their states depend on the rows before the range.
+    # They are kept as four aggregates at the contracted state, so memory stays bounded when no
+    # request lasts that long: the rows before the first triggering reading, the first request,
+    # the requests dropped after it (they all keep one state) and the latest request.
+
+    def __init__(self, tracker, measures):
+        self.tracker = tracker  # Only learns the sampling step
+        self.measures = measures
+        self.segments = []  # [kind, request, readings, part] with kinds 'hold', 'first', 'dropped', 'latest'
+
+    def _extend(self, kind, request, rows):
+        part = aggregate_chunk(rows, np.zeros(len(rows), dtype=bool), self.measures)
+        last = self.segments[-1] if self.segments else None
+        if last is not None and last[0] == kind and (kind == 'dropped' or last[1] == request):
+            last[1], last[2], last[3] = request, last[2] + len(rows), _add(last[3], part)
+        else:
+            self.segments.append([kind, request, len(rows), part])
+
+    def _drop_latest(self):
+        if self.segments[-1][0] != 'latest':
+            return
+        _, request, readings, part = self.segments.pop()
+        if self.segments[-1][0] == 'dropped':
+            self.segments[-1][1:] = [request, self.segments[-1][2] + readings, _add(self.segments[-1][3], part)]
+        else:
+            self.segments.append(['dropped', request, readings, part])
+
+    def feed(self, rows):
+        """
+        Take the next rows of the building, up to the first request lasting min_dwell hours.
+
+        Returns:
+            tuple: (position in rows, request, (readings, part) of its earlier rows or None)
+                for that request, or None if there is none yet.
+        """
+        self.tracker.learn_step(rows['Time'])
+        expand, triggered = self.tracker.triggers(rows['Time'], rows['Occupancy Level (%)'])
+        latest = np.maximum.accumulate(np.where(triggered, np.arange(len(rows)), -1))
+        previous = self.segments[-1] if self.segments and self.segments[-1][0] != 'hold' else None
+        start = 0
+        if previous is None:
+            # Until a reading triggers, the rows continue the request from before the range
+            start = int(np.searchsorted(latest, 0))
+            if start:
+                self._extend('hold', None, rows.iloc[:start])
+            if start == len(rows):
+                return None
+        requests = np.where(latest >= 0, expand[np.maximum(latest, 0)], previous is not None and previous[1])
+        requests = requests[start:]
+        starts = start + np.r_[0, np.flatnonzero(requests[1:] != requests[:-1]) + 1]
+        ends = np.r_[starts[1:], len(rows)]
+        requested = requests[starts - start]
+        readings = ends - starts
+        continues = previous is not None and previous[1] == requested[0]
+        if continues:
+            readings[0] += previous[2]
+        first = previous is None or (continues and previous[0] == 'first')
+        long_enough = np.flatnonzero((np.arange(len(starts)) >= first) & (readings >= self.tracker.dwell_rows))
+        found = long_enough[0] if len(long_enough) else None
+        runs = found if found is not None else len(starts)  # Requests taken into the lead
+
+        def take(kind, i, j):
+            self._extend(kind, bool(requested[j - 1]), rows.iloc[starts[i]:ends[j - 1]])
+
+        if runs and first:
+            take('first', 0, 1)
+        elif runs:
+            if not continues:
+                self._drop_latest()
+            take('latest', 0, 1)
+        dropped = runs if found is not None else runs - 1
+        if dropped > 1:
+            self._drop_latest()
+            take('dropped', 1, dropped)
+        if found is None:
+            if runs > 1:
+                self._drop_latest()
+                take('latest', runs - 1, runs)
+            return None
+        carried = None
+        if found == 0 and continues:
+            _, _, count, part = self.segments.pop()
+            carried = count, part
+        else:
+            self._drop_latest()
+        return int(starts[found]), bool(requested[found]), carried
+
+
+def _fold_stream(parts):
+    total = None
+    for part in parts:
+        total = _add(total, part)
+    if total is None:
+        raise ValueError('No rows to aggregate.')
+    return total
+
+
+def cube_from_cells(rows, sums, counts, measures=None):
+    """Turn dense per-cell aggregates into an AggregateCube, keeping only cells that have rows."""
+    measures = measures or MEASURES
+    occupied = np.flatnonzero(rows)
+    week, month, hour, weekend, expanded = np.unravel_index(occupied, CELL_SHAPE)
+    index = pd.MultiIndex.from_arrays([
+        week.astype(np.int8),
+        (month + 1).astype(np.int8),
+        hour.astype(np.int32),
+        pd.array(np.array(DAY_TYPES)[weekend], dtype='str'),
+        state_labels(expanded)
+    ], names=CUBE_KEYS)
+    return AggregateCube.from_parts(
+        pd.DataFrame(sums[:, occupied].T, index=index, columns=measures),
+        pd.DataFrame(counts[:, occupied].T, index=index, columns=measures)
+    )
+
+
+def iter_chunks(paths, chunksize=DEFAULT_CHUNKSIZE, measures=None):
+    """
+    Read raw meter files chunk by chunk, keeping only the columns the cube needs.
+
+    Parameters:
+        paths (list): CSV files, or Parquet files read by row group (needs pyarrow).
+        chunksize (int): Rows per CSV chunk.
+        measures (list): Measure columns, defaults to MEASURES.
+
+    Yields:
+        DataFrame: Raw chunks with 'Time', the measures and 'Building' if the file has it.
+    """
+    measures = measures or MEASURES
+    for path in paths:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+
+            parquet = pq.ParquetFile(path)
+            columns = _columns(parquet.schema_arrow.names, measures)
+            for group in range(parquet.num_row_groups):
+                yield parquet.read_row_group(group, columns=columns).to_pandas()
+        else:
+            columns = _columns(pd.read_csv(path, nrows=0).columns, measures)
+            yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def aggregate_chunks(chunks, measures=None, low=STATE_THRESHOLD, high=STATE_THRESHOLD, min_dwell=1, lockout=()):
+    """
+    Fold a stream of raw chunks into an AggregateCube with bounded memory.
+
+    The chunks must be in time order per building: the state of each building
+    is carried from one chunk to the next.
+
+    Parameters:
+        chunks (iterable): Raw DataFrames, e.g. from iter_chunks.
+        measures (list): Measure columns, defaults to MEASURES.
+        low, high, min_dwell, lockout: Control setting of the building states, see with_states.
+
+    Returns:
+        AggregateCube: The same cube AggregateCube.from_data builds from the prepared rows
+            with the same control setting.
+    """
+    measures = measures or MEASURES
+    folds = _BuildingFolds(StateTracker(low, high, min_dwell, lockout), measures)
+
+    def parts():
+        for chunk in chunks:
+            decided = _Decided(measures)
+            folds.feed(valid_rows(chunk), decided)
+            yield from decided.collect()
+        decided = _Decided(measures)
+        folds.finish(decided)
+        yield from decided.collect()
+
+    return cube_from_cells(*_fold_stream(parts()), measures)
+
+
+def csv_byte_ranges(path, parts):
+    """
+    Split a CSV file into about parts byte ranges that start and end on line boundaries.
+
+    Returns:
+        tuple: (header column names, list of (start, end) offsets).
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        first = f.tell()
+        bounds = [first]
+        for i in range(1, parts):
+            f.seek(max(first + (size - first) * i // parts, bounds[-1]))
+            f.readline()  # Move to the start of the next line
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    header = next(csv.reader([header_line.decode('utf-8-sig')]))
+    ranges = [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+    return header, ranges
+
+
+def aggregate_byte_range(path, start, end, header, measures=None, block_bytes=DEFAULT_BLOCK_BYTES,
+                         low=STATE_THRESHOLD, high=STATE_THRESHOLD, min_dwell=1, lockout=()):
+    """
+    Aggregate the CSV lines between two byte offsets, one block at a time.
+
+    Each worker parses its own range, so reading, date parsing and grouping
+    all run in parallel. The state of a building at the start of the range
+    is not known here, so its rows before the first request lasting min_dwell
+    hours (other than the first request in the range) are returned as a few
+    aggregates for fold_ranges to place in order, as are its undecided rows
+    at the end.
+
+    Returns:
+        tuple: (partial aggregate or None, {building: (sampling step, lead segments)},
+            {building: (StateTracker, pending rows, pending aggregate)} at the end of the range).
+    """
+    measures = measures or MEASURES
+    columns = _columns(header, measures)
+    template = StateTracker(low, high, min_dwell, lockout)
+
+    def blocks():
+        with open(path, 'rb') as f:
+            f.seek(start)
+            position = start
+            while position < end:
+                data = f.read(min(block_bytes, end - position))
+                position += len(data)
+                if position < end:
+                    # Finish the current line so no row is split between blocks
+                    tail = f.readline()
+                    data += tail
+                    position += len(tail)
+                yield pd.read_csv(io.BytesIO(data), header=None, names=header, usecols=columns)
+
+    leads = {}
+    folds = _BuildingFolds(template, measures)
+    total = None
+    for block in blocks():
+        block = valid_rows(block)
+        decided = _Decided(measures)
+        for building, positions in _by_building(block):
+            rows = block.iloc[positions]
+            if building not in folds.folds:
+                lead = leads.setdefault(building, _RangeLead(template.copy(), measures))
+                found = lead.feed(rows)
+                if found is None:
+                    continue
+                position, request, carried = found
+                fold = folds.get(building, lead.tracker.copy(initial=request))
+                if carried is not None:
+                    fold.feed_run(request, *carried, decided)
+                rows = rows.iloc[position:]
+            folds.get(building).feed(rows, decided)
+        for part in decided.collect():
+            total = _add(total, part)
+    return (
+        total,
+        {building: (lead.tracker.step_hours, [tuple(segment) for segment in lead.segments])
+         for building, lead in leads.items()},
+        {building: (fold.tracker, fold.rows, fold.part) for building, fold in folds.folds.items()}
+    )
+
+
+def _range_job(job):
+    # Top-level so the process pool can pickle it
+    return aggregate_byte_range(*job)
+
+
+def fold_ranges(results, measures=None, low=STATE_THRESHOLD, high=STATE_THRESHOLD, min_dwell=1, lockout=()):
+    """
+    Combine the results of aggregate_byte_range over consecutive ranges into an AggregateCube.
+
+    Parameters:
+        results (iterable): Results of aggregate_byte_range, in file order.
+        measures (list): Measure columns, defaults to MEASURES.
+        low, high, min_dwell, lockout: Control setting the ranges were aggregated with.
+
+    Returns:
+        AggregateCube: The aggregated cube.
+    """
+    measures = measures or MEASURES
+    folds = _BuildingFolds(StateTracker(low, high, min_dwell, lockout), measures)
+
+    def parts():
+        for total, leads, resumes in results:
+            decided = _Decided(measures)
+            for building, (step_hours, segments) in leads.items():
+                fold = folds.get(building)
+                if fold.tracker.step_hours is None:
+                    fold.tracker.step_hours = step_hours
+                for kind, request, readings, part in segments:
+                    if kind == 'dropped':
+                        fold.feed_dropped(request, readings, part, decided)
+                    else:
+                        fold.feed_run(fold.tracker.request if kind == 'hold' else request, readings, part, decided)
+            for building, pending in resumes.items():
+                folds.get(building).resume(*pending, decided)
+            yield from decided.collect()
+            if total is not None:
+                yield total
+        decided = _Decided(measures)
+        folds.finish(decided)
+        yield from decided.collect()
+
+    return cube_from_cells(*_fold_stream(parts()), measures)
+
+
+def aggregate_files(paths, chunksize=DEFAULT_CHUNKSIZE, measures=None, max_workers=None, low=STATE_THRESHOLD,
+                    high=STATE_THRESHOLD, min_dwell=1, lockout=()):
+    """
+    Stream meter files into an AggregateCube.
+
+    Parameters:
+        paths (list): CSV files, or Parquet files read by row group (needs pyarrow), in time order.
+        chunksize (int): Rows per chunk when aggregating in-process.
+        measures (list): Measure columns, defaults to MEASURES.
+        max_workers (int): Worker processes; CSV files are then split into byte
+            ranges parsed and aggregated in parallel.
+        low, high, min_dwell, lockout: Control setting of the building states, see with_states.
+
+    Returns:
+        AggregateCube: The aggregated cube.
+    """
+    setting = (low, high, min_dwell, tuple(lockout))
+    if max_workers is None or max_workers == 1 or any(path.endswith('.parquet') for path in paths):
+        return aggregate_chunks(iter_chunks(paths, chunksize, measures), measures, *setting)
+
+    jobs = []
+    for path in paths:
+        header, ranges = csv_byte_ranges(path, 2 * max_workers)
+        jobs.extend((path, start, end, header, measures, DEFAULT_BLOCK_BYTES, *setting) for start, end in ranges)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return fold_ranges(executor.map(_range_job, jobs), measures, *setting)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aggregate large meter files into the dashboard cube.')
+    parser.add_argument('files', nargs='+', help='meter CSV (or Parquet) files')
+    parser.add_argument('-o', '--output', default='aggregate_cube.csv', help='cube table output path')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='rows per chunk')
+    parser.add_argument('--workers', type=int, help='number of worker processes')
+    parser.add_argument('--contract-threshold', type=float, default=CONTRACT_THRESHOLD,
+                        help='contract when occupancy falls to this level (%%)')
+    parser.add_argument('--expand-threshold', type=float, default=EXPAND_THRESHOLD,
+                        help='expand when occupancy rises above this level (%%)')
+    parser.add_argument('--min-dwell', type=float, default=MIN_DWELL_HOURS,
+                        help='minimum hours between two movements')
+    args = parser.parse_args(argv)
+
+    cube = aggregate_files(args.files, chunksize=args.chunksize, max_workers=args.workers,
+                           low=args.contract_threshold, high=args.expand_threshold, min_dwell=args.min_dwell)
+    cube.table.to_csv(args.output, index=False)
+    print(f"{len(cube.table)} cube cells saved to: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,305 @@
+import os
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from adjusted_demand import AdjustedDemandEngine, AreaIntensityModel
+from battery_simulation import align_to_times, balance_curve, simulate_self_consumption, summarize
+from data_loader import load_demand_data, load_solar_data
+from data_registry import DataRegistry
+from energy_calculation import calculate_energy_demand, energy_pie_chart
+from energy_consumption_area import energy_consumption_by_area_chart
+from live_ingest import RunningAggregates
+from occupancy_vs_energy import occupancy_vs_energy_graph
+from scenario_engine import PARAMETERS, balance_yields, compute_costs, cost_inputs
+from solar_geometry import annual_poa_grid, hourly_poa, optimal_orientation, orientation_factor, read_solar_weather
+from state_machine import (
+    CONTRACT_THRESHOLD, EXPAND_THRESHOLD, EXPANDED_STATE, MIN_DWELL_HOURS, StateTracker, cycles_per_year,
+    transition_counts, with_states
+)
+from tariff_engine import EXAMPLE_TARIFFS, annual_costs, flat_tariff, tariff_costs
+
+# Data files, relative to the registry's data directory
+DEMAND_DATA_FILE = "occupancy_energy_demand.csv"
+SOLAR_DATA_FILES = {
+    "March": "incident_radiation_21_02_fixed.csv",
+    "June": "incident_radiation_21_06_fixed.csv",
+    "September": "incident_radiation_21_09_fixed.csv",
+    "December": "incident_radiation_21_12_fixed.csv"
+}
+WEATHER_FILE = "DEU_Augsburg.epw"
+
+# Model settings
+DEFAULT_SETTINGS = {
+    'motor_energy_per_cycle': 160,  # kWh per movement cycle
+    # Control of the movements; the number of cycles per year follows from the occupancy
+    'contract_threshold': CONTRACT_THRESHOLD,  # Contract when occupancy falls to this level (%)
+    'expand_threshold': EXPAND_THRESHOLD,  # Expand when occupancy rises above this level (%)
+    'min_dwell_hours': MIN_DWELL_HOURS,  # Minimum hours between two movements
+    'lockout': (),  # LockoutWindow entries in which the building may not move
+    # Area-intensity model of the adjusted demand; the measured demand is for the expanded area
+    'expanded_area': 135.0,  # m²
+    'contracted_area': 65.0,  # m²
+    'fixed_demand_fraction': 0.0,  # Share of the demand that does not scale with the area
+    'pannel_area': 64,
+    'cost_per_kwh': 0.20,  # Adjust based on actual costs
+    'feed_in_rate': 0.08,  # $ paid per exported kWh under the flat cost_per_kwh price
+    'panel_tilt': 90,  # Degrees from horizontal; 90 is a façade
+    'panel_azimuth': 180,  # Degrees clockwise from north; 180 faces south
+    'solar_panel_efficiency': 0.20,
+    'battery_capacity': 0.0,  # Usable kWh, 0 for no battery
+    'battery_power': 5.0,  # kW charge/discharge limit
+    'tariffs': EXAMPLE_TARIFFS[1:],  # Compared with the flat cost_per_kwh price
+    'float32_measures': False  # Halve the memory of the hourly measures for large datasets
+}
+
+
+def create_registry(data_dir=None, **settings):
+    """
+    Declare every dataset, metric and static figure of the dashboard.
+
+    Parameters:
+        data_dir (str): Directory holding the data files.
+        **settings: Overrides of DEFAULT_SETTINGS.
+
+    Returns:
+        DataRegistry: Registry whose artifacts are built on first access.
+    """
+    registry = DataRegistry(data_dir)
+    for name, value in {**DEFAULT_SETTINGS, **settings}.items():
+        registry.set(name, value)
+
+    # Datasets
+    registry.register(
+        'demand_data',
+        lambda data_dir, float32: load_demand_data(os.path.join(data_dir, DEMAND_DATA_FILE), float32=float32),
+        deps=['data_dir', 'float32_measures']
+    )
+    # Building state per hour from the occupancy and the movement control setting
+    registry.register(
+        'data', with_states,
+        deps=['demand_data', 'contract_threshold', 'expand_threshold', 'min_dwell_hours', 'lockout']
+    )
+    registry.register(
+        'combined_data',
+        lambda data_dir: load_solar_data({
+            month: os.path.join(data_dir, file_name) for month, file_name in SOLAR_DATA_FILES.items()
+        }),
+        deps=['data_dir']
+    )
+    # Running aggregates seeded from the history; live readings update them in place
+    registry.register(
+        'running',
+        lambda data, low, high, min_dwell, lockout: RunningAggregates.from_data(
+            data, StateTracker(low, high, min_dwell, lockout)
+        ),
+        deps=['data', 'contract_threshold', 'expand_threshold', 'min_dwell_hours', 'lockout']
+    )
+    registry.register('timeseries', lambda running: running.frame(), deps=['running'])
+    registry.register('cube', lambda running: running.to_cube(), deps=['running'])
+    # Daily adjusted demand derived from the hourly states; only changed days are recomputed
+    registry.register(
+        'adjusted_engine',
+        lambda expanded_area, contracted_area, fixed_fraction: AdjustedDemandEngine(AreaIntensityModel(
+            expanded_area, contracted_area, reference_area=expanded_area, fixed_fraction=fixed_fraction
+        )),
+        deps=['expanded_area', 'contracted_area', 'fixed_demand_fraction']
+    )
+    registry.register(
+        'adjusted_data', lambda engine, timeseries: engine.update(timeseries), deps=['adjusted_engine', 'timeseries']
+    )
+    registry.register('monthly_summary', lambda cube: cube.monthly_summary(), deps=['cube'])
+    registry.register(
+        'solar_weather', lambda data_dir: read_solar_weather(os.path.join(data_dir, WEATHER_FILE)), deps=['data_dir']
+    )
+    registry.register('poa_grid', annual_poa_grid, deps=['solar_weather'])
+    # Plane-of-array irradiance of the best orientation in kWh/m², from the same model as the hourly
+    # generation, so the annual yield below equals the sum of the hourly one
+    registry.register('annual_radiation', lambda poa_grid: optimal_orientation(poa_grid)[2], deps=['poa_grid'])
+    # Yield of the panel orientation relative to the best one; replaces the fixed 0.6 factor
+    registry.register(
+        'reduction_tilt_angle', orientation_factor, deps=['solar_weather', 'poa_grid', 'panel_tilt', 'panel_azimuth']
+    )
+
+    # Metrics
+    # From the time series, so live readings count their movements too
+    registry.register(
+        'state_transitions',
+        lambda timeseries: transition_counts(timeseries['Time'], timeseries['State'] == EXPANDED_STATE),
+        deps=['timeseries']
+    )
+    # Counted movements per year; replaces the fixed number of cycles
+    registry.register(
+        'num_cycles', lambda transitions: float(cycles_per_year(transitions).iloc[0]), deps=['state_transitions']
+    )
+    registry.register('energy_demand', _energy_demand, deps=['cube', 'motor_energy_per_cycle', 'num_cycles'])
+    registry.register(
+        'hourly_radiation', _hourly_radiation, deps=['solar_weather', 'timeseries', 'panel_tilt', 'panel_azimuth']
+    )
+    registry.register(
+        'hourly_generation',
+        lambda radiation, pannel_area, solar_panel_efficiency: pannel_area * radiation * solar_panel_efficiency,
+        deps=['hourly_radiation', 'pannel_area', 'solar_panel_efficiency']
+    )
+    registry.register(
+        'hourly_balance', _hourly_balance,
+        deps=['timeseries', 'hourly_generation', 'battery_capacity', 'battery_power']
+    )
+    registry.register(
+        'self_consumption',
+        lambda timeseries, generation, balance: summarize(
+            timeseries['Energy Demand (kWh)'].to_numpy(dtype=float), generation, balance
+        ).iloc[0].to_dict(),
+        deps=['timeseries', 'hourly_generation', 'hourly_balance']
+    )
+    # The same balance at other PV yields, for the cost model to interpolate when they are swept
+    registry.register(
+        'pv_balance', _pv_balance,
+        deps=['timeseries', 'hourly_radiation', 'annual_radiation', 'pannel_area', 'solar_panel_efficiency',
+              'reduction_tilt_angle', 'battery_capacity', 'battery_power']
+    )
+    registry.register(
+        'tariff_costs', _tariff_costs,
+        deps=['timeseries', 'hourly_balance', 'cost_per_kwh', 'feed_in_rate', 'tariffs']
+    )
+    registry.register(
+        'cost_inputs',
+        lambda energy, annual_radiation, adjusted_data, pv_balance: cost_inputs(
+            energy['total_building_energy'], annual_radiation, adjusted_data, pv_balance
+        ),
+        deps=['energy_demand', 'annual_radiation', 'adjusted_data', 'pv_balance']
+    )
+    # The same cost chain as the scenario explorer and the site batch
+    registry.register(
+        'costs', lambda inputs, *values: compute_costs(inputs, dict(zip(PARAMETERS, values))),
+        deps=['cost_inputs', *PARAMETERS]
+    )
+
+    # Static figures
+    registry.register('occupancy_figure', occupancy_vs_energy_graph, deps=['timeseries'])
+    registry.register(
+        'area_figure', lambda cube: energy_consumption_by_area_chart(cube.state_totals()), deps=['cube']
+    )
+    registry.register(
+        'energy_pie_figure',
+        lambda energy: energy_pie_chart(energy['total_building_energy'], energy['total_motor_energy']),
+        deps=['energy_demand']
+    )
+    registry.register('solar_pie_figure', _solar_pie_figure, deps=['energy_demand', 'costs'])
+    registry.register('demand_comparison_figure', _demand_comparison_figure, deps=['adjusted_data'])
+    return registry
+
+
+def _energy_demand(cube, motor_energy_per_cycle, num_cycles):
+    # The per-state totals carry the same annual sum as the hourly rows
+    total_building_energy, total_motor_energy, total_combined_energy = calculate_energy_demand(
+        data=cube.state_totals(),
+        motor_energy_per_cycle=motor_energy_per_cycle,
+        num_cycles=num_cycles
+    )
+    return {
+        'total_building_energy': total_building_energy,
+        'total_motor_energy': total_motor_energy,
+        'total_combined_energy': total_combined_energy
+    }
+
+
+def _hourly_radiation(weather, timeseries, panel_tilt, panel_azimuth):
+    # Plane-of-array irradiance of the configured orientation, in kWh/m² per demand hour
+    return align_to_times(hourly_poa(weather, panel_tilt, panel_azimuth).to_numpy() / 1000, timeseries['Time'])
+
+
+def _pv_balance(timeseries, radiation, annual_radiation, pannel_area, solar_panel_efficiency, reduction_tilt_angle,
+                battery_capacity, battery_power):
+    # The configured yield is one of the simulated ones, so the cost summary matches hourly_balance
+    current = pannel_area * annual_radiation * solar_panel_efficiency * reduction_tilt_angle
+    load = timeseries['Energy Demand (kWh)'].to_numpy(dtype=float)
+    return balance_curve(load, radiation, balance_yields(annual_radiation, current),
+                         capacity=battery_capacity, power=battery_power)
+
+
+def _hourly_balance(timeseries, generation, battery_capacity, battery_power):
+    # Hourly balance of PV and demand instead of assuming all PV is used on site
+    load = timeseries['Energy Demand (kWh)'].to_numpy(dtype=float)
+    return simulate_self_consumption(load, generation, capacity=battery_capacity, power=battery_power)
+
+
+def _tariff_costs(timeseries, balance, cost_per_kwh, feed_in_rate, tariffs):
+    # Bills without PV (all demand imported) and with the PV/battery balance, per tariff and year
+    tariffs = [flat_tariff(cost_per_kwh, feed_in_rate), *tariffs]
+    without_pv = tariff_costs(timeseries['Time'], timeseries['Energy Demand (kWh)'], tariffs)
+    with_pv = tariff_costs(timeseries['Time'], balance['import'][0], tariffs, exported=balance['export'][0])
+    return pd.concat([without_pv.assign(Scenario='Without PV'), with_pv.assign(Scenario='With PV')],
+                     ignore_index=True)
+
+
+def cost_summary_lines(costs):
+    """Text lines of the cost summary panel."""
+    return [
+        f"Total Energy Demand: {costs['total_energy_demand']:.2f} kWh",
+        f"Cost of Total Energy Demand: ${costs['cost_total_energy_demand']:.2f}",
+        f"Total Energy + Motor Energy Demand: {costs['total_energy_plus_motor']:.2f} kWh",
+        f"Cost of Total Energy Demand + Motor Energy Demand: ${costs['cost_total_energy_plus_motor']:.2f}",
+        f"Motor Energy Cost: ${costs['motor_energy_cost']:.2f}",
+        f"Solar Generation: {costs['solar_generation']:.2f} kWh",
+        f"Solar Contribution (used on site): {costs['solar_energy_covered']:.2f} kWh",
+        f"Solar Export: {costs['solar_export']:.2f} kWh, credited ${costs['export_credit']:.2f}",
+        f"Grid Import: {costs['grid_import']:.2f} kWh",
+        f"Cost Solar Contribution: ${costs['cost_solar_energy_covered']:.2f}",
+        f"Difference of energy by adaption: {costs['difference_energy']:.2f} kWh",
+        f"Cost of difference of energy by adaption: ${costs['cost_difference_energy']:.2f} ",
+        f"Cost Without Concept: ${costs['cost_total_energy_demand']:.2f}",
+        f"Cost With Concept: ${costs['cost_with']:.2f}",
+        f" Approximate Cost Savings: ${costs['accurate_cost_savings']:.2f}",
+    ]
+
+
+def tariff_summary_lines(tariff_costs):
+    """Text lines comparing the average annual bill per tariff with and without PV."""
+    bills = annual_costs(tariff_costs, by=['Tariff', 'Scenario']).unstack('Scenario')
+    bills = bills.reindex(tariff_costs['Tariff'].unique())
+    return [
+        f"{tariff}: ${row['Without PV']:.2f} without PV, ${row['With PV']:.2f} with PV"
+        for tariff, row in bills.iterrows()
+    ]
+
+
+def _solar_pie_figure(energy, costs):
+    solar_energy_covered = costs['solar_energy_covered']
+    return px.pie(
+        values=[energy['total_combined_energy'] - solar_energy_covered, solar_energy_covered],
+        names=["Remaining Energy Demand", "Solar Energy Contribution"],
+        title="Updated Energy Contribution: Solar vs. Remaining Demand",
+        hole=0.4
+    )
+
+
+def _demand_comparison_figure(adjusted_data):
+    return {
+        'data': [
+            go.Scatter(
+                x=adjusted_data['Date'],
+                y=adjusted_data['Energy Demand (kWh)'],
+                mode='lines+markers',
+                name='Energy Demand'
+            ),
+            go.Scatter(
+                x=adjusted_data['Date'],
+                y=adjusted_data['Adjusted Energy Demand (kWh)'],
+                mode='lines+markers',
+                name='Adjusted Energy Demand'
+            )
+        ],
+        'layout': go.Layout(
+            title="Energy Demand vs Adjusted Energy Demand",
+            xaxis={'title': "Date"},
+            yaxis={'title': "Energy (kWh)"},
+            legend={'x': 0, 'y': 1},
+            hovermode='closest'
+        )
+    }
+
+
+# Registry shared by the Dash app and command-line tools
+registry = create_registry()
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Bump when the on-disk layout changes so old caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+CACHE_DIR = os.environ.get(
+    'FINALPITCH_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+
+def source_fingerprint(paths, use_hash=False):
+    """
+    Describe the current state of the source files a cached frame was built from.
+
+    Parameters:
+        paths (list): Paths of the source files.
+        use_hash (bool): Also hash the file contents instead of trusting mtime/size only.
+
+    Returns:
+        list: One dict per source with its path, mtime, size and optional SHA-1.
+    """
+    fingerprint = []
+    for path in paths:
+        stat = os.stat(path)
+        entry = {
+            'path': os.path.abspath(path),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size
+        }
+        if use_hash:
+            sha1 = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha1.update(block)
+            entry['sha1'] = sha1.hexdigest()
+        fingerprint.append(entry)
+    return fingerprint
+
+
+def dataset_version(paths):
+    """Short token that changes whenever one of the given source files changes."""
+    fingerprint = json.dumps(source_fingerprint(paths), sort_keys=True)
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+
+
+def _encode_column(series):
+    # Returns (kind, arrays, extra metadata) for one column
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = [str(c) for c in dtype.categories]
+        return 'category', {'codes': series.cat.codes.to_numpy()}, {'categories': categories}
+    if pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_numeric_dtype(dtype):
+        mask = series.isna().to_numpy()
+        values = series.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+        return 'masked', {'values': values, 'mask': mask}, {'dtype': str(dtype)}
+    if pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        return 'plain', {'values': series.to_numpy()}, {}
+    if pd.api.types.is_string_dtype(dtype):
+        first = series.dropna().iloc[0] if series.notna().any() else None
+        if first is not None and hasattr(first, 'isoformat') and not isinstance(first, str):
+            # Python datetime.date objects, e.g. the derived 'Date' column
+            return 'date', {'values': pd.to_datetime(series).to_numpy().astype('datetime64[D]')}, {}
+        return 'string', {'values': series.astype(str).to_numpy(dtype=str)}, {'dtype': str(dtype)}
+    raise TypeError(f"Cannot cache column '{series.name}' with dtype {dtype}.")
+
+
+def _decode_column(kind, arrays, extra):
+    if kind == 'plain':
+        return arrays['values']
+    # Categorical and masked columns wrap the stored arrays, so memory-mapped columns stay mapped
+    if kind == 'category':
+        # The codes were written from a valid categorical
+        return pd.Categorical.from_codes(np.asarray(arrays['codes']), categories=extra['categories'], validate=False)
+    if kind == 'masked':
+        array_type = pd.api.types.pandas_dtype(extra['dtype']).construct_array_type()
+        return array_type(np.asarray(arrays['values']), np.asarray(arrays['mask']))
+    if kind == 'date':
+        return np.asarray(arrays['values']).astype(object)
+    if kind == 'string':
+        return pd.array(np.asarray(arrays['values']).astype(object), dtype=extra['dtype'])
+    raise ValueError(f"Unknown cached column kind '{kind}'.")
+
+
+def write_frame(frame, directory, meta=None):
+    """
+    Write a DataFrame column by column as .npy files plus a JSON manifest.
+
+    Parameters:
+        frame (DataFrame): Frame to store. The index is not stored.
+        directory (str): Target directory. The frame is written next to it and renamed
+            into place, so readers never see a partly written frame; when several
+            writers race, one complete copy wins and the others are discarded.
+        meta (dict): Extra metadata stored in the manifest.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    columns = []
+    for i, name in enumerate(frame.columns):
+        kind, arrays, extra = _encode_column(frame[name])
+        files = {}
+        for part, array in arrays.items():
+            file_name = f'{i}_{part}.npy'
+            np.save(os.path.join(tmp_dir, file_name), array, allow_pickle=False)
+            files[part] = file_name
+        columns.append({'name': name, 'kind': kind, 'files': files, **extra})
+    manifest = {
+        'format': CACHE_FORMAT_VERSION,
+        'rows': len(frame),
+        'columns': columns,
+        'meta': meta or {}
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    # Move the old copy aside instead of deleting it in place: a rename either happens
+    # or not, so a concurrent writer can only find the target present or absent
+    old_dir = tmp_dir + '.old'
+    try:
+        os.replace(directory, old_dir)
+    except FileNotFoundError:
+        old_dir = None  # First write, or another writer moved it aside already
+    try:
+        os.replace(tmp_dir, directory)
+    except OSError:
+        # Another writer renamed its copy into place first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(directory):
+            raise
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_manifest(directory):
+    """Return the manifest of a cached frame, or None if it does not exist."""
+    try:
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_frame(directory, mmap=True):
+    """
+    Load a frame written by write_frame.
+
+    Parameters:
+        directory (str): Cache directory of the frame.
+        mmap (bool): Memory-map numeric columns instead of reading them into memory.
+
+    Returns:
+        DataFrame: The cached frame.
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No cached frame in '{directory}'.")
+    mmap_mode = 'r' if mmap else None
+    columns = {}
+    for column in manifest['columns']:
+        arrays = {
+            part: np.load(os.path.join(directory, file_name), mmap_mode=mmap_mode, allow_pickle=False)
+            for part, file_name in column['files'].items()
+        }
+        columns[column['name']] = _decode_column(column['kind'], arrays, column)
+    return pd.DataFrame(columns, copy=False)
+
+
+def cached_frame(name, sources, builder, key=None, cache_dir=None, use_hash=False):
+    """
+    Return the frame produced by builder, reusing the on-disk copy while the sources are unchanged.
+
+    Parameters:
+        name (str): Name of the cache entry.
+        sources (list): Source files the frame is derived from.
+        builder (callable): Function without arguments that builds the frame from the sources.
+        key (str): Version of the derivation; changing it invalidates the cache.
+        cache_dir (str): Cache root, defaults to CACHE_DIR.
+        use_hash (bool): Validate the sources by content hash as well as mtime/size.
+
+    Returns:
+        DataFrame: The typed, derived frame.
+    """
+    directory = os.path.join(cache_dir or CACHE_DIR, name)
+    fingerprint = source_fingerprint(sources, use_hash=use_hash)
+    meta = {'sources': fingerprint, 'key': key}
+
+    manifest = read_manifest(directory)
+    if manifest is not None and manifest.get('format') == CACHE_FORMAT_VERSION and manifest.get('meta') == meta:
+        try:
+            return read_frame(directory)
+        except (OSError, ValueError):
+            pass  # Corrupt entry, rebuild below
+
+    frame = builder().reset_index(drop=True)
+    try:
+        write_frame(frame, directory, meta=meta)
+        return read_frame(directory)
+    except (OSError, ValueError):
+        # A read-only data directory, or a concurrent writer replacing the entry,
+        # should not stop the dashboard from starting
+        return frame
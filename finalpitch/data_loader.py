@@ -0,0 +1,100 @@
+import pandas as pd
+
+from data_cache import cached_frame
+from state_machine import with_states
+
+# Version of the derivations below; bump when a loader changes its output columns
+LOADER_VERSION = '2'
+
+# Compact schema of the hourly table: small-int calendar fields next to the datetime64 'Time'
+CALENDAR_DTYPES = {'Month': 'int8', 'Week': 'int8', 'Day': 'int8', 'Hour': 'int8'}
+MEASURE_COLUMNS = ['Occupancy Level (%)', 'Energy Demand (kWh)']
+CATEGORY_COLUMNS = ['Building']  # Identifiers repeated on every row of multi-building data
+
+
+def prepare_demand_data(data, float32=False):
+    """
+    Parse 'Time' and add the derived Week/Month/State columns used by the dashboard.
+
+    The result uses a compact schema: datetime64 'Time', int8 calendar
+    fields, categorical 'State' and identifiers, and optionally float32
+    measures. Dates are derived from 'Time' where needed rather than stored.
+
+    Parameters:
+        data (DataFrame): Raw hourly data with columns ['Time', 'Occupancy Level (%)', 'Energy Demand (kWh)'].
+        float32 (bool): Store the measures as float32, halving their memory.
+
+    Returns:
+        DataFrame: The prepared hourly data.
+    """
+    data['Time'] = pd.to_datetime(data['Time'], errors='coerce')
+    data = data.dropna(subset=['Time'])  # Drop rows with invalid time
+    data['Week'] = data['Time'].dt.isocalendar().week.astype('int8')  # Extract week number
+    data['Month'] = data['Time'].dt.month  # Extract month
+    dtypes = {name: dtype for name, dtype in CALENDAR_DTYPES.items() if name in data.columns}
+    dtypes.update({name: 'category' for name in CATEGORY_COLUMNS if name in data.columns})
+    if float32:
+        dtypes.update({name: 'float32' for name in MEASURE_COLUMNS})
+    # Plain threshold; the registry re-derives the state with the configured control setting
+    return with_states(data.astype(dtypes)).reset_index(drop=True)
+
+
+def prepare_adjusted_data(data):
+    """Ensure the adjusted daily demand data has a 'Date' column."""
+    if 'Date' not in data.columns:
+        if 'Time' in data.columns:
+            data['Time'] = pd.to_datetime(data['Time'])
+            data['Date'] = data['Time'].dt.date  # Extract date from Time column
+        else:
+            raise KeyError("Neither 'Date' nor 'Time' column is available in the dataset.")
+    return data
+
+
+def prepare_solar_data(files):
+    """
+    Combine the per-day incident radiation files into one frame.
+
+    Parameters:
+        files (dict): Mapping of month label to radiation CSV path.
+
+    Returns:
+        DataFrame: Combined data with the parsed 'DateTime' and 'Hour' columns.
+    """
+    combined_data = pd.concat([pd.read_csv(path).assign(Month=month) for month, path in files.items()])
+    combined_data['DateTime'] = pd.to_datetime(combined_data['Time'], errors='coerce')  # Ensure proper time parsing
+    combined_data = combined_data.dropna(subset=['DateTime'])  # Drop rows with invalid DateTime
+    combined_data['Hour'] = combined_data['DateTime'].dt.hour  # Extract hour for the x-axis
+    return combined_data
+
+
+def load_demand_data(path, cache_dir=None, float32=False):
+    """Load the hourly occupancy/energy data, using the columnar cache when it is up to date."""
+    return cached_frame(
+        'demand-float32' if float32 else 'demand',
+        [path],
+        lambda: prepare_demand_data(pd.read_csv(path), float32=float32),
+        key=LOADER_VERSION,
+        cache_dir=cache_dir
+    )
+
+
+def load_adjusted_data(path, cache_dir=None):
+    """Load the adjusted daily energy demand, using the columnar cache when it is up to date."""
+    return cached_frame(
+        'adjusted',
+        [path],
+        lambda: prepare_adjusted_data(pd.read_csv(path)),
+        key=LOADER_VERSION,
+        cache_dir=cache_dir
+    )
+
+
+def load_solar_data(files, cache_dir=None):
+    """Load the combined incident radiation data, using the columnar cache when it is up to date."""
+    return cached_frame(
+        'solar',
+        list(files.values()),
+        lambda: prepare_solar_data(files),
+        key=f"{LOADER_VERSION}:{','.join(files)}",
+        cache_dir=cache_dir
+    )
@@ -0,0 +1,131 @@
+import os
+import threading
+
+DATA_DIR = os.environ.get('FINALPITCH_DATA_DIR', os.path.dirname(os.path.abspath(__file__)))
+
+
+class DataRegistry:
+    """
+    Named datasets and metrics computed lazily from declared dependencies.
+
+    Each artifact is registered with the names it depends on. The first
+    get() builds the dependencies, calls the builder with their values and
+    memoizes the result; invalidating an artifact also drops everything
+    built from it.
+    """
+
+    def __init__(self, data_dir=None):
+        self._builders = {}
+        self._deps = {}
+        self._values = {}
+        self._generations = {}
+        self._lock = threading.RLock()
+        self.set('data_dir', data_dir or DATA_DIR)
+
+    def register(self, name, builder, deps=()):
+        """
+        Declare an artifact.
+
+        Parameters:
+            name (str): Artifact name.
+            builder (callable): Called with the values of deps, in order.
+            deps (list): Names of the artifacts or settings the builder needs.
+        """
+        with self._lock:
+            self._builders[name] = builder
+            self._deps[name] = tuple(deps)
+            self.invalidate(name)
+
+    def artifact(self, name=None, deps=()):
+        """Decorator form of register; the artifact name defaults to the function name."""
+        def decorator(func):
+            self.register(name or func.__name__, func, deps)
+            return func
+        return decorator
+
+    def set(self, name, value):
+        """Set a plain value (e.g. a setting) and invalidate everything that depends on it."""
+        with self._lock:
+            self.invalidate(name)
+            self._builders.pop(name, None)
+            self._deps[name] = ()
+            self._values[name] = value
+
+    def seed(self, name, value):
+        """
+        Store a prebuilt value of a registered artifact.
+
+        Unlike set(), the builder and dependencies are kept, so the artifact
+        is rebuilt as usual once one of its dependencies changes.
+        """
+        with self._lock:
+            if name not in self._builders:
+                raise KeyError(f"Unknown artifact '{name}'.")
+            self.invalidate(name)
+            self._values[name] = value
+
+    def get(self, name):
+        """Return an artifact, building it and its dependencies on first access."""
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+            if name not in self._builders:
+                raise KeyError(f"Unknown artifact '{name}'.")
+            args = [self.get(dep) for dep in self._deps[name]]
+            value = self._builders[name](*args)
+            self._values[name] = value
+            return value
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def is_built(self, name):
+        return name in self._values
+
+    def dependents(self, name, keep=()):
+        """Names of every artifact that depends on name, directly or transitively, other than through keep."""
+        found = set()
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            for other, deps in self._deps.items():
+                if current in deps and other not in found and other not in keep:
+                    found.add(other)
+                    pending.append(other)
+        return found
+
+    def invalidate(self, name):
+        """Drop the memoized value of name and of everything derived from it."""
+        with self._lock:
+            for stale in {name} | self.dependents(name):
+                if stale in self._builders:
+                    self._values.pop(stale, None)
+                self._generations[stale] = self._generations.get(stale, 0) + 1
+
+    def refresh(self, name, keep=()):
+        """
+        Mark name as changed in place: keep its value but drop everything derived from it.
+
+        The artifacts in keep, and those derived from name only through them,
+        keep their values too; refresh again without keep to update them,
+        e.g. less often when they are costly to rebuild.
+        """
+        with self._lock:
+            self._generations[name] = self._generations.get(name, 0) + 1
+            for stale in self.dependents(name, keep):
+                self.invalidate(stale)
+
+    def version(self, *names):
+        """
+        Token that changes whenever one of the named artifacts is invalidated.
+
+        Read without the lock, which get() holds while building, so a version
+        check never waits for a build. Generations only grow and each is
+        replaced in one assignment, so a reader sees either the old or the new
+        count; a token read mid-invalidation just changes again on the next read.
+        """
+        return tuple(self._generations.get(name, 0) for name in names)
+
+    def path(self, file_name):
+        """Resolve a data file relative to the configured data directory."""
+        return os.path.join(self.get('data_dir'), file_name)
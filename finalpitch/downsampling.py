@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# Points per series sent to the browser for a time series chart
+DEFAULT_MAX_POINTS = 2000
+
+
+def _as_float(x):
+    # Datetimes are compared as nanoseconds since the epoch
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm.
+
+    Parameters:
+        x (array): Sorted x values (numeric or datetime64).
+        y (array): y values.
+        max_points (int): Number of points to keep.
+
+    Returns:
+        ndarray: Sorted indices of the kept points.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+
+    # max_points - 2 buckets between the fixed first and last point
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = np.nanmean(y[next_start:next_end]) if next_end > next_start else y[-1]
+        area = np.abs(
+            (x[anchor] - avg_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (avg_y - y[anchor])
+        )
+        anchor = start + (int(np.nanargmax(area)) if np.isfinite(area).any() else 0)
+        selected[i + 1] = anchor
+    return selected
+
+
+def minmax_indices(y, max_points):
+    """
+    Keep the minimum and maximum of each bucket, preserving peaks exactly.
+
+    Parameters:
+        y (array): y values.
+        max_points (int): Number of points to keep (two per bucket).
+
+    Returns:
+        ndarray: Sorted indices of the kept points.
+    """
+    n = len(y)
+    buckets = max(max_points // 2, 1)
+    if max_points >= n:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded = np.full(size * buckets, np.nan)
+    padded[:n] = np.asarray(y, dtype=float)
+    padded = padded.reshape(buckets, size)
+    valid = ~np.isnan(padded).all(axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    lows = offsets + np.nanargmin(padded[valid], axis=1)
+    highs = offsets + np.nanargmax(padded[valid], axis=1)
+    return np.unique(np.concatenate([lows, highs, [0, n - 1]]))
+
+
+def downsample(data, x, columns, max_points=DEFAULT_MAX_POINTS, x_range=None, method='lttb'):
+    """
+    Reduce a time series table to a fixed point budget for the visible range.
+
+    Parameters:
+        data (DataFrame): Table sorted by the x column.
+        x (str): Name of the x column.
+        columns (list): Series to keep the shape of.
+        max_points (int): Point budget per series.
+        x_range (tuple): Optional (start, end) of the visible range.
+        method (str): 'lttb' or 'minmax'.
+
+    Returns:
+        DataFrame: The selected rows of data within the range.
+    """
+    if x_range is not None:
+        xs = data[x]
+        start, end = x_range
+        if pd.api.types.is_datetime64_any_dtype(xs):
+            start, end = pd.Timestamp(start), pd.Timestamp(end)
+        # Keep one point either side so lines run to the edges of the view
+        lo = max(int(xs.searchsorted(start, side='left')) - 1, 0)
+        hi = min(int(xs.searchsorted(end, side='right')) + 1, len(data))
+        data = data.iloc[lo:hi]
+
+    if len(data) <= max_points:
+        return data
+
+    x_values = data[x].to_numpy()
+    selections = []
+    for column in columns:
+        y_values = data[column].to_numpy()
+        if method == 'lttb':
+            selections.append(lttb_indices(x_values, y_values, max_points))
+        elif method == 'minmax':
+            selections.append(minmax_indices(y_values, max_points))
+        else:
+            raise ValueError(f"Unknown downsampling method '{method}'.")
+    return data.iloc[np.unique(np.concatenate(selections))]
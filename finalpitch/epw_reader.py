@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Column layout of the EPW data records (EnergyPlus weather file format)
+EPW_COLUMNS = [
+    "Year", "Month", "Day", "Hour", "Minute", "Data Source and Uncertainty Flags",
+    "Dry Bulb Temperature (°C)", "Dew Point Temperature (°C)", "Relative Humidity (%)",
+    "Atmospheric Station Pressure (Pa)", "Extraterrestrial Horizontal Radiation (Wh/m²)",
+    "Extraterrestrial Direct Normal Radiation (Wh/m²)", "Horizontal Infrared Radiation Intensity (Wh/m²)",
+    "Global Horizontal Radiation (Wh/m²)", "Direct Normal Radiation (Wh/m²)",
+    "Diffuse Horizontal Radiation (Wh/m²)", "Global Horizontal Illuminance (lux)",
+    "Direct Normal Illuminance (lux)", "Diffuse Horizontal Illuminance (lux)",
+    "Zenith Luminance (Cd/m²)", "Wind Direction (°)", "Wind Speed (m/s)",
+    "Total Sky Cover (tenths)", "Opaque Sky Cover (tenths)",
+    "Visibility (km)", "Ceiling Height (m)", "Present Weather Observation",
+    "Present Weather Codes", "Precipitable Water (mm)", "Aerosol Optical Depth (dimensionless)",
+    "Snow Depth (cm)", "Days Since Last Snowfall", "Albedo", "Liquid Precipitation Depth (mm)",
+    "Liquid Precipitation Quantity (hr)"
+]
+
+# Text columns; every other data column is numeric
+EPW_TEXT_COLUMNS = {"Data Source and Uncertainty Flags", "Present Weather Codes"}
+
+# Calendar columns needed to build the index, read with small integer types
+EPW_CALENDAR_DTYPES = {"Year": np.int16, "Month": np.int8, "Day": np.int8, "Hour": np.int8, "Minute": np.int8}
+
+RADIATION_COLUMNS = [
+    "Global Horizontal Radiation (Wh/m²)",
+    "Direct Normal Radiation (Wh/m²)",
+    "Diffuse Horizontal Radiation (Wh/m²)"
+]
+
+
+@dataclass(frozen=True)
+class EPWMetadata:
+    """Location and data-period information from the EPW header."""
+    city: str
+    state: str
+    country: str
+    source: str
+    wmo: str
+    latitude: float
+    longitude: float
+    timezone: float
+    elevation: float
+    header_rows: int
+    records_per_hour: int = 1
+    start_weekday: str = ''
+    period_start: str = ''
+    period_end: str = ''
+
+
+def read_epw_metadata(path):
+    """
+    Parse the header of an EPW file.
+
+    Parameters:
+        path (str): Path of the EPW file.
+
+    Returns:
+        EPWMetadata: Typed location and data-period information.
+    """
+    location = None
+    period = []
+    header_rows = 0
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            header_rows += 1
+            fields = [field.strip() for field in line.rstrip('\r\n').split(',')]
+            if fields[0] == 'LOCATION':
+                location = fields
+            elif fields[0] == 'DATA PERIODS':
+                period = fields
+                break
+    if location is None or len(location) < 10:
+        raise ValueError(f"'{path}' has no valid LOCATION header.")
+    if not period:
+        raise ValueError(f"'{path}' has no DATA PERIODS header.")
+
+    return EPWMetadata(
+        city=location[1],
+        state=location[2],
+        country=location[3],
+        source=location[4],
+        wmo=location[5],
+        latitude=float(location[6]),
+        longitude=float(location[7]),
+        timezone=float(location[8]),
+        elevation=float(location[9]),
+        header_rows=header_rows,
+        records_per_hour=int(period[2]) if len(period) > 2 and period[2] else 1,
+        start_weekday=period[4] if len(period) > 4 else '',
+        period_start=period[5].replace(' ', '') if len(period) > 5 else '',
+        period_end=period[6].replace(' ', '') if len(period) > 6 else ''
+    )
+
+
+def read_epw(path, columns=None, year=None, float_dtype='float64', metadata=None):
+    """
+    Read selected columns of an EPW file into a datetime-indexed frame.
+
+    EPW hours run from 1 to 24 and describe the interval ending at that hour,
+    so the index holds the start of each interval in local standard time.
+
+    Parameters:
+        path (str): Path of the EPW file.
+        columns (list): Data columns to read, defaults to the radiation columns.
+        year (int): Year to place the records in. Defaults to the years in the file,
+            which are mixed for typical meteorological years.
+        float_dtype (str): dtype of the numeric columns, e.g. 'float32' to halve memory.
+        metadata (EPWMetadata): Already parsed header, read from the file when omitted.
+
+    Returns:
+        tuple: (EPWMetadata, DataFrame indexed by 'DateTime').
+    """
+    if metadata is None:
+        metadata = read_epw_metadata(path)
+    columns = list(columns) if columns is not None else list(RADIATION_COLUMNS)
+    unknown = [column for column in columns if column not in EPW_COLUMNS]
+    if unknown:
+        raise KeyError(f"Unknown EPW columns: {unknown}")
+
+    usecols = list(EPW_CALENDAR_DTYPES) + [column for column in columns if column not in EPW_CALENDAR_DTYPES]
+    dtypes = {column: (str if column in EPW_TEXT_COLUMNS else float_dtype) for column in usecols}
+    dtypes.update(EPW_CALENDAR_DTYPES)
+    frame = pd.read_csv(
+        path,
+        skiprows=metadata.header_rows,
+        header=None,
+        names=EPW_COLUMNS,
+        usecols=usecols,
+        dtype=dtypes,
+        engine='c'
+    )
+
+    years = frame['Year'].to_numpy(dtype=np.int64) if year is None else np.full(len(frame), year, dtype=np.int64)
+    days = (
+        (years - 1970).astype('datetime64[Y]')
+        + (frame['Month'].to_numpy(dtype=np.int64) - 1).astype('timedelta64[M]')
+    ).astype('datetime64[D]') + (frame['Day'].to_numpy(dtype=np.int64) - 1).astype('timedelta64[D]')
+    # Records are stamped with the end of their interval; minute 0 or 60 means the end of the hour
+    minute = frame['Minute'].to_numpy(dtype=np.int64)
+    interval_end = (frame['Hour'].to_numpy(dtype=np.int64) - 1) * 60 + np.where((minute > 0) & (minute < 60), minute, 60)
+    minutes = interval_end - 60 // metadata.records_per_hour
+    index = pd.DatetimeIndex(days.astype('datetime64[ns]') + minutes.astype('timedelta64[m]'), name='DateTime')
+
+    frame = frame[columns].set_axis(index, axis=0)
+    return metadata, frame
+
+
+def read_epw_many(paths, columns=None, year=None, float_dtype='float64', max_workers=None):
+    """
+    Read several EPW files concurrently.
+
+    Parameters:
+        paths (list): Paths of the EPW files.
+        columns (list): Data columns to read from each file.
+        year (int): Year to place the records in, see read_epw.
+        float_dtype (str): dtype of the numeric columns.
+        max_workers (int): Number of reader threads, defaults to the CPU count.
+
+    Returns:
+        dict: Mapping of path to (EPWMetadata, DataFrame), in the order of paths.
+    """
+    paths = list(paths)
+    max_workers = max_workers or min(len(paths), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda path: read_epw(path, columns, year, float_dtype), paths)
+        return dict(zip(paths, results))
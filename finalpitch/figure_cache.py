@@ -0,0 +1,122 @@
+import functools
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+# Default number of figures kept per cache
+DEFAULT_MAXSIZE = 64
+
+
+class FigureCache:
+    """
+    Bounded LRU cache of callback figures keyed by callback name, inputs and data version.
+
+    Figures are stored as their encoded JSON, so an entry holds no NumPy
+    arrays or pandas objects and cannot be changed by a caller. A hit decodes
+    it into plain dicts and lists, which Dash encodes again for the response;
+    what a hit saves is the pandas/Plotly Express work and the Figure
+    validation, not the serialization.
+
+    Changing the version token drops every entry built from older data. The
+    version can be a callable, which is then checked on every lookup. An
+    optional transform is applied once to every built figure before it is
+    stored, e.g. to compact it.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, version=None, transform=None):
+        self.maxsize = maxsize
+        self.transform = transform
+        self._version_source = version if callable(version) else None
+        self._version = None if callable(version) else version
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def set_version(self, version):
+        """Switch to a new data version, invalidating the cache if it changed."""
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entries.clear()
+
+    def invalidate(self):
+        """Drop every cached figure."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, name, args, builder):
+        """
+        Return the cached figure for a callback call, building and storing it on a miss.
+
+        Parameters:
+            name (str): Callback name.
+            args (tuple): Callback inputs; must be hashable.
+            builder (callable): Function called with *args to build the figure.
+
+        Returns:
+            dict: The figure as plain JSON data.
+        """
+        if self._version_source is not None:
+            self.set_version(self._version_source())
+        with self._lock:
+            key = (name, args, self._version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                encoded = self._entries[key]
+            else:
+                encoded = None
+                self.misses += 1
+        if encoded is not None:
+            return json.loads(encoded)
+
+        figure = builder(*args)
+        if self._version_source is not None:
+            self.set_version(self._version_source())
+        if hasattr(figure, 'to_plotly_json'):
+            figure = figure.to_plotly_json()
+        if self.transform is not None:
+            figure = self.transform(figure)
+        encoded = pio.to_json(figure, validate=False)
+
+        with self._lock:
+            # Only store if the data did not change while the figure was built
+            if key[2] == self._version:
+                self._entries[key] = encoded
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return json.loads(encoded)
+
+    def memoize(self, name=None):
+        """Decorator caching a figure-building callback by its positional inputs."""
+        def decorator(func):
+            cache_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                return self.get_or_build(cache_name, args, func)
+
+            return wrapper
+        return decorator
+
+    def warm(self, func, inputs):
+        """
+        Pre-build the figures of a memoized callback.
+
+        Parameters:
+            func (callable): Callback wrapped with memoize.
+            inputs (list): Tuples of callback inputs to build.
+        """
+        for args in inputs:
+            func(*args)
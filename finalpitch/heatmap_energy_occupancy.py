@@ -1,29 +1,23 @@
 import plotly.express as px
-import pandas as pd
+from aggregate_cube import AggregateCube
 
 def heatmap_energy_occupancy(data, metric='Energy Demand (kWh)'):
     """
     Generate a heatmap to visualize patterns in energy demand and occupancy.
 
     Parameters:
-        data (DataFrame): DataFrame with columns ['Time', 'Energy Demand (kWh)', 'Occupancy Level (%)'].
+        data (AggregateCube or DataFrame): Precomputed aggregate cube, or hourly data with columns
+            ['Time', 'Week', 'Month', 'State', 'Energy Demand (kWh)', 'Occupancy Level (%)'].
         metric (str): The metric to visualize, either 'Energy Demand (kWh)' or 'Occupancy Level (%)'.
 
     Returns:
         Figure: A Plotly heatmap figure.
     """
-    # Ensure the 'Time' column is parsed as datetime
-    data['Time'] = pd.to_datetime(data['Time'], errors='coerce')
+    # Build the cube on the fly when given raw hourly data; the input is never modified
+    cube = data if isinstance(data, AggregateCube) else AggregateCube.from_data(data)
 
-    # Extract time of day and day of the week
-    data['Hour'] = data['Time'].dt.hour
-    data['Day Type'] = data['Time'].dt.dayofweek.apply(lambda x: 'Weekday' if x < 5 else 'Weekend')
-
-    # Aggregate data to get mean energy demand and occupancy for each hour and day type
-    heatmap_data = data.groupby(['Hour', 'Day Type']).agg({
-        'Energy Demand (kWh)': 'mean',
-        'Occupancy Level (%)': 'mean'
-    }).reset_index()
+    # Mean energy demand and occupancy for each hour and day type
+    heatmap_data = cube.hourly_profile()
 
     # Pivot the data for heatmap
     heatmap_pivot = heatmap_data.pivot(index='Day Type', columns='Hour', values=metric)
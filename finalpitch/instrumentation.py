@@ -0,0 +1,225 @@
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+# Histogram bucket upper bounds: milliseconds for times, bytes for payloads
+TIME_BUCKETS_MS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+SIZE_BUCKETS = [1 << 10, 4 << 10, 16 << 10, 64 << 10, 256 << 10, 1 << 20, 4 << 20, 16 << 20]
+
+# Requests at least this slow (ms) are profiled and dumped when the profiler is enabled
+PROFILE_SLOW_MS = os.environ.get('FINALPITCH_PROFILE_SLOW_MS')
+PROFILE_DIR = os.environ.get(
+    'FINALPITCH_PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+)
+PROFILE_INTERVAL = 0.005  # seconds between stack samples
+
+DASH_UPDATE_PATH = '/_dash-update-component'
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, in the Prometheus layout."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class SamplingProfiler:
+    """
+    Sample the stack of one thread at a fixed interval.
+
+    The samples are kept as collapsed stacks ("outer;inner count" lines), the
+    input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+
+
+class Instrumentation:
+    """
+    Timing of Dash callbacks and startup stages.
+
+    Callbacks wrapped with timed() report their compute time. For each Dash
+    update request the Flask hooks add the serialization time (request total
+    minus compute, i.e. JSON encoding and Dash overhead) and the payload size,
+    send them as a Server-Timing header and feed the /metrics histograms.
+    """
+
+    def __init__(self, profile_slow_ms=None, profile_dir=PROFILE_DIR):
+        self.profile_slow_ms = float(profile_slow_ms) if profile_slow_ms else None
+        self.profile_dir = profile_dir
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, metric, name, value):
+        """Record one observation of metric ('compute_ms', 'serialize_ms', 'payload_bytes', 'stage_ms')."""
+        bounds = SIZE_BUCKETS if metric.endswith('bytes') else TIME_BUCKETS_MS
+        with self._lock:
+            self._histograms.setdefault((metric, name), Histogram(bounds)).observe(value)
+
+    def gauge(self, name, func):
+        """Expose the value returned by func on /metrics, e.g. cache hit counters."""
+        self._gauges[name] = func
+
+    def timed(self, name=None):
+        """Decorator recording the compute time of a callback."""
+        def decorator(func):
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    self.observe('compute_ms', label, elapsed)
+                    if has_request_context():
+                        g.setdefault('callback_timings', []).append((label, elapsed))
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def stage(self, name):
+        """Context manager recording the duration of a startup stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_ms', name, (time.perf_counter() - start) * 1000)
+
+    def install(self, app):
+        """Register the request hooks and the /metrics endpoint on a Dash app's Flask server."""
+        server = app.server
+        server.before_request(self._before_request)
+        server.after_request(self._after_request)
+        server.add_url_rule('/metrics', 'metrics', self._metrics_view)
+        return self
+
+    def _before_request(self):
+        if request.path != DASH_UPDATE_PATH:
+            return
+        g.request_start = time.perf_counter()
+        if self.profile_slow_ms is not None:
+            g.profiler = SamplingProfiler(threading.get_ident()).start()
+
+    def _after_request(self, response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+        total = (time.perf_counter() - start) * 1000
+        profiler = g.pop('profiler', None)
+        stacks = profiler.stop() if profiler is not None else None
+
+        timings = g.get('callback_timings', [])
+        if timings:
+            name = '+'.join(label for label, _ in timings)
+        else:
+            # Untimed callback: fall back to its output id
+            name = (request.get_json(silent=True) or {}).get('output', 'unknown')
+        compute = sum(elapsed for _, elapsed in timings)
+        serialize = max(total - compute, 0.0)
+        payload = response.calculate_content_length() or 0
+
+        self.observe('serialize_ms', name, serialize)
+        self.observe('payload_bytes', name, payload)
+        self.observe('request_ms', name, total)
+        response.headers.add(
+            'Server-Timing',
+            f'compute;dur={compute:.1f};desc="{name}", serialize;dur={serialize:.1f}, total;dur={total:.1f}'
+        )
+
+        if stacks and total >= self.profile_slow_ms:
+            self._dump_profile(name, total, profiler)
+        return response
+
+    def _dump_profile(self, name, total, profiler):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        file_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{name.replace('.', '_')}-{total:.0f}ms.folded"
+        with open(os.path.join(self.profile_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write(profiler.collapsed())
+
+    def metrics_text(self):
+        """Histograms and gauges in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            snapshot = [(key, histogram.cumulative(), histogram.count, histogram.sum) for key, histogram in items]
+        for metric in sorted({key[0] for key, *_ in snapshot}):
+            full_name = f'finalpitch_{metric}'
+            lines.append(f'# TYPE {full_name} histogram')
+            for (name_metric, name), buckets, count, total in snapshot:
+                if name_metric != metric:
+                    continue
+                label = name.replace('"', "'")
+                for bound, cumulative in buckets:
+                    le = '+Inf' if bound == float('inf') else f'{bound}'
+                    lines.append(f'{full_name}_bucket{{name="{label}",le="{le}"}} {cumulative}')
+                lines.append(f'{full_name}_sum{{name="{label}"}} {total:.3f}')
+                lines.append(f'{full_name}_count{{name="{label}"}} {count}')
+        for name, func in sorted(self._gauges.items()):
+            lines.append(f'# TYPE finalpitch_{name} gauge')
+            lines.append(f'finalpitch_{name} {func()}')
+        return '\n'.join(lines) + '\n'
+
+    def _metrics_view(self):
+        # Local diagnostics only
+        if request.remote_addr not in ('127.0.0.1', '::1', None):
+            return Response('Forbidden\n', status=403, mimetype='text/plain')
+        return Response(self.metrics_text(), mimetype='text/plain; version=0.0.4')
+
+
+instrumentation = Instrumentation(profile_slow_ms=PROFILE_SLOW_MS)
@@ -0,0 +1,266 @@
+import csv
+import os
+import threading
+import time
+
+import pandas as pd
+
+from aggregate_cube import CUBE_KEYS, MEASURES, AggregateCube
+from data_loader import CALENDAR_DTYPES
+from state_machine import CONTRACTED_STATE, EXPANDED_STATE, STATE_DTYPE, StateTracker
+
+# Seconds between checks for new lines in a tailed file
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Registry artifacts rebuilt from the whole history rather than from the running cube cells; the
+# live feed refreshes them, and everything derived from them, at most every DEFAULT_HISTORY_INTERVAL
+HISTORY_ARTIFACTS = ('timeseries',)
+DEFAULT_HISTORY_INTERVAL = 60.0
+
+
+class RunningAggregates:
+    """
+    Aggregate cube cells kept up to date one reading at a time.
+
+    Each appended reading updates one cube cell, so the cost of an append
+    does not depend on the history length. The building state of a reading
+    follows the same control setting as the history: while a request has
+    not lasted min_dwell hours its readings are counted with the current
+    state, and they move to the new state's cells once it is acted on.
+    Charts and the annual totals read the state through to_cube(), whose
+    size is bounded by the number of Week/Month/Hour/Day Type/State combinations.
+    """
+
+    def __init__(self, base=None, cells=None, tracker=None):
+        self._base = base
+        self._cells = cells or {}
+        self._rows = []
+        self._tracker = tracker or StateTracker()
+        self._pending = []  # Positions (history first, then appended rows) with a provisional state
+        self._base_states = {}  # History positions whose state changed since seeding
+        self._lock = threading.Lock()
+
+    @property
+    def appended(self):
+        """Number of readings appended since seeding."""
+        return len(self._rows)
+
+    @classmethod
+    def from_data(cls, data, tracker=None):
+        """
+        Seed the running state from the prepared hourly history.
+
+        Parameters:
+            data (DataFrame): Hourly rows whose 'State' was derived by with_states.
+            tracker (StateTracker): New tracker with the control setting used for 'State'.
+        """
+        table = AggregateCube.from_data(data).table
+        sum_columns = [f'{measure} sum' for measure in MEASURES]
+        count_columns = [f'{measure} count' for measure in MEASURES]
+        cells = {
+            tuple(row[:len(CUBE_KEYS)]): list(row[len(CUBE_KEYS):])
+            for row in table[CUBE_KEYS + sum_columns + count_columns].itertuples(index=False, name=None)
+        }
+        running = cls(base=data, cells=cells, tracker=tracker)
+        # Replay the history so the next reading continues its state and dwell time
+        decided = running._tracker.feed(data['Time'], data['Occupancy Level (%)'])
+        running._pending = list(range(len(decided), len(data)))
+        return running
+
+    def _reading(self, position):
+        # (timestamp, occupancy, energy) of a history or appended row
+        base_size = 0 if self._base is None else len(self._base)
+        if position >= base_size:
+            return tuple(self._rows[position - base_size][:3])
+        row = self._base.iloc[position]
+        return pd.Timestamp(row['Time']), row['Occupancy Level (%)'], row['Energy Demand (kWh)']
+
+    def _count(self, position, expanded, sign):
+        # Add (sign=1) or remove (sign=-1) one row from its cube cell
+        timestamp, occupancy, energy = self._reading(position)
+        key = (
+            timestamp.isocalendar()[1],
+            timestamp.month,
+            timestamp.hour,
+            'Weekday' if timestamp.dayofweek < 5 else 'Weekend',
+            EXPANDED_STATE if expanded else CONTRACTED_STATE
+        )
+        values = {'Energy Demand (kWh)': energy, 'Occupancy Level (%)': occupancy}
+        cell = self._cells.setdefault(key, [0.0] * len(MEASURES) + [0] * len(MEASURES))
+        for i, measure in enumerate(MEASURES):
+            if not pd.isna(values[measure]):
+                cell[i] += sign * values[measure]
+                cell[len(MEASURES) + i] += sign
+        if not any(cell[len(MEASURES):]):
+            del self._cells[key]
+
+    def _set_state(self, position, expanded):
+        base_size = 0 if self._base is None else len(self._base)
+        label = EXPANDED_STATE if expanded else CONTRACTED_STATE
+        if position >= base_size:
+            self._rows[position - base_size][3] = label
+        else:
+            self._base_states[position] = label
+
+    def append(self, timestamp, occupancy, energy):
+        """
+        Add one hourly reading.
+
+        Parameters:
+            timestamp: Time of the reading (anything pd.Timestamp accepts).
+            occupancy (float): Occupancy level in %.
+            energy (float): Energy demand in kWh.
+        """
+        timestamp = pd.Timestamp(timestamp)
+        with self._lock:
+            counted = self._tracker.provisional  # State the pending rows are counted with
+            decided = self._tracker.feed([timestamp], [occupancy])
+            position = (0 if self._base is None else len(self._base)) + len(self._rows)
+            self._rows.append([timestamp, occupancy, energy, None])
+
+            rows = self._pending + [position]
+            for row, expanded in zip(rows, decided):
+                if row != position and expanded != counted:
+                    # The request lasted long enough: its earlier hours move with it
+                    self._count(row, counted, -1)
+                    self._count(row, expanded, 1)
+                    self._set_state(row, expanded)
+            self._pending = rows[len(decided):]
+            expanded = decided[-1] if not self._pending else self._tracker.provisional
+            self._count(position, expanded, 1)
+            self._set_state(position, expanded)
+
+    def to_cube(self):
+        """Snapshot of the running state as an AggregateCube."""
+        with self._lock:
+            items = [(key, list(sums)) for key, sums in self._cells.items()]
+        index = pd.MultiIndex.from_tuples([key for key, _ in items], names=CUBE_KEYS)
+        sums = pd.DataFrame([cell[:len(MEASURES)] for _, cell in items], index=index, columns=MEASURES)
+        counts = pd.DataFrame([cell[len(MEASURES):] for _, cell in items], index=index, columns=MEASURES)
+        return AggregateCube.from_parts(sums.sort_index(), counts.sort_index())
+
+    def frame(self):
+        """Hourly history including the appended readings, for the time series chart."""
+        with self._lock:
+            rows = [list(row) for row in self._rows]
+            base_states = dict(self._base_states)
+        if not rows:
+            return self._base
+        # Same compact schema as the prepared history, so concatenating keeps its dtypes
+        times = pd.DatetimeIndex([row[0] for row in rows])
+        calendar = {
+            'Month': times.month,
+            'Week': times.isocalendar().week.to_numpy(),
+            'Day': times.day,
+            'Hour': times.hour
+        }
+        appended = pd.DataFrame({
+            'Time': times,
+            **{name: pd.array(values).astype(CALENDAR_DTYPES[name]) for name, values in calendar.items()},
+            'State': pd.Categorical([row[3] for row in rows], dtype=STATE_DTYPE),
+            'Occupancy Level (%)': [row[1] for row in rows],
+            'Energy Demand (kWh)': [row[2] for row in rows]
+        })
+        if self._base is None:
+            return appended
+        appended = appended.astype(self._base[[name for name in appended.columns if name in self._base]].dtypes)
+        appended = appended[[name for name in self._base.columns if name in appended]]
+        frame = pd.concat([self._base, appended], ignore_index=True)
+        if base_states:
+            frame.loc[list(base_states), 'State'] = list(base_states.values())
+        return frame
+
+
+def tail_csv(path, poll_interval=DEFAULT_POLL_INTERVAL, from_start=False, stop_event=None):
+    """
+    Follow a CSV file and yield the rows appended to it, like ``tail -f``.
+
+    Parameters:
+        path (str): CSV file with a header line.
+        poll_interval (float): Seconds to wait when no new line is available.
+        from_start (bool): Also yield the rows already in the file.
+        stop_event (threading.Event): Stops the generator when set.
+
+    Yields:
+        dict: One parsed row per appended line.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader([f.readline()]))
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        pending = ''
+        while stop_event is None or not stop_event.is_set():
+            line = f.readline()
+            if not line:
+                time.sleep(poll_interval)
+                continue
+            pending += line
+            if not pending.endswith('\n'):
+                continue  # Partial line, wait for the writer to finish it
+            values = next(csv.reader([pending]))
+            pending = ''
+            if values:
+                yield dict(zip(header, values))
+
+
+def ingest_rows(running, rows, on_batch=None, batch_size=1):
+    """
+    Append meter readings to the running aggregates.
+
+    Parameters:
+        running (RunningAggregates): State to update.
+        rows (iterable): Dicts with 'Time', 'Occupancy Level (%)' and 'Energy Demand (kWh)'.
+        on_batch (callable): Called after every batch_size rows, e.g. to refresh the registry.
+        batch_size (int): Number of rows per batch.
+    """
+    count = 0
+    for row in rows:
+        running.append(row['Time'], float(row['Occupancy Level (%)']), float(row['Energy Demand (kWh)']))
+        count += 1
+        if on_batch is not None and count % batch_size == 0:
+            on_batch()
+    if on_batch is not None and count % batch_size:
+        on_batch()
+
+
+def refresh_live(registry, history=False):
+    """
+    Refresh the registry after readings were appended to its running aggregates.
+
+    Without history only the artifacts built from the cube cells are dropped,
+    so the cost does not grow with the history; HISTORY_ARTIFACTS and what is
+    derived from them keep their values until a refresh with history.
+    """
+    registry.refresh('running', keep=() if history else HISTORY_ARTIFACTS)
+
+
+def start_live_feed(registry, path, poll_interval=DEFAULT_POLL_INTERVAL, history_interval=DEFAULT_HISTORY_INTERVAL):
+    """
+    Tail a meter CSV in a background thread and feed it into the registry's running aggregates.
+
+    Every batch refreshes the cube-based artifacts; a second thread refreshes
+    the full-history ones every history_interval seconds if readings arrived.
+
+    Returns:
+        threading.Event: Set it to stop the feed.
+    """
+    stop_event = threading.Event()
+    running = registry.get('running')
+
+    def run():
+        ingest_rows(
+            running,
+            tail_csv(path, poll_interval=poll_interval, stop_event=stop_event),
+            on_batch=lambda: refresh_live(registry)
+        )
+
+    def refresh_history():
+        refreshed = running.appended
+        while not stop_event.wait(history_interval):
+            if running.appended != refreshed:
+                refreshed = running.appended
+                refresh_live(registry, history=True)
+
+    threading.Thread(target=run, name='live-feed', daemon=True).start()
+    threading.Thread(target=refresh_history, name='live-history', daemon=True).start()
+    return stop_event
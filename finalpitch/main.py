@@ -1,131 +1,64 @@
-from dash import Dash, dcc, html, Input, Output
-from occupancy_vs_energy import occupancy_vs_energy_graph
+import os
+
+from dash import Dash, ctx, dcc, html, Input, Output, State, no_update
+from occupancy_vs_energy import occupancy_vs_energy_graph, relayout_x_range
 from solar_energy import solar_energy_chart
-from energy_consumption_area import energy_consumption_by_area_chart
 from stacked_bar_chart import stacked_bar_chart
 from heatmap_energy_occupancy import heatmap_energy_occupancy
-from energy_calculation import calculate_energy_demand, energy_pie_chart
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from year_generation import calculate_radiation
-
-# Load the adjusted data
-adjusted_data_path = "Adjusted_Daily_Energy_Demand.csv"
-data1 = pd.read_csv(adjusted_data_path)
-
-# Ensure the 'Date' column is present
-if 'Date' not in data1.columns:
-    if 'Time' in data1.columns:
-        data1['Time'] = pd.to_datetime(data1['Time'])
-        data1['Date'] = data1['Time'].dt.date  # Extract date from Time column
-    else:
-        raise KeyError("Neither 'Date' nor 'Time' column is available in the dataset.")
-
-# Load the main data
-data = pd.read_csv("occupancy_energy_demand.csv")
-data['Time'] = pd.to_datetime(data['Time'], errors='coerce')
-data.dropna(subset=['Time'], inplace=True)  # Drop rows with invalid time
-data['Date'] = data['Time'].dt.date  # Extract the date
-data['Week'] = data['Time'].dt.isocalendar().week  # Extract week number
-data['Month'] = data['Time'].dt.month  # Extract month
-data['State'] = data['Occupancy Level (%)'].apply(lambda x: 'Expanded (135 m²)' if x > 50 else 'Contracted (65 m²)')
-
-# Constants
-motor_energy_per_cycle = 160  # kWh per movement cycle
-num_cycles = 40  # Total number of movements per year
-pannel_area= 64
-
-
-
-# Calculate total energy demand and total adjusted energy demand
-total_energy_demand = data1['Energy Demand (kWh)'].sum()
-total_adjusted_energy_demand = data1['Adjusted Energy Demand (kWh)'].sum()
-difference_energy = total_energy_demand - total_adjusted_energy_demand
-
-# Define the cost per kWh
-cost_per_kwh = 0.20  # Adjust based on actual costs
-cost_savings = difference_energy * cost_per_kwh
-# Perform calculations
-total_building_energy, total_motor_energy, total_combined_energy = calculate_energy_demand(
-    data=data,
-    motor_energy_per_cycle=motor_energy_per_cycle,
-    num_cycles=num_cycles
-)
-
-# Create pie chart
-pie_chart_figure = energy_pie_chart(total_building_energy, total_motor_energy)
-
-
-# Solar panel efficiency
-reduction_tilt_angle= 0.6
-solar_panel_efficiency = 0.20
-annual_radiation = calculate_radiation()
-annual_energy_generation =pannel_area*annual_radiation * solar_panel_efficiency
-solar_energy_covered=pannel_area*annual_radiation*solar_panel_efficiency*reduction_tilt_angle
-
-fig_pie_updated = px.pie(
-    values=[total_combined_energy - solar_energy_covered, solar_energy_covered],
-    names=["Remaining Energy Demand", "Solar Energy Contribution"],
-    title="Updated Energy Contribution: Solar vs. Remaining Demand",
-    hole=0.4
-)
-
-# Aggregate data for charts
-weekly_data = data.groupby(['Week', 'State']).agg({'Energy Demand (kWh)': 'sum'}).reset_index()
-monthly_data = data.groupby(['Month', 'State']).agg({'Energy Demand (kWh)': 'sum'}).reset_index()
-monthly_summary = data.groupby('Month').agg({
-    'Occupancy Level (%)': 'mean',
-    'Energy Demand (kWh)': 'mean'
-}).reset_index()
-
-# Load the combined solar energy data
-combined_data = pd.concat([
-    pd.read_csv("incident_radiation_21_02_fixed.csv").assign(Month="March"),
-    pd.read_csv("incident_radiation_21_06_fixed.csv").assign(Month="June"),
-    pd.read_csv("incident_radiation_21_09_fixed.csv").assign(Month="September"),
-    pd.read_csv("incident_radiation_21_12_fixed.csv").assign(Month="December")
-])
-combined_data['DateTime'] = pd.to_datetime(combined_data['Time'], errors='coerce')  # Ensure proper time parsing
-combined_data.dropna(subset=['DateTime'], inplace=True)  # Drop rows with invalid DateTime
-combined_data['Hour'] = combined_data['DateTime'].dt.hour  # Extract hour for the x-axis
-
-#Cost Total energy demand
-cost_total_energy_demand= total_energy_demand* cost_per_kwh
-# Total energy demand including motor energy
-total_energy_plus_motor = total_energy_demand + total_motor_energy
-#Cost total_energy_plus_motor
-cost_total_energy_plus_motor= total_energy_plus_motor* cost_per_kwh
-# Calculate motor energy cost
-motor_energy_cost = total_motor_energy * cost_per_kwh
+from figure_cache import FigureCache
+from instrumentation import instrumentation
+from payload_compaction import COMPACT_PAYLOADS, install_compression, payload_figure
+from dashboard_data import DEFAULT_SETTINGS, registry, cost_summary_lines, tariff_summary_lines
+from live_ingest import start_live_feed
+from scenario_panel import register_scenario_callbacks, scenario_layout
+from shared_dataset import SHARED_DATA_DIR, share_datasets
 
-#cost solar energy covered
-cost_solar_energy_covered= solar_energy_covered*cost_per_kwh
+# Datasets, metrics and figures are declared in dashboard_data and built lazily on first use,
+# so importing the app does no data work and each panel only builds what it needs.
 
+# Figures served by the callbacks are cached per input and data version
+DATA_ARTIFACTS = ('data', 'adjusted_data', 'combined_data', 'running')
+# With FINALPITCH_COMPACT_PAYLOADS set, figures are stored compacted (see payload_compaction.py)
+figure_cache = FigureCache(version=lambda: registry.version(*DATA_ARTIFACTS), transform=payload_figure)
 
-#difference_energy per cost
+# Optional CSV of live hourly meter readings, tailed while the server runs
+LIVE_FEED_PATH = os.environ.get('FINALPITCH_LIVE_FEED')
+LIVE_REFRESH_MS = 5000
 
-cost_difference_energy= difference_energy* cost_per_kwh
 
-#cost with proposal
+def data_version():
+    # String token sent to the browser; changes whenever the data behind the charts changes
+    return '-'.join(str(generation) for generation in registry.version(*DATA_ARTIFACTS))
 
-cost_with= cost_total_energy_plus_motor-cost_difference_energy-cost_solar_energy_covered
-
-# Accurate cost savings
-accurate_cost_savings = cost_difference_energy+cost_solar_energy_covered
 
+# Under several worker processes, one snapshot of the large frames is memory-mapped by all of them
+if SHARED_DATA_DIR:
+    with instrumentation.stage('share_datasets'):
+        share_datasets(registry, SHARED_DATA_DIR)
 
 # Dash app initialization
 app = Dash(__name__)
+server = app.server  # WSGI entry point, e.g. gunicorn --workers 4 main:server
+
+# Server-Timing headers and /metrics for every callback; see instrumentation.py
+instrumentation.install(app)
+instrumentation.gauge('figure_cache_hits', lambda: figure_cache.hits)
+instrumentation.gauge('figure_cache_misses', lambda: figure_cache.misses)
+if COMPACT_PAYLOADS:
+    install_compression(app)
 
 # Define the layout
 app.layout = html.Div([
     html.H1("Energy Dashboard", style={'textAlign': 'center'}),
 
+    # Live data: the interval polls for new readings and bumps the data version
+    dcc.Interval(id='live-refresh', interval=LIVE_REFRESH_MS, disabled=LIVE_FEED_PATH is None),
+    dcc.Store(id='data-version', data=data_version()),
+
     # Occupancy vs Energy Demand
     html.Div([
         html.H2("Occupancy vs Energy Demand"),
-        dcc.Graph(figure=occupancy_vs_energy_graph(data))
+        dcc.Graph(id='occupancy-energy-graph')
     ]),
 
     # Solar Energy Contribution (Linear Chart for All Months)
@@ -138,19 +71,19 @@ app.layout = html.Div([
     # Energy Consumption by Area
     html.Div([
         html.H2("Energy Consumption by Area"),
-        dcc.Graph(figure=energy_consumption_by_area_chart(data.groupby('State')['Energy Demand (kWh)'].sum().reset_index()))
+        dcc.Graph(id='area-chart')
     ]),
 
     # Energy demand
     html.Div([
         html.H2("Energy Demand Breakdown"),
-        dcc.Graph(figure=pie_chart_figure)
+        dcc.Graph(id='energy-pie-chart')
     ]),
 
     #year_generation
     html.Div([
         html.H2("Updated Energy Contribution: Solar vs. Remaining Demand"),
-        dcc.Graph(figure=fig_pie_updated)
+        dcc.Graph(id='solar-pie-chart')
     ]),
 
 
@@ -188,77 +121,134 @@ app.layout = html.Div([
         html.H1("Energy Demand vs Adjusted Energy Demand", style={'textAlign': 'center'}),
 
         # Line chart
-        dcc.Graph(
-            id='energy-demand-comparison',
-            figure={
-                'data': [
-                    go.Scatter(
-                        x=data1['Date'],
-                        y=data1['Energy Demand (kWh)'],
-                        mode='lines+markers',
-                        name='Energy Demand'
-                    ),
-                    go.Scatter(
-                        x=data1['Date'],
-                        y=data1['Adjusted Energy Demand (kWh)'],
-                        mode='lines+markers',
-                        name='Adjusted Energy Demand'
-                    )
-                ],
-                'layout': go.Layout(
-                    title="Energy Demand vs Adjusted Energy Demand",
-                    xaxis={'title': "Date"},
-                    yaxis={'title': "Energy (kWh)"},
-                    legend={'x': 0, 'y': 1},
-                    hovermode='closest'
-                )
-            }
-        ),
+        dcc.Graph(id='energy-demand-comparison'),
 
         # Difference annotation
-        html.Div([
-            html.H2(f"Total Energy Demand: {total_energy_demand:.2f} kWh"),
-            html.H2(f"Cost of Total Energy Demand: ${cost_total_energy_demand:.2f}"),
-            html.H2(f"Total Energy + Motor Energy Demand: {total_energy_plus_motor:.2f} kWh"),
-            html.H2(f"Cost of Total Energy Demand + Motor Energy Demand: ${cost_total_energy_plus_motor:.2f}"),
-            html.H2(f"Motor Energy Cost: ${motor_energy_cost:.2f}"),
-            html.H2(f"Solar Contribution: {solar_energy_covered:.2f} kWh"),
-            html.H2(f"Cost Solar Contribution: ${cost_solar_energy_covered:.2f}"),
-            html.H2(f"Difference of energy by adaption: {difference_energy:.2f} kWh"),
-            html.H2(f"Cost of difference of energy by adaption: ${cost_difference_energy:.2f} "),
-            html.H2(f"Cost Without Concept: ${cost_total_energy_demand:.2f}"),
-            html.H2(f"Cost With Concept: ${cost_with:.2f}"),
-            html.H2(f" Approximate Cost Savings: ${accurate_cost_savings:.2f}"),
-        ], style={'textAlign': 'center'}),
-
-    ])
+        html.Div(id='cost-summary', style={'textAlign': 'center'}),
+
+    ]),
+
+    # What-if exploration of the cost model; computed parameters are filled in on page load
+    scenario_layout(DEFAULT_SETTINGS)
 
 ])
 
+register_scenario_callbacks(app, registry)
+
+# Static panels: each graph id maps to the registry figure it shows
+STATIC_FIGURES = {
+    'area-chart': 'area_figure',
+    'energy-pie-chart': 'energy_pie_figure',
+    'solar-pie-chart': 'solar_pie_figure',
+    'energy-demand-comparison': 'demand_comparison_figure'
+}
+
+
+def register_static_figure(graph_id, artifact):
+    @app.callback(
+        Output(graph_id, 'figure'),
+        Input(graph_id, 'id'),  # Dummy input to trigger rendering
+        Input('data-version', 'data')
+    )
+    @instrumentation.timed(artifact)
+    @figure_cache.memoize(artifact)
+    def display_static_figure(_, version=None):
+        return registry.get(artifact)
+    return display_static_figure
+
+
+for graph_id, artifact in STATIC_FIGURES.items():
+    register_static_figure(graph_id, artifact)
+
+
 # Callbacks
+@app.callback(
+    Output('data-version', 'data'),
+    Input('live-refresh', 'n_intervals'),
+    State('data-version', 'data')
+)
+@instrumentation.timed()
+def refresh_data_version(_, current_version):
+    version = data_version()
+    return no_update if version == current_version else version
+
+
+@app.callback(
+    Output('cost-summary', 'children'),
+    Input('cost-summary', 'id'),  # Dummy input to trigger rendering
+    Input('data-version', 'data')
+)
+@instrumentation.timed()
+def display_cost_summary(_, version=None):
+    lines = [html.H2(line) for line in cost_summary_lines(registry.get('costs'))]
+    # Annual bills under the configured tariffs, from the hourly PV/battery balance
+    lines.append(html.H3("Annual bill by tariff"))
+    lines.extend(html.P(line) for line in tariff_summary_lines(registry.get('tariff_costs')))
+    return lines
+
+
 @app.callback(
     Output('solar-energy-linear-chart', 'figure'),
-    Input('solar-energy-linear-chart', 'id')  # Dummy input to trigger rendering
+    Input('solar-energy-linear-chart', 'id'),  # Dummy input to trigger rendering
+    Input('data-version', 'data')
 )
-def display_solar_energy_linear_chart(_):
+@instrumentation.timed()
+@figure_cache.memoize()
+def display_solar_energy_linear_chart(_, version=None):
     # Ensure data for all months is included
-    return solar_energy_chart(combined_data)
+    return solar_energy_chart(registry.get('combined_data'))
+
+
+@app.callback(
+    Output('occupancy-energy-graph', 'figure'),
+    Input('occupancy-energy-graph', 'relayoutData'),
+    Input('data-version', 'data')
+)
+@instrumentation.timed()
+def update_occupancy_energy_graph(relayout_data, version=None):
+    if relayout_data is None or ctx.triggered_id == 'data-version':
+        return payload_figure(registry.get('occupancy_figure'))  # Initial render: downsampled full range
+    # Re-query the visible range at full resolution when the user zooms or pans
+    x_range = relayout_x_range(relayout_data)
+    if x_range is None and not relayout_data.get('xaxis.autorange'):
+        return no_update  # Layout change that does not move the x axis
+    return payload_figure(occupancy_vs_energy_graph(registry.get('timeseries'), x_range=x_range))
 
 
 @app.callback(
     Output('stacked-bar-chart', 'figure'),
-    Input('aggregation-level', 'value')
+    Input('aggregation-level', 'value'),
+    Input('data-version', 'data')
 )
-def update_stacked_bar(aggregation_level):
-    return stacked_bar_chart(aggregation_level, weekly_data, monthly_data)
+@instrumentation.timed()
+@figure_cache.memoize()
+def update_stacked_bar(aggregation_level, version=None):
+    cube = registry.get('cube')
+    return stacked_bar_chart(aggregation_level, cube.weekly_by_state(), cube.monthly_by_state())
 
 @app.callback(
     Output('heatmap-chart', 'figure'),
-    Input('metric-selector', 'value')
+    Input('metric-selector', 'value'),
+    Input('data-version', 'data')
 )
-def update_heatmap(selected_metric):
-    return heatmap_energy_occupancy(data, metric=selected_metric)
+@instrumentation.timed()
+@figure_cache.memoize()
+def update_heatmap(selected_metric, version=None):
+    return heatmap_energy_occupancy(registry.get('cube'), metric=selected_metric)
+
+
+def warm_figure_cache():
+    # Pre-build the figures for every callback input so first requests are served from the cache
+    version = data_version()
+    figure_cache.warm(display_solar_energy_linear_chart, [('solar-energy-linear-chart', version)])
+    figure_cache.warm(update_stacked_bar, [('Weekly', version), ('Monthly', version)])
+    figure_cache.warm(update_heatmap, [('Energy Demand (kWh)', version), ('Occupancy Level (%)', version)])
+
 
 # Run the Dash app
 if __name__ == "__main__":
+    with instrumentation.stage('warm_figure_cache'):
+        warm_figure_cache()
+    if LIVE_FEED_PATH:
+        start_live_feed(registry, LIVE_FEED_PATH)
     app.run_server(debug=True)
@@ -1,10 +1,50 @@
 import plotly.express as px
+from downsampling import DEFAULT_MAX_POINTS, downsample
 
-def occupancy_vs_energy_graph(data):
-    return px.line(
+SERIES = ['Occupancy Level (%)', 'Energy Demand (kWh)']
+
+
+def occupancy_vs_energy_graph(data, max_points=DEFAULT_MAX_POINTS, x_range=None, method='lttb'):
+    """
+    Generate a line chart of occupancy and energy demand over time.
+
+    Parameters:
+        data (DataFrame): Hourly data with columns ['Time', 'Occupancy Level (%)', 'Energy Demand (kWh)'].
+        max_points (int): Point budget per series; None sends every row.
+        x_range (tuple): Optional (start, end) of the visible range to refine.
+        method (str): Downsampling method, 'lttb' or 'minmax'.
+
+    Returns:
+        Figure: A Plotly figure object.
+    """
+    if max_points is not None:
+        data = downsample(data, 'Time', SERIES, max_points=max_points, x_range=x_range, method=method)
+
+    fig = px.line(
         data,
         x='Time',
-        y=['Occupancy Level (%)', 'Energy Demand (kWh)'],
+        y=SERIES,
         title='Occupancy and Energy Demand Over Time',
         labels={'value': 'Percentage/Energy', 'variable': 'Metric'}
     )
+    # Keep the user's zoom when the figure is replaced by a refined one
+    fig.update_layout(uirevision='occupancy-vs-energy')
+    if x_range is not None:
+        fig.update_xaxes(range=list(x_range))
+    return fig
+
+
+def relayout_x_range(relayout_data):
+    """
+    Extract the visible x range from a Dash relayoutData event.
+
+    Returns:
+        tuple: (start, end), or None when the axis was reset to the full range.
+    """
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'][:2])
+    return None
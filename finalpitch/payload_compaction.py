@@ -0,0 +1,181 @@
+import base64
+import gzip
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from flask import request
+
+# Opt-in: compact figures and gzip callback responses
+COMPACT_PAYLOADS = os.environ.get('FINALPITCH_COMPACT_PAYLOADS', '').lower() in ('1', 'true', 'yes')
+
+# Decimal places kept in numeric trace arrays
+PAYLOAD_PRECISION = int(os.environ.get('FINALPITCH_PAYLOAD_PRECISION', 3))
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+COMPRESS_LEVEL = 6
+
+# Trace attributes that hold data arrays
+ARRAY_KEYS = ('x', 'y', 'z', 'values', 'lat', 'lon')
+
+# Trace types that accept x0/dx and y0/dy in place of a coordinate array
+STEP_TRACES = {'scatter', 'scattergl', 'bar', 'heatmap', 'contour'}
+
+# plotly.js typed array codes; int64 has none and is sent as float64
+TYPED_ARRAY_CODES = {
+    'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2',
+    'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8'
+}
+CODE_DTYPES = {code: np.dtype(name) for name, code in TYPED_ARRAY_CODES.items()}
+
+
+def encode_array(values, precision=PAYLOAD_PRECISION):
+    """
+    Encode a numeric array as a plotly.js typed array ({dtype, bdata[, shape]}).
+
+    Floats are rounded to precision decimals and sent as float32 when that
+    keeps the rounded values exact enough; integers use the smallest integer type.
+
+    Returns:
+        dict: The typed array spec, or None when values are not numeric.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        low, high = (values.min(), values.max()) if values.size else (0, 0)
+        for dtype in (np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                values = values.astype(dtype)
+                break
+        else:
+            values = values.astype(np.float64)
+    elif values.dtype.kind == 'f':
+        values = np.round(values.astype(np.float64), precision)
+        finite = np.abs(values[np.isfinite(values)])
+        # float32 holds 24 bits of mantissa: enough while the scaled values stay below 2**24
+        scale = finite.max() * 10 ** precision if finite.size else 0
+        values = values.astype(np.float32 if scale < 2 ** 24 else np.float64)
+    elif values.dtype.kind == 'b':
+        values = values.astype(np.uint8)
+    else:
+        return None
+
+    spec = {
+        'dtype': TYPED_ARRAY_CODES[values.dtype.name],
+        'bdata': base64.b64encode(np.ascontiguousarray(values).tobytes()).decode('ascii')
+    }
+    if values.ndim > 1:
+        spec['shape'] = ', '.join(str(size) for size in values.shape)
+    return spec
+
+
+def decode_array(spec):
+    """Decode a typed array spec back into a NumPy array."""
+    values = np.frombuffer(base64.b64decode(spec['bdata']), dtype=CODE_DTYPES[spec['dtype']])
+    if 'shape' in spec:
+        values = values.reshape([int(size) for size in str(spec['shape']).split(',')])
+    return values
+
+
+def _as_datetimes(values):
+    # datetime64 arrays, or ISO strings as found in serialized figures; None otherwise
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+        return pd.DatetimeIndex(values)
+    # Only full dates such as 2025-01-01..., so labels like '2025' or 'Jan' stay categories
+    if len(values) and isinstance(values[0], str) and len(values[0]) >= 10 and values[0][4] == '-':
+        try:
+            return pd.DatetimeIndex(pd.to_datetime(values, format='ISO8601'))
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def _compact_time_axis(trace, key, times, layout):
+    # Regular steps become start + step; irregular ones milliseconds since the epoch
+    # plotly.js reads numbers on date axes as milliseconds
+    milliseconds = times.as_unit('ms').asi8
+    step = np.diff(milliseconds) if len(times) > 2 else None
+    if trace.get('type', 'scatter') in STEP_TRACES and step is not None and (step == step[0]).all():
+        del trace[key]
+        trace[f'{key}0'] = times[0].isoformat()
+        trace[f'd{key}'] = int(step[0])
+    else:
+        trace[key] = encode_array(milliseconds)
+    # Numbers are only read as dates on an axis declared as such
+    axis = trace.get(f'{key}axis', key)
+    layout_key = f'{key}axis' if axis == key else f'{key}axis{axis[1:]}'
+    layout[layout_key] = {**layout.get(layout_key, {}), 'type': 'date'}
+
+
+def compact_trace(trace, layout, precision=PAYLOAD_PRECISION):
+    """Compact the data arrays of one trace; layout is updated for converted date axes."""
+    trace = dict(trace)
+    for key in ARRAY_KEYS:
+        values = trace.get(key)
+        if values is None:
+            continue
+        if isinstance(values, dict) and 'bdata' in values:
+            trace[key] = encode_array(decode_array(values), precision)
+            continue
+        if not isinstance(values, (list, tuple, np.ndarray, pd.Series, pd.Index)):
+            continue
+        if key in ('x', 'y'):
+            times = _as_datetimes(values)
+            if times is not None:
+                if not times.hasnans:
+                    _compact_time_axis(trace, key, times, layout)
+                continue
+        array = np.asarray(values)
+        if array.dtype == object:
+            try:
+                array = array.astype(np.float64)
+            except (ValueError, TypeError):
+                continue  # Categories or labels stay as they are
+        encoded = encode_array(array, precision)
+        if encoded is not None:
+            trace[key] = encoded
+    return trace
+
+
+def compact_figure(figure, precision=PAYLOAD_PRECISION):
+    """
+    Shrink a figure for transfer: rounded typed/base64 arrays and start+step time axes.
+
+    Parameters:
+        figure (Figure or dict): The figure to compact.
+        precision (int): Decimal places kept in numeric arrays.
+
+    Returns:
+        dict: The compacted figure, ready to return from a callback.
+    """
+    # Plain JSON first: figure dicts may still hold graph objects such as go.Layout
+    figure = go.Figure(figure).to_plotly_json()
+    layout = dict(figure.get('layout', {}))
+    data = [compact_trace(trace, layout, precision) for trace in figure.get('data', [])]
+    return {**figure, 'data': data, 'layout': layout}
+
+
+def payload_figure(figure):
+    """Compact figure when compact payloads are enabled; otherwise return it unchanged."""
+    return compact_figure(figure) if COMPACT_PAYLOADS else figure
+
+
+def install_compression(app, min_size=MIN_COMPRESS_BYTES, level=COMPRESS_LEVEL):
+    """Gzip the Dash server's responses for clients that accept it."""
+    @app.server.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.status_code != 200
+                or 'Content-Encoding' in response.headers
+                or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    return compress_response
@@ -0,0 +1,306 @@
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+RADIATION_COLUMN = 'Radiation (kWh/m²)'
+
+# The sensor exports cover the daylight window 06:00-20:00 in equal steps
+DAYLIGHT_START = pd.Timedelta(hours=6)
+DAYLIGHT_END = pd.Timedelta(hours=20)
+
+DEFAULT_YEAR = 2025
+
+# Time encodings found in the incident_radiation_*.csv exports
+TIME_FORMATS = {
+    # 2025-03-21 06:01:05.710560626
+    'iso': re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?$'),
+    # 06/21/2025 06:00 (zero padded, minute resolution)
+    'us_padded': re.compile(r'^\d{2}/\d{2}/\d{4} \d{2}:\d{2}$'),
+    # 3/21/2025 6:00 (unpadded, minute resolution)
+    'us_short': re.compile(r'^\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}$'),
+    # 01:05.7 (minutes:seconds since the start of the window, without the hour)
+    'elapsed': re.compile(r'^\d+:\d{2}(\.\d+)?$')
+}
+
+# Formats of TIME_FORMATS that carry the date, with their parsing format
+DATED_FORMATS = {'iso': 'ISO8601', 'us_padded': '%m/%d/%Y %H:%M', 'us_short': '%m/%d/%Y %H:%M'}
+
+# incident_radiation_<day>_<month>[_suffix].csv
+FILE_DATE_PATTERN = re.compile(r'incident_radiation_(\d{1,2})_(\d{1,2})')
+
+
+def classify_time_values(values):
+    """
+    Detect the time encoding of each value of a 'Time' column.
+
+    Parameters:
+        values (Series): Raw 'Time' strings.
+
+    Returns:
+        Series: Key of TIME_FORMATS per value, or None where no format matches.
+    """
+    text = values.astype(str).str.strip()
+    formats = pd.Series(None, index=values.index, dtype=object)
+    for name, pattern in TIME_FORMATS.items():
+        formats = formats.where(formats.notna() | ~text.str.match(pattern), name)
+    return formats
+
+
+def detect_time_format(values):
+    """
+    Detect the time encoding of a 'Time' column.
+
+    Parameters:
+        values (Series): Raw 'Time' strings.
+
+    Returns:
+        str: One of the keys of TIME_FORMATS, or 'mixed' when the file combines several.
+    """
+    formats = classify_time_values(values.dropna())
+    if formats.empty:
+        raise ValueError("The 'Time' column is empty.")
+    if formats.isna().any():
+        raise ValueError(f"Unrecognized time format, e.g. '{values.dropna()[formats.isna()].iloc[0]}'.")
+    found = formats.unique()
+    return found[0] if len(found) == 1 else 'mixed'
+
+
+def date_from_filename(path, year=DEFAULT_YEAR):
+    """Return the measurement day encoded in an incident_radiation_<day>_<month> file name, or None."""
+    match = FILE_DATE_PATTERN.search(os.path.basename(path))
+    if match is None:
+        return None
+    day, month = int(match.group(1)), int(match.group(2))
+    return pd.Timestamp(year=year, month=month, day=day)
+
+
+def date_from_contents(values):
+    """
+    Return the day most values of a 'Time' column fall on, or None when none carries a date.
+
+    Parameters:
+        values (Series): Raw 'Time' strings.
+
+    Returns:
+        Timestamp: Midnight of the recorded day, or None.
+    """
+    values = values.dropna()
+    formats = classify_time_values(values)
+    text = values.astype(str).str.strip()
+    days = [
+        pd.to_datetime(text[formats == name], format=time_format, errors='coerce').dt.normalize()
+        for name, time_format in DATED_FORMATS.items() if (formats == name).any()
+    ]
+    days = pd.concat(days).dropna() if days else pd.Series(dtype='datetime64[ns]')
+    return None if days.empty else pd.Timestamp(days.mode().iloc[0])
+
+
+def measurement_date(path, raw_time, date=None, year=DEFAULT_YEAR):
+    """
+    Resolve the measurement day of an export and where it came from.
+
+    An explicit date wins, then the day in the file name, as for the sample
+    days of radiation_profile; the day recorded in the 'Time' column is only
+    used for files without a dated name. The recorded day is returned as well
+    so that validation can flag files whose contents disagree with their name.
+
+    Returns:
+        tuple: (Timestamp or None, 'argument', 'file name' or 'contents', recorded Timestamp or None).
+    """
+    recorded = date_from_contents(raw_time)
+    named = date_from_filename(path, year)
+    if date is not None:
+        return pd.Timestamp(date), 'argument', recorded
+    if named is not None:
+        return named, 'file name', recorded
+    return recorded, 'contents', recorded
+
+
+def normalize_radiation_file(path, date=None, year=DEFAULT_YEAR, points=None):
+    """
+    Read one sensor/day export, rebuild its time grid and fill gaps.
+
+    The measurement day comes from the file name (see measurement_date), and
+    a 'Time' column recording another day is reported as an issue; the time
+    of day is taken from the file where it is precise enough.
+
+    Parameters:
+        path (str): Path of the CSV export.
+        date (Timestamp): Measurement day, overriding the one in the file name.
+        year (int): Year used with the file name date.
+        points (int): Expected number of grid points, defaults to the largest 'Point Index'.
+
+    Returns:
+        tuple: (normalized DataFrame, report dict).
+    """
+    raw = pd.read_csv(path)
+    missing = {'Point Index', 'Time', RADIATION_COLUMN} - set(raw.columns)
+    if missing:
+        raise KeyError(f"'{path}' is missing columns: {sorted(missing)}")
+
+    time_format = detect_time_format(raw['Time'])
+    date, date_source, recorded_date = measurement_date(path, raw['Time'], date, year)
+    if date is None:
+        raise ValueError(f"No measurement date for '{path}'; pass one explicitly.")
+
+    raw = raw.dropna(subset=['Point Index'])
+    raw = raw.set_index(raw['Point Index'].astype(np.int64)).sort_index()
+    raw = raw[~raw.index.duplicated(keep='first')]
+    points = int(points or raw.index.max())
+
+    # One grid step per point index across the daylight window
+    step = (DAYLIGHT_END - DAYLIGHT_START) / points
+    grid_index = pd.RangeIndex(1, points + 1, name='Point Index')
+    grid_time = date + DAYLIGHT_START + step * (grid_index - 1)
+
+    radiation = raw[RADIATION_COLUMN].astype(float).reindex(grid_index)
+    filled = int(radiation.isna().sum())
+    radiation = radiation.interpolate(method='linear', limit_direction='both')
+
+    # Time of day recorded in the file, where it is precise enough to keep
+    formats = classify_time_values(raw['Time'])
+    text = raw['Time'].astype(str).str.strip()
+    offsets = pd.Series(pd.NaT, index=raw.index, dtype='timedelta64[ns]')
+    iso = formats == 'iso'
+    if iso.any():
+        recorded = pd.to_datetime(text[iso], errors='coerce')
+        offsets[iso] = recorded - recorded.dt.normalize()
+    elapsed = formats == 'elapsed'
+    if elapsed.any():
+        parts = text[elapsed].str.split(':', n=1, expand=True)
+        seconds = parts[0].astype(float) * 60 + parts[1].astype(float)
+        # The export drops the hour; take the one that puts the value closest to the grid
+        expected = (grid_time[raw.index[elapsed] - 1] - date - DAYLIGHT_START).total_seconds().to_numpy()
+        hours = np.round((expected - seconds.to_numpy()) / 3600)
+        offsets[elapsed] = DAYLIGHT_START + pd.to_timedelta(seconds.to_numpy() + 3600 * hours, unit='s')
+    # Minute-resolution formats lose the sub-minute part; the regular grid is kept for them
+    offsets = offsets.reindex(grid_index)
+    grid_time = grid_time.where(offsets.isna().to_numpy(), date + offsets.to_numpy())
+
+    frame = pd.DataFrame({
+        'Source': os.path.splitext(os.path.basename(path))[0],
+        'Date': date,
+        'Point Index': grid_index.to_numpy(dtype=np.int32),
+        'Time': grid_time,
+        RADIATION_COLUMN: radiation.to_numpy(dtype=np.float32)
+    })
+    report = {
+        'path': path,
+        'format': time_format,
+        'date': date.date().isoformat(),
+        'date_source': date_source,
+        'points': points,
+        'filled': filled,
+        # An explicit date is a deliberate correction, so only the file name is checked against the contents
+        'issues': validate_radiation_frame(frame, recorded_date if date_source == 'file name' else None)
+    }
+    return frame, report
+
+
+def validate_radiation_frame(frame, recorded_date=None):
+    """
+    Check a normalized sensor/day frame.
+
+    Parameters:
+        frame (DataFrame): Output of normalize_radiation_file.
+        recorded_date (Timestamp): Day recorded in the export's 'Time' column, if checked.
+
+    Returns:
+        list: Descriptions of the problems found; empty when the frame is valid.
+    """
+    issues = []
+    if frame[RADIATION_COLUMN].isna().any():
+        issues.append('radiation has missing values')
+    if (frame[RADIATION_COLUMN] < 0).any():
+        issues.append('radiation has negative values')
+    if not frame['Time'].is_monotonic_increasing:
+        issues.append('time is not increasing')
+    if (frame['Time'].dt.normalize() != frame['Date']).any():
+        issues.append('time falls outside the measurement day')
+    time_of_day = frame['Time'] - frame['Date']
+    if ((time_of_day < DAYLIGHT_START) | (time_of_day > DAYLIGHT_END)).any():
+        issues.append('time falls outside the daylight window')
+    if recorded_date is not None and (frame['Date'] != recorded_date).any():
+        issues.append(f"'Time' records {recorded_date.date()}, not {frame['Date'].iloc[0].date()}")
+    return issues
+
+
+def _normalize_job(job):
+    path, date, year, points = job
+    return normalize_radiation_file(path, date=date, year=year, points=points)
+
+
+def ingest_radiation_files(paths, dates=None, year=DEFAULT_YEAR, points=None, max_workers=None):
+    """
+    Normalize many sensor/day exports in parallel and combine them.
+
+    Parameters:
+        paths (list): CSV exports to ingest.
+        dates (dict): Optional mapping of path or file name to measurement date.
+        year (int): Year used with file name dates.
+        points (int): Expected number of grid points per file.
+        max_workers (int): Size of the process pool; 1 runs in-process.
+
+    Returns:
+        tuple: (combined DataFrame, list of per-file reports).
+    """
+    dates = dates or {}
+    jobs = [
+        (path, dates.get(path, dates.get(os.path.basename(path))), year, points)
+        for path in paths
+    ]
+    if max_workers == 1 or len(jobs) <= 1:
+        results = [_normalize_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_normalize_job, jobs))
+
+    frames = [frame for frame, _ in results]
+    reports = [report for _, report in results]
+    if not frames:
+        raise ValueError('No radiation files to ingest.')
+    combined = pd.concat(frames, ignore_index=True)
+    combined['Source'] = combined['Source'].astype('category')
+    return combined, reports
+
+
+def write_radiation_dataset(frame, output_path):
+    """Write the combined dataset as CSV, compressed by file suffix, or as Parquet (needs pyarrow)."""
+    if output_path.endswith('.parquet'):
+        frame.to_parquet(output_path, index=False)
+    else:
+        frame.to_csv(output_path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Normalize incident radiation exports into one dataset.')
+    parser.add_argument('files', nargs='+', help='incident_radiation_*.csv files to ingest')
+    parser.add_argument('-o', '--output', default='incident_radiation_normalized.csv.gz',
+                        help='output path (.csv, .csv.gz or .parquet)')
+    parser.add_argument('--year', type=int, default=DEFAULT_YEAR, help='year of the file name dates')
+    parser.add_argument('--date', action='append', default=[], metavar='FILE=YYYY-MM-DD',
+                        help='override the measurement date of a file')
+    parser.add_argument('--points', type=int, help='expected number of points per file')
+    parser.add_argument('--workers', type=int, help='number of worker processes')
+    args = parser.parse_args(argv)
+
+    dates = dict(item.split('=', 1) for item in args.date)
+    combined, reports = ingest_radiation_files(
+        args.files, dates=dates, year=args.year, points=args.points, max_workers=args.workers
+    )
+    for report in reports:
+        status = '; '.join(report['issues']) or 'ok'
+        print(f"{report['path']}: {report['format']}, {report['date']} (from {report['date_source']}), "
+              f"{report['points']} points, {report['filled']} filled - {status}")
+
+    write_radiation_dataset(combined, args.output)
+    print(f"Normalized dataset saved to: {args.output}")
+    return 1 if any(report['issues'] for report in reports) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from battery_simulation import align_to_times
+from data_cache import cached_frame
+from radiation_ingest import DEFAULT_YEAR, RADIATION_COLUMN, ingest_radiation_files
+from solar_geometry import hourly_poa, read_solar_weather
+
+# Bump when the interpolation changes so cached profiles are rebuilt
+PROFILE_VERSION = '1'
+
+# Measured days used by the yearly simulation (21 March, June, September and December)
+SAMPLE_FILES = [
+    'incident_radiation_21_03.csv',
+    'incident_radiation_21_06.csv',
+    'incident_radiation_21_09.csv',
+    'incident_radiation_21_12.csv'
+]
+
+DEFAULT_FREQ = '1h'
+
+
+def _slots_per_hour(freq):
+    per_hour = pd.Timedelta(hours=1) / pd.Timedelta(freq)
+    if per_hour < 1 or per_hour != int(per_hour):
+        raise ValueError(f"The profile step must divide one hour, got '{freq}'.")
+    return int(per_hour)
+
+
+def sample_day_matrix(frame, freq=DEFAULT_FREQ):
+    """
+    Bin the measured days onto a time-of-day grid.
+
+    Following calculate_daily_radiation, a day's total is the mean of its
+    points; each point carries an equal share of it into its slot.
+
+    Parameters:
+        frame (DataFrame): Normalized samples from ingest_radiation_files.
+        freq (str): Width of a time-of-day slot.
+
+    Returns:
+        tuple: (day of year of each sample day, array of shape (days, slots) in kWh/m²).
+    """
+    slots = 24 * _slots_per_hour(freq)
+    dates = pd.DatetimeIndex(frame['Date'])
+    days, day_index = np.unique(dates.dayofyear.to_numpy() - 1, return_inverse=True)
+    slot = ((pd.DatetimeIndex(frame['Time']) - dates) // pd.Timedelta(freq)).to_numpy()
+
+    # Share of the day's total carried by each point; several files of one day are averaged
+    points = frame.groupby('Source', observed=True)['Time'].transform('size').to_numpy()
+    files = frame.groupby(day_index)['Source'].nunique().to_numpy()
+    energy = frame[RADIATION_COLUMN].to_numpy(dtype=float) / points / files[day_index]
+
+    matrix = np.zeros((len(days), slots))
+    np.add.at(matrix, (day_index, np.clip(slot, 0, slots - 1)), energy)
+    return days, matrix
+
+
+def interpolate_days(sample_days, matrix, days, period=365):
+    """
+    Linear interpolation of each time-of-day slot across the day of year.
+
+    The year wraps around, so days before the first and after the last
+    sample day interpolate between December and March.
+
+    Parameters:
+        sample_days (array): Sorted day of year (0-based) of each matrix row.
+        matrix (array): Energy per slot, shape (sample days, slots).
+        days (array): Days of year (0-based) to produce.
+        period (int): Days in the year.
+
+    Returns:
+        ndarray: Energy per slot, shape (days, slots).
+    """
+    x = np.concatenate([[sample_days[-1] - period], sample_days, [sample_days[0] + period]])
+    rows = np.vstack([matrix[-1:], matrix, matrix[:1]])
+    days = np.asarray(days, dtype=float)
+    upper = np.clip(np.searchsorted(x, days, side='right'), 1, len(x) - 1)
+    lower = upper - 1
+    weight = ((days - x[lower]) / (x[upper] - x[lower]))[:, None]
+    return (1 - weight) * rows[lower] + weight * rows[upper]
+
+
+def radiation_profile(frame, year=DEFAULT_YEAR, freq=DEFAULT_FREQ, weather=None, epw_weight=0.0,
+                      tilt=90, azimuth=180):
+    """
+    Radiation of every time step of a year from a few measured days.
+
+    The measured days form a day-of-year x time-of-day matrix that is
+    interpolated for every day of the year in one step. With weather and
+    epw_weight > 0 the result is blended with the plane-of-array irradiance
+    of the EPW year, which brings in day-to-day weather.
+
+    Parameters:
+        frame (DataFrame): Normalized samples from ingest_radiation_files.
+        year (int): Calendar year of the profile.
+        freq (str): Time step; must divide one hour.
+        weather (DataFrame): Output of read_solar_weather, needed for blending.
+        epw_weight (float): Share of the EPW irradiance in the result, 0 to 1.
+        tilt (float): Surface tilt used for the EPW irradiance, in degrees.
+        azimuth (float): Surface azimuth used for the EPW irradiance, in degrees.
+
+    Returns:
+        DataFrame: Columns ['DateTime', 'Radiation (kWh/m²)'], one row per time step.
+    """
+    sample_days, matrix = sample_day_matrix(frame, freq)
+    start = pd.Timestamp(year=year, month=1, day=1)
+    period = 366 if start.is_leap_year else 365
+    values = interpolate_days(sample_days, matrix, np.arange(period), period).ravel()
+    times = pd.date_range(start, periods=len(values), freq=freq)
+
+    if epw_weight:
+        if weather is None:
+            raise ValueError('Blending with the EPW year needs its weather data.')
+        poa = hourly_poa(weather, tilt, azimuth).to_numpy() / 1000  # kWh/m² per hour
+        epw = align_to_times(poa, times) / _slots_per_hour(freq)
+        values = (1 - epw_weight) * values + epw_weight * epw
+    return pd.DataFrame({'DateTime': times, RADIATION_COLUMN: values})
+
+
+def build_radiation_profile(paths, epw_path=None, epw_weight=0.0, year=DEFAULT_YEAR, freq=DEFAULT_FREQ,
+                            tilt=90, azimuth=180):
+    """Ingest the measured days (and the EPW file when blending) and build the yearly profile."""
+    frame, _ = ingest_radiation_files(paths, year=year, max_workers=1)
+    weather = read_solar_weather(epw_path, year=year) if epw_weight else None
+    return radiation_profile(frame, year, freq, weather, epw_weight, tilt, azimuth)
+
+
+def load_radiation_profile(paths, epw_path=None, epw_weight=0.0, year=DEFAULT_YEAR, freq=DEFAULT_FREQ,
+                           tilt=90, azimuth=180, cache_dir=None):
+    """
+    The yearly radiation profile from the columnar cache, rebuilt when its inputs change.
+
+    Parameters: see build_radiation_profile; cache_dir defaults to CACHE_DIR.
+
+    Returns:
+        DataFrame: Columns ['DateTime', 'Radiation (kWh/m²)'].
+    """
+    settings = {'version': PROFILE_VERSION, 'epw_weight': epw_weight, 'year': year, 'freq': freq,
+                'tilt': tilt, 'azimuth': azimuth}
+    sources = list(paths) + ([epw_path] if epw_weight else [])
+    return cached_frame(
+        'radiation_profile',
+        sources,
+        lambda: build_radiation_profile(paths, epw_path, epw_weight, year, freq, tilt, azimuth),
+        key=hashlib.sha1(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest(),
+        cache_dir=cache_dir
+    )
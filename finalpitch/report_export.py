@@ -0,0 +1,385 @@
+import argparse
+import hashlib
+import html
+import importlib.util
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from dashboard_data import (
+    DEFAULT_SETTINGS, DEMAND_DATA_FILE, SOLAR_DATA_FILES, WEATHER_FILE, create_registry, cost_summary_lines,
+    tariff_summary_lines
+)
+from data_cache import dataset_version
+from data_loader import LOADER_VERSION, load_adjusted_data, load_demand_data
+from heatmap_energy_occupancy import heatmap_energy_occupancy
+from scenario_engine import PARAMETERS, scenario_inputs
+from scenario_panel import DEFAULT_METRIC, DEFAULT_X, DEFAULT_Y, scenario_heatmap
+from site_batch import read_manifest, site_cache_dir, site_key
+from solar_energy import solar_energy_chart
+from solar_geometry import read_solar_weather
+from stacked_bar_chart import stacked_bar_chart
+
+# Bump when the panels or the report layout change so existing reports are rebuilt
+REPORT_VERSION = '4'
+
+# Computed artifacts a site manifest or scenario may fix instead of deriving them
+OVERRIDABLE = ('num_cycles', 'reduction_tilt_angle')
+
+FORMATS = ('html', 'json', 'png')
+DEFAULT_FORMATS = ('html', 'json')
+DEFAULT_TARGET = 'dashboard'
+DEFAULT_SCENARIO = 'baseline'
+SUMMARY = 'summary'
+
+
+def _stacked_bar(level):
+    def build(registry):
+        cube = registry.get('cube')
+        return stacked_bar_chart(level, cube.weekly_by_state(), cube.monthly_by_state())
+    return build
+
+
+def _heatmap(metric):
+    return lambda registry: heatmap_energy_occupancy(registry.get('cube'), metric=metric)
+
+
+def _artifact(name):
+    return lambda registry: registry.get(name)
+
+
+def _scenario_heatmap(registry):
+    # The explorer as it opens: default axes and metric, the other parameters at the report's values
+    settings = {name: registry.get(name) for name in PARAMETERS}
+    return scenario_heatmap(scenario_inputs(registry), settings, DEFAULT_X, DEFAULT_Y, DEFAULT_METRIC)
+
+
+# Every panel of the dashboard, including each option of the radio selectors, in layout order
+PANELS = {
+    'occupancy_energy': ("Occupancy vs Energy Demand", _artifact('occupancy_figure')),
+    'solar_energy': (
+        "Solar Energy Contribution Across All Months",
+        lambda registry: solar_energy_chart(registry.get('combined_data'))
+    ),
+    'area': ("Energy Consumption by Area", _artifact('area_figure')),
+    'energy_pie': ("Energy Demand Breakdown", _artifact('energy_pie_figure')),
+    'solar_pie': ("Updated Energy Contribution: Solar vs. Remaining Demand", _artifact('solar_pie_figure')),
+    'stacked_bar_weekly': ("Energy Consumption by State (Weekly)", _stacked_bar('Weekly')),
+    'stacked_bar_monthly': ("Energy Consumption by State (Monthly)", _stacked_bar('Monthly')),
+    'heatmap_energy': ("Heatmap of Energy Demand", _heatmap('Energy Demand (kWh)')),
+    'heatmap_occupancy': ("Heatmap of Occupancy", _heatmap('Occupancy Level (%)')),
+    'demand_comparison': ("Energy Demand vs Adjusted Energy Demand", _artifact('demand_comparison_figure')),
+    'scenario_heatmap': ("Scenario Explorer", _scenario_heatmap)
+}
+
+
+def _slug(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(name))
+
+
+def read_scenarios(path):
+    """
+    Read named setting overrides.
+
+    The file is a JSON object mapping each scenario name to overrides of
+    DEFAULT_SETTINGS (or of num_cycles / reduction_tilt_angle), e.g.
+    {"baseline": {}, "battery": {"battery_capacity": 20}}.
+
+    Returns:
+        dict: Scenario name to overrides, in file order.
+    """
+    with open(path, encoding='utf-8') as f:
+        scenarios = json.load(f)
+    for name, overrides in scenarios.items():
+        unknown = sorted(set(overrides) - set(DEFAULT_SETTINGS) - set(OVERRIDABLE))
+        if unknown:
+            raise ValueError(f"Scenario {name!r} sets unknown settings {unknown} in {path}")
+    return scenarios
+
+
+def report_registry(site=None, settings=None, cache_dir=None):
+    """
+    Registry of one report: the dashboard's own data, or a manifest site, with setting overrides.
+
+    For a site, the demand data, weather file and optional adjusted demand
+    come from the manifest, and the annual radiation is the plane-of-array
+    irradiance of the best orientation in the site's weather file, as in
+    site_batch. The sample-day radiation chart keeps the dashboard data.
+
+    Parameters:
+        site (dict): One entry of site_batch.read_manifest, or None for the dashboard data.
+        settings (dict): Overrides applied on top of the site's settings.
+        cache_dir (str): Cache root of the site datasets, defaults to CACHE_DIR.
+
+    Returns:
+        DataRegistry: Registry whose artifacts are built on first access.
+    """
+    values = {
+        name: value for name, value in {**(site or {}), **(settings or {})}.items()
+        if name in DEFAULT_SETTINGS or name in OVERRIDABLE
+    }
+    registry = create_registry(**values)
+    if site is not None:
+        directory = site_cache_dir(site, cache_dir)
+        registry.register(
+            'demand_data',
+            lambda float32: load_demand_data(site['demand_csv'], cache_dir=directory, float32=float32),
+            deps=['float32_measures']
+        )
+        registry.register('solar_weather', lambda: read_solar_weather(site['epw']))
+        if site.get('adjusted_csv'):
+            registry.register('adjusted_data', lambda: load_adjusted_data(site['adjusted_csv'], cache_dir=directory))
+    # Registering the computed artifacts replaced any value set for them, so set the overrides again
+    for name in OVERRIDABLE:
+        if name in values:
+            registry.set(name, values[name])
+    return registry
+
+
+def report_targets(sites=None, scenarios=None):
+    """
+    Every report to build: each site (or the dashboard data) under each scenario.
+
+    Returns:
+        list: Dicts with 'site' (name), 'scenario' (name), 'source' (manifest entry or None) and 'settings'.
+    """
+    scenarios = scenarios or {DEFAULT_SCENARIO: {}}
+    return [
+        {'site': site['name'] if site else DEFAULT_TARGET, 'scenario': scenario, 'source': site,
+         'settings': settings}
+        for site in (sites or [None])
+        for scenario, settings in scenarios.items()
+    ]
+
+
+def target_directory(target, output_dir):
+    return os.path.join(output_dir, _slug(target['site']), _slug(target['scenario']))
+
+
+def target_key(target, panels, formats):
+    """Token that changes when a report's input files, settings, panels or formats change."""
+    site = target['source']
+    if site is None:
+        registry = create_registry()
+        files = [DEMAND_DATA_FILE, WEATHER_FILE, *SOLAR_DATA_FILES.values()]
+        inputs = dataset_version([registry.path(name) for name in files])
+    else:
+        inputs = site_key(site)
+    payload = {
+        'version': REPORT_VERSION,
+        'loader': LOADER_VERSION,
+        'inputs': inputs,
+        'settings': target['settings'],
+        'panels': list(panels),
+        'formats': list(formats)
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+# Registry of the report this process is working on, so the panels of one report share its
+# datasets and intermediate artifacts; only the latest one is kept to bound memory
+_registries = {}
+
+
+def _target_registry(target, cache_dir):
+    key = (target['site'], target['scenario'])
+    if key not in _registries:
+        _registries.clear()
+        _registries[key] = report_registry(target['source'], target['settings'], cache_dir)
+    return _registries[key]
+
+
+def write_panel(figure, path, formats):
+    """
+    Write one figure in each format.
+
+    Parameters:
+        figure (Figure or dict): The panel figure.
+        path (str): Output path without extension.
+        formats (list): Any of FORMATS.
+
+    Returns:
+        list: The files written.
+    """
+    figure = go.Figure(figure)
+    files = []
+    for fmt in formats:
+        file_path = f"{path}.{fmt}"
+        if fmt == 'html':
+            figure.write_html(file_path, include_plotlyjs='cdn')
+        elif fmt == 'json':
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(pio.to_json(figure, pretty=False))
+        else:
+            figure.write_image(file_path)  # Needs the optional kaleido package
+        files.append(file_path)
+    return files
+
+
+def report_summary(registry):
+    """
+    The cost summary panel and the headline metrics of one report.
+
+    Returns:
+        dict: 'cost_summary' and 'tariffs' text lines, 'metrics' as plain numbers.
+    """
+    costs = registry.get('costs')
+    metrics = {name: float(value) for name, value in costs.items()}
+    metrics['num_cycles'] = float(registry.get('num_cycles'))
+    metrics.update({name: float(value) for name, value in registry.get('self_consumption').items()})
+    return {
+        'cost_summary': cost_summary_lines(costs),
+        'tariffs': tariff_summary_lines(registry.get('tariff_costs')),
+        'metrics': metrics
+    }
+
+
+def _write_summary(summary, directory):
+    with open(os.path.join(directory, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    with open(os.path.join(directory, 'summary.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join([*summary['cost_summary'], '', "Annual bill by tariff", *summary['tariffs']]) + '\n')
+
+
+def _write_index(target, directory, panels, summary):
+    # Landing page of a report: the summary text and every HTML panel
+    title = html.escape(f"Energy Report: {target['site']} ({target['scenario']})")
+    body = [f"<h1>{title}</h1>"]
+    body.extend(f"<h2>{html.escape(line)}</h2>" for line in summary['cost_summary'])
+    body.append("<h3>Annual bill by tariff</h3>")
+    body.extend(f"<p>{html.escape(line)}</p>" for line in summary['tariffs'])
+    for panel in panels:
+        body.append(f"<h2>{html.escape(PANELS[panel][0])}</h2>")
+        body.append(f'<iframe src="{panel}.html" style="width:100%;height:520px;border:none"></iframe>')
+    with open(os.path.join(directory, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title></head>\n"
+                f"<body>\n{chr(10).join(body)}\n</body></html>\n")
+
+
+def _panel_job(job):
+    # Top-level so the process pool can pickle it
+    target, panel, directory, formats, cache_dir = job
+    registry = _target_registry(target, cache_dir)
+    if panel == SUMMARY:
+        summary = report_summary(registry)
+        _write_summary(summary, directory)
+        return target['site'], target['scenario'], summary
+    write_panel(PANELS[panel][1](registry), os.path.join(directory, panel), formats)
+    return target['site'], target['scenario'], None
+
+
+def _cached_summary(directory, key):
+    try:
+        with open(os.path.join(directory, 'report.json'), encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return report['summary'] if report.get('key') == key else None
+
+
+def export_reports(targets, output_dir, panels=None, formats=DEFAULT_FORMATS, cache_dir=None,
+                   max_workers=None, force=False):
+    """
+    Render every panel and the cost summary of each report to static files, without a server.
+
+    Each (report, panel) pair is one job of a process pool. A worker keeps
+    the registry of the report it is working on, so consecutive panels of
+    one report share its datasets; when it moves to another report the
+    registry is dropped and the loaders' column caches make rebuilding it
+    cheap. Reports whose inputs and settings are unchanged are not rebuilt.
+
+    Parameters:
+        targets (list): Reports from report_targets.
+        output_dir (str): Root directory; each report goes to <site>/<scenario>/.
+        panels (list): Names of PANELS to render, defaults to all of them.
+        formats (list): Any of FORMATS.
+        cache_dir (str): Cache root of the site datasets, defaults to CACHE_DIR.
+        max_workers (int): Size of the process pool; 1 runs in-process.
+        force (bool): Rebuild unchanged reports as well.
+
+    Returns:
+        DataFrame: One row per report with its metrics, directory and a 'Cached' column.
+    """
+    panels = list(panels or PANELS)
+    unknown = sorted(set(panels) - set(PANELS))
+    if unknown:
+        raise ValueError(f"Unknown panels {unknown}; choose from {list(PANELS)}")
+
+    summaries = {}
+    keys = {}
+    jobs = []
+    for target in targets:
+        directory = target_directory(target, output_dir)
+        key = target_key(target, panels, formats)
+        summary = None if force else _cached_summary(directory, key)
+        if summary is not None:
+            summaries[target['site'], target['scenario']] = (summary, True)
+            continue
+        os.makedirs(directory, exist_ok=True)
+        keys[target['site'], target['scenario']] = key
+        jobs.extend((target, panel, directory, formats, cache_dir) for panel in [SUMMARY, *panels])
+
+    if max_workers == 1 or len(jobs) <= 1:
+        results = [_panel_job(job) for job in jobs]
+    else:
+        # With enough reports to keep every worker busy, each report goes to one worker and its
+        # datasets are built once; otherwise the panels of a report are spread over the pool
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = len(panels) + 1 if len(keys) >= workers else 1
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_panel_job, jobs, chunksize=chunksize))
+    for site, scenario, summary in results:
+        if summary is not None:
+            summaries[site, scenario] = (summary, False)
+
+    rows = []
+    for target in targets:
+        summary, cached = summaries[target['site'], target['scenario']]
+        directory = target_directory(target, output_dir)
+        if not cached:
+            # Written last, so an interrupted export is rebuilt on the next run
+            _write_index(target, directory, [panel for panel in panels if 'html' in formats], summary)
+            with open(os.path.join(directory, 'report.json'), 'w', encoding='utf-8') as f:
+                json.dump({'key': keys[target['site'], target['scenario']], 'summary': summary}, f)
+        rows.append({'Site': target['site'], 'Scenario': target['scenario'], **summary['metrics'],
+                     'Directory': directory, 'Cached': cached})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the dashboard panels and cost summary to static files.')
+    parser.add_argument('-o', '--output', default='reports', help='output directory')
+    parser.add_argument('--manifest', help='sites manifest (.csv or .json); defaults to the dashboard data')
+    parser.add_argument('--scenarios', help='JSON file of named setting overrides')
+    parser.add_argument('--panels', nargs='+', choices=list(PANELS), help='panels to render (default: all)')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(DEFAULT_FORMATS),
+                        help='output formats (default: html json)')
+    parser.add_argument('--workers', type=int, help='number of worker processes')
+    parser.add_argument('--cache-dir', help='cache root, defaults to FINALPITCH_CACHE_DIR')
+    parser.add_argument('--force', action='store_true', help='rebuild unchanged reports as well')
+    args = parser.parse_args(argv)
+
+    formats = args.formats
+    if 'png' in formats and importlib.util.find_spec('kaleido') is None:
+        print("PNG export needs the kaleido package; skipping PNG files.")
+        formats = [fmt for fmt in formats if fmt != 'png']
+
+    sites = read_manifest(args.manifest) if args.manifest else None
+    targets = report_targets(sites, read_scenarios(args.scenarios) if args.scenarios else None)
+    summary = export_reports(targets, args.output, panels=args.panels, formats=formats,
+                             cache_dir=args.cache_dir, max_workers=args.workers, force=args.force)
+
+    os.makedirs(args.output, exist_ok=True)
+    summary_path = os.path.join(args.output, 'report_summary.csv')
+    summary.to_csv(summary_path, index=False)
+    print(f"{len(summary)} reports ({int(summary['Cached'].sum())} unchanged) written to: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+# Parameters of the cost model with the range explored by default
+PARAMETER_RANGES = {
+    'motor_energy_per_cycle': (0, 400),  # kWh per movement cycle
+    'num_cycles': (0, 200),  # movements per year
+    'pannel_area': (0, 200),  # m²
+    'solar_panel_efficiency': (0.10, 0.30),
+    'reduction_tilt_angle': (0.3, 1.0),
+    'cost_per_kwh': (0.05, 0.60),  # $ per kWh
+    'feed_in_rate': (0.0, 0.30)  # $ per exported kWh
+}
+
+PARAMETERS = list(PARAMETER_RANGES)
+
+# Annual yields at which the PV balance is simulated, across the parameter ranges above
+BALANCE_KNOTS = 81
+
+METRICS = [
+    'total_motor_energy',
+    'total_combined_energy',
+    'solar_generation',
+    'solar_energy_covered',
+    'solar_export',
+    'solar_coverage',
+    'cost_total_energy_demand',
+    'cost_total_energy_plus_motor',
+    'cost_with',
+    'accurate_cost_savings'
+]
+
+
+def balance_yields(annual_radiation, current):
+    """Annual PV yields to simulate the balance at: the current one and a grid over PARAMETER_RANGES."""
+    largest = annual_radiation * np.prod([
+        PARAMETER_RANGES[name][1] for name in ('pannel_area', 'solar_panel_efficiency', 'reduction_tilt_angle')
+    ])
+    return np.unique(np.r_[np.linspace(0, max(largest, current), BALANCE_KNOTS), current])
+
+
+def cost_inputs(total_building_energy, annual_radiation, adjusted_data, pv_balance):
+    """
+    The data-derived totals the cost model needs.
+
+    Parameters:
+        total_building_energy (float): Annual building energy in kWh.
+        annual_radiation (float): Annual irradiance of the best panel orientation in kWh/m².
+        adjusted_data (DataFrame): Daily 'Energy Demand (kWh)' and 'Adjusted Energy Demand (kWh)'.
+        pv_balance (DataFrame): battery_simulation.balance_curve of the hourly demand at
+            increasing yields, e.g. at balance_yields.
+
+    Returns:
+        dict: Annual building energy, annual radiation, total and adjusted energy demand,
+            and the PV balance columns as arrays.
+    """
+    return {
+        'total_building_energy': total_building_energy,
+        'annual_radiation': annual_radiation,
+        'total_energy_demand': adjusted_data['Energy Demand (kWh)'].sum(),
+        'total_adjusted_energy_demand': adjusted_data['Adjusted Energy Demand (kWh)'].sum(),
+        'balance_generation': pv_balance['Generation (kWh/yr)'].to_numpy(dtype=float),
+        'balance_self_consumption': pv_balance['Self-consumption (kWh/yr)'].to_numpy(dtype=float),
+        'balance_export': pv_balance['Export (kWh/yr)'].to_numpy(dtype=float),
+        'balance_import': pv_balance['Import (kWh/yr)'].to_numpy(dtype=float)
+    }
+
+
+def scenario_inputs(registry):
+    """Collect the data-derived totals the cost model needs from the registry (see cost_inputs)."""
+    return registry.get('cost_inputs')
+
+
+def evaluate_scenarios(inputs, settings, **grid):
+    """
+    Evaluate the cost chain over every combination of the swept parameters in one broadcast.
+
+    Parameters:
+        inputs (dict): Totals from scenario_inputs.
+        settings (dict): Values of the parameters that are not swept.
+        **grid: Parameter name to a sequence of values to sweep.
+
+    Returns:
+        DataFrame: One row per parameter combination with the parameters and METRICS.
+    """
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise KeyError(f"Unknown scenario parameters: {sorted(unknown)}")
+
+    # Each swept parameter gets its own axis; the rest stay scalars and broadcast
+    swept = list(grid)
+    values = {name: np.asarray(settings[name], dtype=float) for name in PARAMETERS if name not in grid}
+    for axis, name in enumerate(swept):
+        shape = [1] * len(swept)
+        shape[axis] = -1
+        values[name] = np.asarray(grid[name], dtype=float).reshape(shape)
+
+    results = compute_costs(inputs, values)
+    shape = tuple(len(grid[name]) for name in swept)
+    table = {name: np.broadcast_to(values[name], shape).ravel() for name in swept}
+    table.update({metric: np.broadcast_to(results[metric], shape).ravel() for metric in METRICS})
+    return pd.DataFrame(table)
+
+
+def compute_costs(inputs, params):
+    """
+    The cost model of the dashboard on scalars or broadcastable NumPy arrays.
+
+    The dashboard's cost summary, the scenario explorer and the site batch
+    all evaluate it, so they report the same figures. PV only saves the
+    price of the energy used on site; the export is credited at feed_in_rate.
+    Both follow the hourly balance, interpolated between the simulated yields;
+    PV beyond the largest simulated yield is all exported.
+
+    Parameters:
+        inputs (dict): Totals from cost_inputs.
+        params (dict): Values (scalars or arrays) for every name in PARAMETERS.
+
+    Returns:
+        dict: Arrays for every name in METRICS and the other figures of the cost summary.
+    """
+    cost_per_kwh = params['cost_per_kwh']
+    total_energy_demand = inputs['total_energy_demand']
+    difference_energy = total_energy_demand - inputs['total_adjusted_energy_demand']
+
+    total_motor_energy = params['motor_energy_per_cycle'] * params['num_cycles']
+    total_combined_energy = inputs['total_building_energy'] + total_motor_energy
+    total_energy_plus_motor = total_energy_demand + total_motor_energy
+    solar_generation = (
+        params['pannel_area'] * inputs['annual_radiation']
+        * params['solar_panel_efficiency'] * params['reduction_tilt_angle']
+    )
+    knots = inputs['balance_generation']
+    solar_energy_covered = np.interp(solar_generation, knots, inputs['balance_self_consumption'])
+    solar_export = np.interp(solar_generation, knots, inputs['balance_export']) + np.maximum(
+        solar_generation - knots[-1], 0
+    )
+    export_credit = solar_export * params['feed_in_rate']
+
+    cost_total_energy_demand = total_energy_demand * cost_per_kwh
+    cost_total_energy_plus_motor = total_energy_plus_motor * cost_per_kwh
+    cost_solar_energy_covered = solar_energy_covered * cost_per_kwh + export_credit
+    cost_difference_energy = difference_energy * cost_per_kwh
+
+    return {
+        'total_energy_demand': total_energy_demand,
+        'total_adjusted_energy_demand': inputs['total_adjusted_energy_demand'],
+        'difference_energy': difference_energy,
+        'cost_savings': cost_difference_energy,
+        'total_motor_energy': total_motor_energy,
+        'total_combined_energy': total_combined_energy,
+        'total_energy_plus_motor': total_energy_plus_motor,
+        'motor_energy_cost': total_motor_energy * cost_per_kwh,
+        'solar_generation': solar_generation,
+        'solar_energy_covered': solar_energy_covered,
+        'solar_export': solar_export,
+        'grid_import': np.interp(solar_generation, knots, inputs['balance_import']),
+        'export_credit': export_credit,
+        'solar_coverage': solar_energy_covered / total_combined_energy,
+        'cost_total_energy_demand': cost_total_energy_demand,
+        'cost_total_energy_plus_motor': cost_total_energy_plus_motor,
+        'cost_solar_energy_covered': cost_solar_energy_covered,
+        'cost_difference_energy': cost_difference_energy,
+        # Cost with proposal
+        'cost_with': cost_total_energy_plus_motor - cost_difference_energy - cost_solar_energy_covered,
+        # Accurate cost savings
+        'accurate_cost_savings': cost_difference_energy + cost_solar_energy_covered
+    }
+
+
+def linear_grid(name, steps=50):
+    """Evenly spaced values across the default range of a parameter."""
+    low, high = PARAMETER_RANGES[name]
+    return np.linspace(low, high, steps)
@@ -0,0 +1,109 @@
+import plotly.express as px
+from dash import dcc, html, Input, Output
+
+from instrumentation import instrumentation
+from payload_compaction import payload_figure
+from scenario_engine import METRICS, PARAMETER_RANGES, PARAMETERS, evaluate_scenarios, linear_grid, scenario_inputs
+
+# Resolution of the heatmap grid along each swept parameter
+GRID_STEPS = 60
+
+# Axes and metric the explorer opens with
+DEFAULT_X = 'pannel_area'
+DEFAULT_Y = 'cost_per_kwh'
+DEFAULT_METRIC = 'accurate_cost_savings'
+
+
+def scenario_heatmap(inputs, settings, x_param, y_param, metric):
+    """
+    Generate a heatmap of one cost metric over two swept parameters.
+
+    Parameters:
+        inputs (dict): Totals from scenario_inputs.
+        settings (dict): Values of the parameters that are not swept.
+        x_param (str): Parameter on the x axis.
+        y_param (str): Parameter on the y axis.
+        metric (str): One of METRICS.
+
+    Returns:
+        Figure: A Plotly heatmap figure.
+    """
+    if x_param == y_param:
+        grid = {x_param: linear_grid(x_param, GRID_STEPS)}
+        results = evaluate_scenarios(inputs, settings, **grid)
+        return px.line(results, x=x_param, y=metric, title=f"{metric} by {x_param}")
+
+    grid = {y_param: linear_grid(y_param, GRID_STEPS), x_param: linear_grid(x_param, GRID_STEPS)}
+    results = evaluate_scenarios(inputs, settings, **grid)
+    pivot = results.pivot(index=y_param, columns=x_param, values=metric)
+    fig = px.imshow(
+        pivot,
+        origin='lower',
+        aspect='auto',
+        color_continuous_scale="Viridis",
+        title=f"{metric} by {x_param} and {y_param}",
+        labels={"color": metric}
+    )
+    fig.update_layout(title_x=0.5)
+    return fig
+
+
+def scenario_layout(settings):
+    """
+    Controls and heatmap of the scenario explorer.
+
+    The sliders start from settings; parameters missing there, such as the
+    computed num_cycles, start empty. register_scenario_callbacks fills in the
+    registry's values when the page loads, so building the layout needs no data.
+    """
+    sliders = []
+    for name in PARAMETERS:
+        low, high = PARAMETER_RANGES[name]
+        sliders.append(html.Div([
+            html.Label(name),
+            dcc.Slider(
+                id=f'scenario-{name}',
+                min=low,
+                max=high,
+                value=settings.get(name),
+                marks=None,
+                tooltip={'placement': 'bottom', 'always_visible': True}
+            )
+        ]))
+
+    return html.Div(id='scenario-explorer', children=[
+        html.H2("Scenario Explorer"),
+        html.Div([
+            dcc.Dropdown(id='scenario-x', options=PARAMETERS, value=DEFAULT_X, clearable=False),
+            dcc.Dropdown(id='scenario-y', options=PARAMETERS, value=DEFAULT_Y, clearable=False),
+            dcc.Dropdown(id='scenario-metric', options=METRICS, value=DEFAULT_METRIC, clearable=False)
+        ], style={'display': 'grid', 'gridTemplateColumns': '1fr 1fr 1fr', 'gap': '8px'}),
+        html.Div(sliders),
+        dcc.Graph(id='scenario-heatmap')
+    ])
+
+
+def register_scenario_callbacks(app, registry):
+    """Wire the scenario explorer controls to the heatmap."""
+    @app.callback(
+        [Output(f'scenario-{name}', 'value') for name in PARAMETERS],
+        Input('scenario-explorer', 'id')  # Dummy input: runs once when the page loads
+    )
+    @instrumentation.timed()
+    def seed_scenario_sliders(_):
+        return [registry.get(name) for name in PARAMETERS]
+
+    @app.callback(
+        Output('scenario-heatmap', 'figure'),
+        Input('scenario-x', 'value'),
+        Input('scenario-y', 'value'),
+        Input('scenario-metric', 'value'),
+        *[Input(f'scenario-{name}', 'value') for name in PARAMETERS]
+    )
+    @instrumentation.timed()
+    def update_scenario_heatmap(x_param, y_param, metric, *values):
+        # A slider not filled in yet uses the registry's value
+        settings = {name: registry.get(name) if value is None else value for name, value in zip(PARAMETERS, values)}
+        return payload_figure(scenario_heatmap(scenario_inputs(registry), settings, x_param, y_param, metric))
+
+    return update_scenario_heatmap
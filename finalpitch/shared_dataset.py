@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from dashboard_data import DEFAULT_SETTINGS, DEMAND_DATA_FILE, SOLAR_DATA_FILES, registry as default_registry
+from data_cache import CACHE_DIR, dataset_version, read_frame, write_frame
+from data_loader import LOADER_VERSION
+
+# Bump when the published layout changes so workers ignore old snapshots
+SHARED_FORMAT_VERSION = 1
+
+# Directory of the published snapshot; setting it enables the shared mode of the app.
+# Point it at a tmpfs such as /dev/shm to keep the columns in shared memory.
+SHARED_DATA_DIR = os.environ.get('FINALPITCH_SHARED_DATA')
+
+# Large hourly frames worth sharing; small or incrementally updated ones stay per process
+SHARED_ARTIFACTS = ('data', 'combined_data')
+
+# Seconds after which the lock of a publisher is assumed to be left by a crashed process
+PUBLISH_LOCK_TIMEOUT = 600
+
+
+def snapshot_key(registry):
+    """Token of the source files and settings the shared frames are built from."""
+    sources = [registry.path(DEMAND_DATA_FILE), *(registry.path(name) for name in SOLAR_DATA_FILES.values())]
+    payload = {
+        'format': SHARED_FORMAT_VERSION,
+        'loader': LOADER_VERSION,
+        'sources': dataset_version(sources),
+        'settings': {name: registry.get(name) for name in DEFAULT_SETTINGS}
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def shareable(frame):
+    """
+    Column types that attach without copying.
+
+    Repeated strings become categoricals whose codes are memory-mapped, and
+    Python date objects become datetime64; unique strings are still copied
+    into each process.
+    """
+    columns = {}
+    for name in frame.columns:
+        column = frame[name]
+        if column.dtype == object and len(column) and hasattr(column.iloc[0], 'isoformat'):
+            column = pd.to_datetime(column)
+        elif pd.api.types.is_string_dtype(column.dtype) and column.nunique() * 2 <= len(column):
+            column = column.astype('category')
+        columns[name] = column
+    return pd.DataFrame(columns)
+
+
+def read_snapshot(directory):
+    """Return the manifest of a published snapshot, or None if there is none."""
+    try:
+        with open(os.path.join(directory, 'snapshot.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _publish_lock(directory, timeout=PUBLISH_LOCK_TIMEOUT):
+    # Lock file created exclusively; a lock older than timeout was left by a crashed publisher
+    path = os.path.join(directory, '.publish.lock')
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > timeout:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue  # Released in the meantime
+            time.sleep(0.1)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def publish(registry=default_registry, directory=SHARED_DATA_DIR, names=SHARED_ARTIFACTS):
+    """
+    Build the shared frames once and write them as memory-mappable columns.
+
+    Publishers take turns through a lock file, and one that finds the
+    snapshot already published while it waited returns without writing.
+    Each snapshot goes to a directory of its own and the manifest pointing
+    to it is replaced last and atomically, so workers never attach to a
+    half-written snapshot.
+
+    Returns:
+        str: The snapshot key.
+    """
+    key = snapshot_key(registry)
+    os.makedirs(directory, exist_ok=True)
+    with _publish_lock(directory):
+        manifest = read_snapshot(directory)
+        if manifest is not None and manifest.get('key') == key and 'path' in manifest:
+            return key
+
+        snapshot_dir = tempfile.mkdtemp(dir=directory, prefix=f'{key}-')
+        for name in names:
+            write_frame(shareable(registry.get(name)), os.path.join(snapshot_dir, name))
+        manifest = {'key': key, 'path': os.path.basename(snapshot_dir), 'artifacts': list(names)}
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(directory, 'snapshot.json'))
+
+        # Drop older snapshots; mappings already open keep their files alive where the OS allows it
+        for entry in os.listdir(directory):
+            path = os.path.join(directory, entry)
+            if entry != manifest['path'] and not entry.startswith('.') and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+    return key
+
+
+def attach(registry=default_registry, directory=SHARED_DATA_DIR):
+    """
+    Use the published frames in place of building them.
+
+    The columns are memory-mapped read-only, so every process attached to
+    the same snapshot shares one copy of the data. The frames are seeded
+    into the registry, not pinned: changing a setting they depend on (e.g.
+    contract_threshold for 'data') rebuilds them in this process only, and
+    they are no longer shared until the app is restarted with the new settings.
+
+    Returns:
+        bool: False when there is no snapshot for the current sources and settings.
+    """
+    manifest = read_snapshot(directory)
+    if manifest is None or manifest['key'] != snapshot_key(registry) or 'path' not in manifest:
+        return False
+    try:
+        frames = {
+            name: read_frame(os.path.join(directory, manifest['path'], name), mmap=True)
+            for name in manifest['artifacts']
+        }
+    except (OSError, ValueError):
+        return False  # Replaced while attaching; the caller publishes again
+    for name, frame in frames.items():
+        registry.seed(name, frame)
+    return True
+
+
+def share_datasets(registry=default_registry, directory=SHARED_DATA_DIR, names=SHARED_ARTIFACTS):
+    """
+    Attach to the shared snapshot, publishing it first when it is missing or stale.
+
+    On a cold start one worker publishes while the others wait for the lock
+    and then attach; run this module once before starting the workers to
+    skip it. If no snapshot can be attached, the process keeps the frames it
+    built itself rather than failing to start.
+
+    Returns:
+        str: 'attached', 'published', or 'local' when nothing could be attached.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if attach(registry, directory):
+        return 'attached'
+    try:
+        publish(registry, directory, names)
+    except OSError:
+        return 'local'
+    if attach(registry, directory):
+        return 'published'
+    return 'local'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Publish the dashboard datasets for worker processes.')
+    parser.add_argument(
+        'directory', nargs='?', default=SHARED_DATA_DIR or os.path.join(CACHE_DIR, 'shared'),
+        help='snapshot directory, e.g. under /dev/shm (default: FINALPITCH_SHARED_DATA)'
+    )
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.directory, exist_ok=True)
+    publish(directory=args.directory)
+    snapshot_dir = os.path.join(args.directory, read_snapshot(args.directory)['path'])
+    print(f"Published {', '.join(SHARED_ARTIFACTS)} to: {snapshot_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,264 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from adjusted_demand import AreaIntensityModel, daily_adjusted_demand
+from aggregate_cube import AggregateCube
+from battery_simulation import align_to_times, balance_curve, simulate_self_consumption
+from dashboard_data import DEFAULT_SETTINGS
+from data_cache import CACHE_DIR, dataset_version
+from data_loader import load_adjusted_data, load_demand_data
+from energy_calculation import calculate_energy_demand
+from scenario_engine import compute_costs, cost_inputs
+from solar_geometry import annual_poa_grid, hourly_poa, optimal_orientation, orientation_factor, read_solar_weather
+from state_machine import EXPANDED_STATE, annual_cycles, with_states
+from tariff_engine import EXAMPLE_TARIFFS, annual_costs, flat_tariff, tariff_costs
+
+# Bump when the site pipeline changes so cached site results are recomputed
+BATCH_VERSION = '6'
+
+# Tariffs a manifest can name; 'Flat' charges the site's cost_per_kwh
+TARIFFS = {tariff.name: tariff for tariff in EXAMPLE_TARIFFS}
+
+# Manifest columns holding file paths, resolved relative to the manifest
+PATH_FIELDS = ['demand_csv', 'epw', 'adjusted_csv']
+REQUIRED_FIELDS = ['name', 'demand_csv', 'epw', 'pannel_area', 'cost_per_kwh']
+
+
+def read_manifest(path):
+    """
+    Read a site manifest.
+
+    The manifest is a CSV or JSON list with one site per row: name, demand_csv,
+    epw, pannel_area and cost_per_kwh (the flat tariff), plus optional
+    adjusted_csv, tariff (a name of TARIFFS, by default the flat cost_per_kwh
+    price) and overrides of any other DEFAULT_SETTINGS column. The
+    orientation factor follows from panel_tilt/panel_azimuth unless a
+    reduction_tilt_angle column sets it, and the number of motor cycles is
+    counted from the occupancy unless a num_cycles column sets it. Without
+    adjusted_csv the adjusted demand follows from the area-intensity model.
+
+    Parameters:
+        path (str): Manifest file (.csv or .json).
+
+    Returns:
+        list: One dict per site with absolute paths and complete settings.
+    """
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        rows = pd.read_csv(path).to_dict('records')
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    sites = []
+    for row in rows:
+        # Empty CSV cells mean "use the default"
+        row = {key: value for key, value in row.items() if not (isinstance(value, float) and pd.isna(value))}
+        missing = [field for field in REQUIRED_FIELDS if field not in row]
+        if missing:
+            raise ValueError(f"Site {row.get('name', '?')!r} is missing {missing} in {path}")
+        if row.get('tariff', 'Flat') not in TARIFFS:
+            raise ValueError(f"Site {row['name']!r} has unknown tariff {row['tariff']!r}; choose from {list(TARIFFS)}")
+        site = {**DEFAULT_SETTINGS, **row}
+        for field in PATH_FIELDS:
+            if site.get(field):
+                site[field] = os.path.join(base_dir, site[field])
+        sites.append(site)
+
+    names = [site['name'] for site in sites]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate site names in {path}: {duplicates}")
+    return sites
+
+
+def site_cache_dir(site, cache_dir=None):
+    """Cache directory of one site; its datasets and result live there."""
+    slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(site['name']))
+    return os.path.join(cache_dir or CACHE_DIR, 'sites', slug)
+
+
+def site_key(site):
+    """Token that changes when the site's input files or settings change."""
+    sources = [site[field] for field in PATH_FIELDS if site.get(field)]
+    payload = {
+        'version': BATCH_VERSION,
+        'sources': dataset_version(sources),
+        'settings': {key: value for key, value in site.items() if key not in PATH_FIELDS}
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def site_tariff(site):
+    """The tariff a site is billed under."""
+    name = site.get('tariff', 'Flat')
+    return flat_tariff(site['cost_per_kwh'], site['feed_in_rate']) if name == 'Flat' else TARIFFS[name]
+
+
+def run_site(site, cache_dir=None):
+    """
+    Run the full pipeline for one site: load, aggregate, radiation estimate and cost model.
+
+    Parameters:
+        site (dict): One entry of read_manifest.
+        cache_dir (str): Cache root, defaults to CACHE_DIR.
+
+    Returns:
+        dict: One row of the summary table.
+    """
+    directory = site_cache_dir(site, cache_dir)
+    data = with_states(
+        load_demand_data(site['demand_csv'], cache_dir=directory),
+        site['contract_threshold'], site['expand_threshold'], site['min_dwell_hours'], site['lockout']
+    )
+    if 'num_cycles' not in site:
+        site = {**site, 'num_cycles': annual_cycles(data['Time'], data['State'] == EXPANDED_STATE)}
+    cube = AggregateCube.from_data(data)
+    total_building_energy, total_motor_energy, total_combined_energy = calculate_energy_demand(
+        data=cube.state_totals(),
+        motor_energy_per_cycle=site['motor_energy_per_cycle'],
+        num_cycles=site['num_cycles']
+    )
+
+    # One generation model for the annual and the hourly figures: the plane-of-array irradiance of the
+    # site's weather file. The annual radiation is that of the best orientation, so that times the
+    # orientation factor is the yield of the configured panel
+    weather = read_solar_weather(site['epw'])
+    grid = annual_poa_grid(weather)
+    annual_radiation = optimal_orientation(grid)[2]  # kWh/m²
+    poa = hourly_poa(weather, site['panel_tilt'], site['panel_azimuth'])
+    factor = orientation_factor(weather, grid, site['panel_tilt'], site['panel_azimuth'])
+    if 'reduction_tilt_angle' not in site:
+        site = {**site, 'reduction_tilt_angle': factor}
+
+    # An adjusted demand file overrides the area-intensity model
+    if site.get('adjusted_csv'):
+        adjusted = load_adjusted_data(site['adjusted_csv'], cache_dir=directory)
+    else:
+        adjusted = daily_adjusted_demand(data, AreaIntensityModel(
+            site['expanded_area'], site['contracted_area'], reference_area=site['expanded_area'],
+            fixed_fraction=site['fixed_demand_fraction']
+        ))
+    # Hourly balance of generation and demand; an overridden orientation factor scales the hourly
+    # yield the same way it scales the annual one. The cost model is evaluated at this yield, so it
+    # credits only the PV used on site at the energy price and the export at the feed-in rate
+    load = data['Energy Demand (kWh)'].to_numpy(dtype=float)
+    generation = (site['pannel_area'] * site['solar_panel_efficiency'] * site['reduction_tilt_angle'] / factor
+                  * align_to_times(poa.to_numpy() / 1000, data['Time']))
+    battery = {'capacity': site.get('battery_capacity', 0.0), 'power': site.get('battery_power')}
+    solar_generation = (annual_radiation * site['pannel_area'] * site['solar_panel_efficiency']
+                        * site['reduction_tilt_angle'])
+    pv_balance = balance_curve(load, generation, [0.0, solar_generation], **battery)
+    balance = pv_balance.iloc[-1]
+    result = simulate_self_consumption(load, generation, **battery)
+    costs = compute_costs(cost_inputs(total_building_energy, annual_radiation, adjusted, pv_balance), site)
+
+    # Annual bill under the site's tariff without PV and with the PV/battery balance
+    tariff = [site_tariff(site)]
+    bills = pd.concat([
+        tariff_costs(data['Time'], load, tariff).assign(Scenario='Without PV'),
+        tariff_costs(data['Time'], result['import'][0], tariff, exported=result['export'][0]).assign(Scenario='With PV')
+    ], ignore_index=True)
+    bills = annual_costs(bills, by=['Scenario'])
+
+    return {
+        'Site': site['name'],
+        'Building Energy (kWh)': float(total_building_energy),
+        'Motor Cycles': float(site['num_cycles']),
+        'Motor Energy (kWh)': float(total_motor_energy),
+        'Combined Energy (kWh)': float(total_combined_energy),
+        'Annual Radiation (kWh/m²)': float(annual_radiation),
+        'Solar Generation (kWh)': float(costs['solar_generation']),
+        'Solar Coverage': float(costs['solar_coverage']),
+        'Self-consumption (kWh)': float(balance['Self-consumption (kWh/yr)']),
+        'Export (kWh)': float(balance['Export (kWh/yr)']),
+        'Import (kWh)': float(balance['Import (kWh/yr)']),
+        # Same figures as the dashboard's cost summary
+        'Cost Without Concept ($)': float(costs['cost_total_energy_demand']),
+        'Cost Energy + Motor ($)': float(costs['cost_total_energy_plus_motor']),
+        'Cost With Concept ($)': float(costs['cost_with']),
+        'Approximate Cost Savings ($)': float(costs['accurate_cost_savings']),
+        'Tariff': tariff[0].name,
+        'Annual Bill Without PV ($)': float(bills['Without PV']),
+        'Annual Bill With PV ($)': float(bills['With PV'])
+    }
+
+
+def _site_job(job):
+    # Top-level so the process pool can pickle it
+    site, cache_dir, key = job
+    row = run_site(site, cache_dir)
+    with open(os.path.join(site_cache_dir(site, cache_dir), 'result.json'), 'w', encoding='utf-8') as f:
+        json.dump({'key': key, 'row': row}, f)
+    return row
+
+
+def _cached_row(site, cache_dir, key):
+    path = os.path.join(site_cache_dir(site, cache_dir), 'result.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached['row'] if cached.get('key') == key else None
+
+
+def run_batch(sites, cache_dir=None, max_workers=None, force=False):
+    """
+    Run every site across a process pool, reusing the results of unchanged sites.
+
+    Parameters:
+        sites (list): Sites from read_manifest.
+        cache_dir (str): Cache root, defaults to CACHE_DIR.
+        max_workers (int): Size of the process pool; 1 runs in-process.
+        force (bool): Recompute every site.
+
+    Returns:
+        DataFrame: One row per site, in manifest order, with a 'Cached' column.
+    """
+    rows = {}
+    jobs = []
+    for site in sites:
+        key = site_key(site)
+        row = None if force else _cached_row(site, cache_dir, key)
+        if row is not None:
+            rows[site['name']] = {**row, 'Cached': True}
+        else:
+            os.makedirs(site_cache_dir(site, cache_dir), exist_ok=True)
+            jobs.append((site, cache_dir, key))
+
+    if max_workers == 1 or len(jobs) <= 1:
+        results = [_site_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_site_job, jobs))
+    for row in results:
+        rows[row['Site']] = {**row, 'Cached': False}
+
+    return pd.DataFrame([rows[site['name']] for site in sites])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the energy pipeline for every site of a manifest.')
+    parser.add_argument('manifest', help='sites manifest (.csv or .json)')
+    parser.add_argument('-o', '--output', default='site_summary.csv', help='summary table path')
+    parser.add_argument('--workers', type=int, help='number of worker processes')
+    parser.add_argument('--cache-dir', help='cache root, defaults to FINALPITCH_CACHE_DIR')
+    parser.add_argument('--force', action='store_true', help='recompute unchanged sites as well')
+    args = parser.parse_args(argv)
+
+    summary = run_batch(read_manifest(args.manifest), cache_dir=args.cache_dir,
+                        max_workers=args.workers, force=args.force)
+    summary.to_csv(args.output, index=False)
+    print(f"{len(summary)} sites ({int(summary['Cached'].sum())} unchanged) summarized in: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
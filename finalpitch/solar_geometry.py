@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+from epw_reader import RADIATION_COLUMNS, read_epw
+
+GHI, DNI, DHI = RADIATION_COLUMNS
+
+# Orientation grid searched for the best panel position (degrees)
+DEFAULT_TILTS = np.arange(0, 91, 5)
+DEFAULT_AZIMUTHS = np.arange(0, 360, 5)  # 0 = north, 90 = east, 180 = south
+
+DEFAULT_ALBEDO = 0.2
+
+# Hours transposed at once when summing over an orientation grid; bounds memory
+DEFAULT_BLOCK_HOURS = 2190
+
+
+def solar_position(times, latitude, longitude, timezone):
+    """
+    Vectorized sun position (Spencer/NOAA approximation, well within 1° of SPA).
+
+    Parameters:
+        times (DatetimeIndex): Local standard times.
+        latitude (float): Degrees north.
+        longitude (float): Degrees east.
+        timezone (float): Hours from UTC of the standard time.
+
+    Returns:
+        tuple: (zenith, azimuth) arrays in degrees, azimuth clockwise from north.
+    """
+    times = pd.DatetimeIndex(times)
+    day_angle = 2 * np.pi * (times.dayofyear.to_numpy() - 1) / 365
+    equation_of_time = 229.18 * (
+        0.000075 + 0.001868 * np.cos(day_angle) - 0.032077 * np.sin(day_angle)
+        - 0.014615 * np.cos(2 * day_angle) - 0.040849 * np.sin(2 * day_angle)
+    )
+    declination = (
+        0.006918 - 0.399912 * np.cos(day_angle) + 0.070257 * np.sin(day_angle)
+        - 0.006758 * np.cos(2 * day_angle) + 0.000907 * np.sin(2 * day_angle)
+        - 0.002697 * np.cos(3 * day_angle) + 0.00148 * np.sin(3 * day_angle)
+    )
+    minutes = times.hour.to_numpy() * 60 + times.minute.to_numpy() + times.second.to_numpy() / 60
+    solar_minutes = minutes + equation_of_time + 4 * longitude - 60 * timezone
+    hour_angle = np.radians(solar_minutes / 4 - 180)
+
+    lat = np.radians(latitude)
+    cos_zenith = np.clip(
+        np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle), -1, 1
+    )
+    zenith = np.degrees(np.arccos(cos_zenith))
+    azimuth = np.degrees(np.arctan2(
+        np.sin(hour_angle),
+        np.cos(hour_angle) * np.sin(lat) - np.tan(declination) * np.cos(lat)
+    )) + 180
+    return zenith, azimuth % 360
+
+
+def poa_irradiance(ghi, dni, dhi, zenith, azimuth, tilt, surface_azimuth, albedo=DEFAULT_ALBEDO):
+    """
+    Plane-of-array irradiance with the isotropic sky model.
+
+    Every argument broadcasts, so hourly columns (hours, 1, 1) against tilts
+    (1, T, 1) and azimuths (1, 1, A) transpose a whole orientation grid at once.
+
+    Parameters:
+        ghi, dni, dhi (array): Global horizontal, direct normal and diffuse horizontal irradiance.
+        zenith, azimuth (array): Sun position in degrees.
+        tilt (array): Surface tilt from horizontal in degrees.
+        surface_azimuth (array): Direction the surface faces, clockwise from north.
+        albedo (float): Ground reflectance.
+
+    Returns:
+        ndarray: Irradiance on the plane, in the unit of the inputs.
+    """
+    zenith = np.radians(zenith)
+    tilt = np.radians(tilt)
+    cos_aoi = (
+        np.cos(zenith) * np.cos(tilt)
+        + np.sin(zenith) * np.sin(tilt) * np.cos(np.radians(azimuth - surface_azimuth))
+    )
+    # No beam on the back of the panel or with the sun below the horizon
+    beam = dni * np.where(np.cos(zenith) > 0, np.maximum(cos_aoi, 0), 0)
+    sky = dhi * (1 + np.cos(tilt)) / 2
+    ground = ghi * albedo * (1 - np.cos(tilt)) / 2
+    return beam + sky + ground
+
+
+def read_solar_weather(epw_path, year=2025):
+    """
+    Hourly GHI/DNI/DHI of an EPW file with the sun position at the middle of each hour.
+
+    Returns:
+        DataFrame: Indexed by the interval start, with the radiation columns in Wh/m²
+            and 'Zenith (°)' and 'Azimuth (°)'.
+    """
+    metadata, weather = read_epw(epw_path, columns=RADIATION_COLUMNS, year=year)
+    # EPW values integrate over the hour; the mid-hour position represents it best
+    middle = weather.index + pd.Timedelta(minutes=30)
+    zenith, azimuth = solar_position(middle, metadata.latitude, metadata.longitude, metadata.timezone)
+    return weather.assign(**{'Zenith (°)': zenith, 'Azimuth (°)': azimuth})
+
+
+def hourly_poa(weather, tilt, surface_azimuth, albedo=DEFAULT_ALBEDO):
+    """Hourly plane-of-array irradiance (Wh/m²) of one orientation, as a Series."""
+    values = poa_irradiance(
+        weather[GHI].to_numpy(), weather[DNI].to_numpy(), weather[DHI].to_numpy(),
+        weather['Zenith (°)'].to_numpy(), weather['Azimuth (°)'].to_numpy(),
+        tilt, surface_azimuth, albedo
+    )
+    return pd.Series(values, index=weather.index, name='Plane of Array Radiation (Wh/m²)')
+
+
+def annual_poa_grid(weather, tilts=DEFAULT_TILTS, azimuths=DEFAULT_AZIMUTHS, albedo=DEFAULT_ALBEDO,
+                    block_hours=DEFAULT_BLOCK_HOURS):
+    """
+    Annual plane-of-array irradiation for every tilt and azimuth of a grid.
+
+    Parameters:
+        weather (DataFrame): Output of read_solar_weather.
+        tilts (array): Tilts in degrees.
+        azimuths (array): Surface azimuths in degrees.
+        albedo (float): Ground reflectance.
+        block_hours (int): Hours broadcast at once.
+
+    Returns:
+        DataFrame: kWh/m² per year, indexed by tilt with one column per azimuth.
+    """
+    tilt = np.asarray(tilts, dtype=float)[None, :, None]
+    surface_azimuth = np.asarray(azimuths, dtype=float)[None, None, :]
+    columns = [weather[name].to_numpy(dtype=float)[:, None, None] for name in
+               (GHI, DNI, DHI, 'Zenith (°)', 'Azimuth (°)')]
+
+    total = np.zeros((tilt.shape[1], surface_azimuth.shape[2]))
+    for start in range(0, len(weather), block_hours):
+        block = [column[start:start + block_hours] for column in columns]
+        total += poa_irradiance(*block, tilt, surface_azimuth, albedo).sum(axis=0)
+    return pd.DataFrame(total / 1000, index=pd.Index(tilts, name='Tilt (°)'),
+                        columns=pd.Index(azimuths, name='Azimuth (°)'))
+
+
+def optimal_orientation(grid):
+    """(tilt, azimuth, kWh/m²) of the best orientation in an annual_poa_grid result."""
+    tilt, azimuth = np.unravel_index(np.argmax(grid.to_numpy()), grid.shape)
+    return grid.index[tilt], grid.columns[azimuth], float(grid.iat[tilt, azimuth])
+
+
+def orientation_factor(weather, grid, tilt, surface_azimuth, albedo=DEFAULT_ALBEDO):
+    """
+    Annual yield of an orientation relative to the best one of the grid.
+
+    This replaces the fixed reduction_tilt_angle: 1.0 for an optimally
+    oriented panel, lower for façades or poorly facing roofs.
+    """
+    annual = hourly_poa(weather, tilt, surface_azimuth, albedo).sum() / 1000
+    return annual / optimal_orientation(grid)[2]
@@ -0,0 +1,435 @@
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from battery_simulation import HOURS_PER_YEAR
+from tariff_engine import step_length
+
+# Building states; the building expands above the occupancy threshold (%)
+EXPANDED_STATE = 'Expanded (135 m²)'
+CONTRACTED_STATE = 'Contracted (65 m²)'
+STATE_THRESHOLD = 50
+
+# Default control setting of the dashboard and the command line tools
+CONTRACT_THRESHOLD = 40  # Contract when occupancy falls to this level (%)
+EXPAND_THRESHOLD = 60  # Expand when occupancy rises above this level (%)
+MIN_DWELL_HOURS = 24  # Minimum hours between two movements
+
+# Categorical type of the 'State' column: one int8 code per row instead of a string
+STATE_DTYPE = pd.CategoricalDtype([CONTRACTED_STATE, EXPANDED_STATE])
+
+# Settings x hours evaluated at once in a threshold sweep; bounds memory
+SWEEP_BLOCK_CELLS = 1 << 22
+
+
+@dataclass(frozen=True)
+class LockoutWindow:
+    """
+    A window in which the building may not move; None matches every value.
+
+    months are 1-12, days 0 (Monday) to 6 (Sunday), hours 0-23.
+    """
+    months: tuple = None
+    days: tuple = None
+    hours: tuple = None
+
+
+def lockout_mask(times, windows):
+    """
+    Flag the timestamps that fall into any lockout window.
+
+    Returns:
+        ndarray: True where the building has to hold its state.
+    """
+    times = pd.DatetimeIndex(pd.to_datetime(times))
+    locked = np.zeros(len(times), dtype=bool)
+    for window in windows:
+        mask = np.ones(len(times), dtype=bool)
+        if window.months is not None:
+            mask &= np.isin(times.month, window.months)
+        if window.days is not None:
+            mask &= np.isin(times.dayofweek, window.days)
+        if window.hours is not None:
+            mask &= np.isin(times.hour, window.hours)
+        locked |= mask
+    return locked
+
+
+def dwell_rows(min_dwell, step_hours=1.0):
+    """
+    Rows a request has to last for min_dwell hours when each row covers step_hours.
+
+    Lockout windows need no such conversion: they are matched on the timestamps.
+    """
+    return max(1, int(np.ceil(min_dwell / step_hours - 1e-9)))
+
+
+def _forward_fill(values, valid, initial):
+    # Last valid value at or before each column, per row; initial before the first one
+    positions = np.where(valid, np.arange(values.shape[1]), -1)
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    filled = np.take_along_axis(values, np.maximum(positions, 0), axis=1)
+    return np.where(positions >= 0, filled, initial)
+
+
+def _run_starts(states, initial):
+    # True where a row changes state, the first column compared with the initial state
+    starts = np.empty_like(states)
+    starts[:, 0] = states[:, 0] != initial
+    starts[:, 1:] = states[:, 1:] != states[:, :-1]
+    return starts
+
+
+def _enforce_dwell(states, min_dwell):
+    # Runs shorter than min_dwell rows are not acted on: they take the state of the last
+    # run that was long enough, so every movement is followed by at least min_dwell rows
+    rows, hours = states.shape
+    starts = np.ones_like(states)
+    starts[:, 1:] = states[:, 1:] != states[:, :-1]
+    first = np.flatnonzero(starts)
+    lengths = np.diff(np.append(first, states.size))
+    run_rows = first // hours
+    # The first run of a row is the starting state and is always kept
+    keep = (lengths >= min_dwell) | np.r_[True, run_rows[1:] != run_rows[:-1]]
+    source = np.where(keep, np.arange(len(first)), -1)
+    np.maximum.accumulate(source, out=source)
+    return np.repeat(states.ravel()[first][source], lengths).reshape(rows, hours)
+
+
+def state_matrix(occupancy, low=STATE_THRESHOLD, high=STATE_THRESHOLD, min_dwell=1, locked=None, initial=False,
+                 step_hours=1.0):
+    """
+    Expanded/contracted state of the building for one or many control settings.
+
+    The building expands when occupancy rises above high and contracts when it
+    falls to low or below; in between, and for missing readings or during a
+    lockout, it holds its state. Requests lasting less than min_dwell hours
+    are ignored. Everything is array operations, so the settings are
+    evaluated together.
+
+    Parameters:
+        occupancy (array): Occupancy level in % per reading.
+        low (float or array): Contraction threshold, one value per setting.
+        high (float or array): Expansion threshold, one value per setting.
+        min_dwell (float): Minimum hours between two movements.
+        locked (array): True for readings in which the building may not move.
+        initial (bool): Whether the building is expanded before the first reading.
+        step_hours (float): Hours covered by each reading, e.g. 0.25 for 15-minute data.
+
+    Returns:
+        ndarray: Boolean array of shape (settings, readings), True when expanded.
+    """
+    occupancy = np.asarray(occupancy, dtype=float)[None, :]
+    low = np.atleast_1d(np.asarray(low, dtype=float))[:, None]
+    high = np.atleast_1d(np.asarray(high, dtype=float))[:, None]
+    expand = occupancy > high
+    contract = occupancy <= low
+    triggered = expand | contract
+    if locked is not None:
+        triggered &= ~np.asarray(locked, dtype=bool)[None, :]
+    triggered = np.broadcast_to(triggered, np.broadcast_shapes(expand.shape, contract.shape))
+    expand = np.broadcast_to(expand, triggered.shape)
+    states = _forward_fill(expand, triggered, initial)
+    rows = dwell_rows(min_dwell, step_hours)
+    if rows > 1 and states.shape[1]:
+        states = _enforce_dwell(states, rows)
+    return states
+
+
+def building_states(occupancy, low=STATE_THRESHOLD, high=STATE_THRESHOLD, min_dwell=1, locked=None,
+                    initial=False, step_hours=1.0):
+    """Expanded (True) or contracted state per reading for one control setting; see state_matrix."""
+    return state_matrix(occupancy, low, high, min_dwell, locked, initial, step_hours)[0]
+
+
+def state_labels(expanded):
+    """Categorical state names for a boolean expanded array."""
+    return pd.Categorical.from_codes(np.asarray(expanded, dtype=np.int8), dtype=STATE_DTYPE)
+
+
+def with_states(data, low=STATE_THRESHOLD, high=STATE_THRESHOLD, min_dwell=1, lockout=()):
+    """
+    Copy of the meter data with its 'State' column derived by the state machine.
+
+    Each building of multi-building data (a 'Building' column) is a separate
+    series, and min_dwell is converted to rows from its sampling step.
+
+    Parameters:
+        data (DataFrame): Rows with 'Time' and 'Occupancy Level (%)', in time order per building.
+        low, high, min_dwell: Control setting, see state_matrix.
+        lockout (tuple): LockoutWindow entries.
+
+    Returns:
+        DataFrame: The data with the 'State' column replaced.
+    """
+    occupancy = data['Occupancy Level (%)'].to_numpy(dtype=float)
+    if 'Building' in data.columns:
+        groups = data.groupby('Building', sort=False, observed=True).indices.values()
+    else:
+        groups = [np.arange(len(data))]
+    expanded = np.zeros(len(data), dtype=bool)
+    for positions in groups:
+        times = data['Time'].iloc[positions]
+        locked = lockout_mask(times, lockout) if lockout else None
+        expanded[positions] = building_states(
+            occupancy[positions], low, high, min_dwell, locked, step_hours=step_length(times)
+        )
+    return data.assign(State=state_labels(expanded))
+
+
+class StateTracker:
+    """
+    The state machine of with_states for readings arriving in pieces, e.g. chunks or live readings.
+
+    A request is only acted on once it has lasted min_dwell hours, so the
+    latest readings of a short request are pending: their state is decided
+    when the request reaches min_dwell hours or is replaced by another one.
+    Feeding the readings in any split gives the states with_states gives for
+    the whole series. Unless step_hours is given, the sampling step is taken
+    from the first two timestamps fed.
+    """
+
+    def __init__(self, low=STATE_THRESHOLD, high=STATE_THRESHOLD, min_dwell=1, lockout=(), initial=False,
+                 step_hours=None):
+        self.low = low
+        self.high = high
+        self.min_dwell = min_dwell
+        self.lockout = tuple(lockout)
+        self.step_hours = step_hours
+        self.request = bool(initial)  # Latest requested state
+        self.kept = None  # State of the last request that was acted on
+        self.run = 0  # Readings of the current request so far
+        self.pending = 0  # Latest readings whose state is not decided yet
+        self.hours = 0  # Readings fed so far
+        self._first = True  # The first request is the starting state and is always kept
+        self._last_time = None
+
+    def copy(self, initial=False):
+        """A new tracker with the same control setting and sampling step."""
+        return type(self)(self.low, self.high, self.min_dwell, self.lockout, initial, self.step_hours)
+
+    @property
+    def dwell_rows(self):
+        """Readings a request has to last; one hour per reading until the step is known."""
+        return dwell_rows(self.min_dwell, self.step_hours or 1.0)
+
+    def learn_step(self, times):
+        """Take the sampling step from the timestamps fed, unless it is known already."""
+        times = pd.DatetimeIndex(pd.to_datetime(times))
+        if not len(times):
+            return
+        if self.step_hours is None:
+            if len(times) > 1:
+                self.step_hours = step_length(times)
+            elif self._last_time is not None:
+                self.step_hours = (times[0] - self._last_time) / pd.Timedelta(hours=1)
+        self._last_time = times[-1]
+
+    @property
+    def provisional(self):
+        """State the pending hours get if no further hours arrive."""
+        return self.kept if self.pending else self.request
+
+    def triggers(self, times, occupancy):
+        """
+        Requests of the individual readings.
+
+        Returns:
+            tuple: (expand, triggered) boolean arrays; a reading that does not trigger,
+                e.g. between the thresholds or during a lockout, holds the latest request.
+        """
+        occupancy = np.asarray(occupancy, dtype=float)
+        expand = occupancy > self.high
+        triggered = expand | (occupancy <= self.low)
+        if self.lockout:
+            triggered &= ~lockout_mask(times, self.lockout)
+        return expand, triggered
+
+    def requests(self, times, occupancy):
+        """Requested state of each reading, continuing from the latest request."""
+        expand, triggered = self.triggers(times, occupancy)
+        return _forward_fill(expand[None, :], triggered[None, :], self.request)[0]
+
+    def feed(self, times, occupancy):
+        """
+        Advance by some readings.
+
+        Parameters:
+            times (array): Timestamps of the readings, continuing the ones fed before.
+            occupancy (array): Occupancy level in % of each reading.
+
+        Returns:
+            ndarray: Expanded flags of the readings decided by this call: the
+                readings pending before the call, then the new readings, minus
+                the readings still pending afterwards.
+        """
+        self.learn_step(times)
+        return self.feed_requests(self.requests(times, occupancy))
+
+    def feed_requests(self, requests):
+        """Advance by readings whose requested state is already known; see feed."""
+        requests = np.asarray(requests, dtype=bool)
+        if not len(requests):
+            return np.zeros(0, dtype=bool)
+        bounds = np.flatnonzero(requests[1:] != requests[:-1]) + 1
+        decided = []
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(requests)]):
+            decided.extend(self.feed_run(bool(requests[start]), end - start))
+        if not decided:
+            return np.zeros(0, dtype=bool)
+        states, readings = zip(*decided)
+        return np.repeat(np.array(states, dtype=bool), readings)
+
+    def feed_run(self, request, readings):
+        """
+        Advance by readings that all request the same state.
+
+        Returns:
+            list: (expanded, readings) pairs decided by this call, in order; the
+                readings pending before the call are always decided together.
+        """
+        decided = []
+        if request != self.request:
+            # A new request ends the current one; if that was still pending, it is dropped
+            if self.pending:
+                decided.append((self.kept, self.pending))
+                self.pending = 0
+            self._first = self._first and self.hours == 0
+            self.request, self.run = request, 0
+        min_rows = self.dwell_rows
+        self.run += readings
+        self.hours += readings
+        if self._first or self.run - readings >= min_rows:
+            self.kept = request  # Acted on already
+            decided.append((request, readings))
+        elif self.run >= min_rows:
+            self.kept = request  # Lasted long enough: the pending readings move with it
+            decided.append((request, self.pending + readings))
+            self.pending = 0
+        else:
+            self.pending += readings
+        return decided
+
+    def feed_dropped(self, request, readings):
+        """
+        Advance by readings of requests that are all dropped, the last one for request.
+
+        Each of these requests replaces the one before it and is itself replaced
+        by the next request fed, before lasting min_dwell hours. None of them is
+        acted on, so the pending readings and these readings all keep the state
+        kept before them.
+
+        Returns:
+            list: (expanded, readings) pairs decided by this call, as for feed_run.
+        """
+        decided = [(self.kept, self.pending + readings)]
+        self._first = False
+        self.request, self.run = request, 0
+        self.pending = 0
+        self.hours += readings
+        return decided
+
+    def flush(self):
+        """Decide the pending readings as if the series ended; returns their expanded flags."""
+        decided = np.full(self.pending, self.kept, dtype=bool)
+        self.pending = 0
+        return decided
+
+
+def transition_counts(times, states, initial=False):
+    """
+    Count expansions and contractions per year by run-length detection.
+
+    Parameters:
+        times (Series): Timestamps of the readings.
+        states (array): Expanded flags, shape (readings,) or (settings, readings).
+        initial (bool): State before the first reading.
+
+    Returns:
+        DataFrame: One row per setting and year with the 'Hours' covered,
+            'Expansions', 'Contractions' and 'Cycles' (movements of the
+            building, each one motor cycle).
+    """
+    states = np.atleast_2d(np.asarray(states, dtype=bool))
+    years, year_index = np.unique(pd.DatetimeIndex(pd.to_datetime(times)).year, return_inverse=True)
+    starts = _run_starts(states, initial)
+    hours = np.bincount(year_index, minlength=len(years)) * step_length(times)
+    cell = np.arange(states.shape[0])[:, None] * len(years) + year_index[None, :]
+    size = states.shape[0] * len(years)
+    expansions = np.bincount(cell[starts & states], minlength=size)
+    contractions = np.bincount(cell[starts & ~states], minlength=size)
+    return pd.DataFrame({
+        'Setting': np.repeat(np.arange(states.shape[0]), len(years)),
+        'Year': np.tile(years, states.shape[0]),
+        'Hours': np.tile(hours, states.shape[0]),
+        'Expansions': expansions,
+        'Contractions': contractions,
+        'Cycles': expansions + contractions
+    })
+
+
+def cycles_per_year(transitions):
+    """
+    Average number of movements per year of each setting of transition_counts.
+
+    Complete years are averaged and partial ones, such as a year just started
+    by a live reading, are left out. Without any complete year the movements
+    are scaled to a year by the hours covered.
+
+    Returns:
+        Series: Movements per year, indexed by setting.
+    """
+    return _per_year(transitions, ['Cycles'])['Cycles']
+
+
+def _per_year(transitions, columns):
+    # Annual average of counts: complete years only, or all years scaled by the hours covered
+    complete = transitions['Hours'] >= HOURS_PER_YEAR
+    if complete.any():
+        return transitions[complete].groupby('Setting')[columns].mean()
+    totals = transitions.groupby('Setting')[[*columns, 'Hours']].sum()
+    return totals[columns].mul(HOURS_PER_YEAR / totals['Hours'], axis=0)
+
+
+def annual_cycles(times, states, initial=False):
+    """Average number of movements per year of one state series; see cycles_per_year."""
+    return float(cycles_per_year(transition_counts(times, states, initial)).iloc[0])
+
+
+def sweep_thresholds(times, occupancy, lows, highs, min_dwell=1, lockout=(), initial=False):
+    """
+    Evaluate every combination of contraction and expansion thresholds.
+
+    Parameters:
+        times (Series): Timestamps of the readings.
+        occupancy (array): Occupancy level in % per reading.
+        lows (list): Contraction thresholds.
+        highs (list): Expansion thresholds; combinations with high < low are skipped.
+        min_dwell (float): Minimum hours between two movements.
+        lockout (tuple): LockoutWindow entries.
+        initial (bool): State before the first hour.
+
+    Returns:
+        DataFrame: One row per threshold pair with the annual 'Expansions',
+            'Contractions' and 'Cycles', averaged as in cycles_per_year, and
+            the 'Expanded Share' of readings.
+    """
+    pairs = np.array([(low, high) for low, high in itertools.product(lows, highs) if high >= low], dtype=float)
+    locked = lockout_mask(times, lockout) if lockout else None
+    step_hours = step_length(times)
+    block = max(1, SWEEP_BLOCK_CELLS // max(len(occupancy), 1))
+    counts, shares = [], []
+    for start in range(0, len(pairs), block):
+        chunk = pairs[start:start + block]
+        states = state_matrix(occupancy, chunk[:, 0], chunk[:, 1], min_dwell, locked, initial, step_hours)
+        counts.append(_per_year(transition_counts(times, states, initial), ['Expansions', 'Contractions', 'Cycles']))
+        shares.append(states.mean(axis=1))
+    counts = pd.concat(counts, ignore_index=True)
+    return pd.DataFrame({
+        'Contract Below (%)': pairs[:, 0],
+        'Expand Above (%)': pairs[:, 1],
+        **{column: counts[column].to_numpy() for column in counts.columns},
+        'Expanded Share': np.concatenate(shares)
+    })
@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from radiation_ingest import RADIATION_COLUMN
+from solar_geometry import DHI, DNI, GHI, solar_position
+
+# Size multipliers of the benchmark datasets. 1x is the current single building,
+# one year, hourly; larger scales add years, sub-hourly steps and buildings.
+SCALES = {
+    1: {'years': 1, 'freq': '1h', 'buildings': 1},
+    10: {'years': 10, 'freq': '1h', 'buildings': 1},
+    100: {'years': 5, 'freq': '15min', 'buildings': 5},
+    1000: {'years': 10, 'freq': '15min', 'buildings': 25}
+}
+
+# Points per day of the incident radiation exports at 1x
+RADIATION_POINTS = 767
+
+# Measurement days of the incident radiation exports read by calculate_radiation
+RADIATION_FILES = {
+    'incident_radiation_21_02_fixed.csv': '2025-03-21',
+    'incident_radiation_21_06_fixed.csv': '2025-06-21',
+    'incident_radiation_21_09_fixed.csv': '2025-09-21',
+    'incident_radiation_21_12_fixed.csv': '2025-12-21'
+}
+
+DAYLIGHT_HOURS = 14
+
+# Site of the weather file read by the dashboard (Augsburg)
+WEATHER_SITE = {'latitude': 48.4, 'longitude': 10.9, 'timezone': 1.0}
+
+
+def synthetic_demand(years=1, freq='1h', buildings=1, start='2025-01-01', seed=0):
+    """
+    Generate occupancy and energy demand shaped like occupancy_energy_demand.csv.
+
+    Occupancy follows a weekday office profile with noise; energy demand is
+    a base load plus a share proportional to occupancy, in kWh per step.
+
+    Parameters:
+        years (int): Number of years.
+        freq (str): Step between readings, e.g. '1h' or '15min'.
+        buildings (int): Number of buildings; adds a 'Building' column when above 1.
+        start (str): First timestamp.
+        seed (int): Random seed.
+
+    Returns:
+        DataFrame: Columns ['Time', 'Month', 'Day', 'Hour', 'Occupancy Level (%)', 'Energy Demand (kWh)'].
+    """
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(start, pd.Timestamp(start) + pd.DateOffset(years=years), freq=freq, inclusive='left')
+    step_hours = pd.Timedelta(freq) / pd.Timedelta('1h')
+    hours = times.hour.to_numpy() + times.minute.to_numpy() / 60
+    weekday = times.dayofweek.to_numpy() < 5
+
+    # Office profile: high during working hours on weekdays, low otherwise
+    profile = np.where(weekday & (hours >= 8) & (hours < 18), 70.0, 25.0)
+
+    frames = []
+    for building in range(buildings):
+        occupancy = np.clip(profile + rng.normal(0, 15, len(times)), 0, 100)
+        base_load = rng.uniform(4, 8)
+        energy = (base_load + 0.1 * occupancy) * step_hours
+        frame = pd.DataFrame({
+            'Time': times,
+            'Month': times.month,
+            'Day': times.day,
+            'Hour': times.hour,
+            'Occupancy Level (%)': occupancy,
+            'Energy Demand (kWh)': energy
+        })
+        if buildings > 1:
+            frame.insert(0, 'Building', f'B{building + 1:03d}')
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic_radiation_day(date, points=RADIATION_POINTS, time_format='us_padded', gap_fraction=0.0, seed=0):
+    """
+    Generate one incident radiation export over the 06:00-20:00 window.
+
+    Parameters:
+        date (str): Measurement day.
+        points (int): Number of points across the window.
+        time_format (str): 'iso', 'us_padded' or 'elapsed' (MM:SS without the hour).
+        gap_fraction (float): Share of rows dropped, to exercise gap filling.
+        seed (int): Random seed.
+
+    Returns:
+        DataFrame: Columns ['Point Index', 'Time', 'Radiation (kWh/m²)'].
+    """
+    rng = np.random.default_rng(seed)
+    position = np.arange(points) / points
+    offsets = pd.to_timedelta(6 * 3600 + position * DAYLIGHT_HOURS * 3600, unit='s')
+    times = pd.Series(pd.Timestamp(date) + offsets)
+    radiation = np.round(np.sin(np.pi * position) * 60 * rng.uniform(0.6, 1.0, points), 2)
+
+    if time_format == 'iso':
+        text = times.dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+    elif time_format == 'us_padded':
+        text = times.dt.strftime('%m/%d/%Y %H:%M')
+    elif time_format == 'elapsed':
+        seconds = (offsets - pd.Timedelta(hours=6)).total_seconds().to_numpy() % 3600
+        text = pd.Series([f'{int(s // 60):02d}:{s % 60:04.1f}' for s in seconds])
+    else:
+        raise ValueError(f"Unknown time format: {time_format!r}")
+
+    frame = pd.DataFrame({
+        'Point Index': np.arange(1, points + 1),
+        'Time': text.to_numpy(),
+        RADIATION_COLUMN: radiation
+    })
+    if gap_fraction:
+        # Keep the first and last points so the grid size is still known
+        keep = rng.random(points) >= gap_fraction
+        keep[[0, -1]] = True
+        frame = frame[keep]
+    return frame
+
+
+def synthetic_weather(year=2025, latitude=WEATHER_SITE['latitude'], longitude=WEATHER_SITE['longitude'],
+                      timezone=WEATHER_SITE['timezone'], seed=0):
+    """
+    Generate an hourly year shaped like the output of solar_geometry.read_solar_weather.
+
+    Each day gets a random clearness; direct and diffuse radiation follow the
+    sun elevation at the middle of the hour.
+
+    Parameters:
+        year (int): Year of the hourly index.
+        latitude (float): Degrees north.
+        longitude (float): Degrees east.
+        timezone (float): Hours from UTC of the standard time.
+        seed (int): Random seed.
+
+    Returns:
+        DataFrame: Indexed by the interval start, with the radiation columns in Wh/m²
+            and 'Zenith (°)' and 'Azimuth (°)'.
+    """
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(f'{year}-01-01', f'{year + 1}-01-01', freq='1h', inclusive='left')
+    zenith, azimuth = solar_position(times + pd.Timedelta(minutes=30), latitude, longitude, timezone)
+    elevation = np.clip(np.cos(np.radians(zenith)), 0, None)
+    clearness = rng.uniform(0.2, 1.0, len(times) // 24 + 1)[np.arange(len(times)) // 24]
+    direct = 900 * clearness * elevation ** 0.3 * (elevation > 0)
+    diffuse = (60 + 140 * (1 - clearness)) * np.sqrt(elevation)
+    return pd.DataFrame({
+        GHI: direct * elevation + diffuse,
+        DNI: direct,
+        DHI: diffuse,
+        'Zenith (°)': zenith,
+        'Azimuth (°)': azimuth
+    }, index=times)
+
+
+def write_radiation_dir(directory, points=RADIATION_POINTS, seed=0):
+    """Write the four incident radiation files read by calculate_radiation into directory."""
+    os.makedirs(directory, exist_ok=True)
+    for i, (file_name, date) in enumerate(RADIATION_FILES.items()):
+        synthetic_radiation_day(date, points=points, seed=seed + i).to_csv(
+            os.path.join(directory, file_name), index=False
+        )
+    return directory
@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from battery_simulation import HOURS_PER_YEAR
+
+# Prices are looked up per (month, day of week, hour) slot. Unlike an hour-of-year
+# vector this keeps weekday rules exact in every year, leap years included.
+SLOTS = 12 * 7 * 24
+
+
+@dataclass(frozen=True)
+class TariffPeriod:
+    """
+    A price applying to a window of the year; None matches every value.
+
+    months are 1-12, days 0 (Monday) to 6 (Sunday), hours 0-23.
+    """
+    rate: float
+    months: tuple = None
+    days: tuple = None
+    hours: tuple = None
+
+
+@dataclass(frozen=True)
+class Tariff:
+    """
+    A retail electricity tariff.
+
+    energy_rate is the default price per kWh; periods override it in order,
+    so later periods win where they overlap. demand_charge is billed per kW
+    of each month's peak import, fixed_monthly per month, and exported
+    energy is credited at feed_in_rate (or feed_in_periods).
+    """
+    name: str
+    energy_rate: float
+    periods: tuple = ()
+    demand_charge: float = 0.0
+    fixed_monthly: float = 0.0
+    feed_in_rate: float = 0.0
+    feed_in_periods: tuple = ()
+
+
+WEEKDAYS = (0, 1, 2, 3, 4)
+SUMMER = (6, 7, 8)
+WINTER = (11, 12, 1, 2)
+
+# Example schedules next to the flat price used in the cost summary
+EXAMPLE_TARIFFS = (
+    Tariff('Flat', 0.20),
+    Tariff('Time of use', 0.16, periods=(
+        TariffPeriod(0.30, days=WEEKDAYS, hours=tuple(range(8, 20))),
+    ), feed_in_rate=0.08),
+    Tariff('Seasonal', 0.18, periods=(
+        TariffPeriod(0.24, months=WINTER),
+        TariffPeriod(0.21, months=SUMMER, hours=tuple(range(12, 18)))
+    ), feed_in_rate=0.08),
+    Tariff('Demand charge', 0.14, demand_charge=12.0, fixed_monthly=25.0, feed_in_rate=0.08)
+)
+
+
+def flat_tariff(cost_per_kwh, feed_in_rate=0.0, name='Flat'):
+    """Tariff charging one price for every hour, as the original cost model does."""
+    return Tariff(name, cost_per_kwh, feed_in_rate=feed_in_rate)
+
+
+def _slot_grid():
+    # month, day and hour of every slot, in slot order
+    slots = np.arange(SLOTS)
+    return slots // 168 + 1, (slots // 24) % 7, slots % 24
+
+
+def _price_vector(default, periods):
+    months, days, hours = _slot_grid()
+    prices = np.full(SLOTS, float(default))
+    for period in periods:
+        mask = np.ones(SLOTS, dtype=bool)
+        if period.months is not None:
+            mask &= np.isin(months, period.months)
+        if period.days is not None:
+            mask &= np.isin(days, period.days)
+        if period.hours is not None:
+            mask &= np.isin(hours, period.hours)
+        prices[mask] = period.rate
+    return prices
+
+
+def price_vectors(tariffs):
+    """
+    Precompute the price of every slot for each tariff.
+
+    Returns:
+        tuple: (energy prices, feed-in prices), arrays of shape (tariffs, SLOTS) in $/kWh.
+    """
+    energy = np.array([_price_vector(tariff.energy_rate, tariff.periods) for tariff in tariffs])
+    feed_in = np.array([_price_vector(tariff.feed_in_rate, tariff.feed_in_periods) for tariff in tariffs])
+    return energy.reshape(len(tariffs), SLOTS), feed_in.reshape(len(tariffs), SLOTS)
+
+
+def hour_slots(times):
+    """Slot index of each timestamp."""
+    times = pd.DatetimeIndex(pd.to_datetime(times))
+    return ((times.month.to_numpy() - 1) * 168 + times.dayofweek.to_numpy() * 24
+            + times.hour.to_numpy()).astype(np.int64)
+
+
+def step_length(times):
+    """Typical spacing of the timestamps in hours; 1 for fewer than two of them."""
+    times = pd.DatetimeIndex(pd.to_datetime(times))
+    if len(times) < 2:
+        return 1.0
+    return float(np.median(np.diff(times.as_unit('ns').asi8))) / 3.6e12
+
+
+def tariff_costs(times, imported, tariffs, exported=None, step_hours=None):
+    """
+    Bill grid exchange under many tariffs and years in one pass.
+
+    Energy is first summed per (year, slot); the bills are then a matrix
+    product with the precomputed price vectors, so adding tariffs or years
+    costs O(years x slots x tariffs) on top of one pass over the hours.
+
+    Parameters:
+        times (Series): Timestamps of the steps, hourly or shorter.
+        imported (array): Energy drawn from the grid each step, in kWh.
+        tariffs (list): Tariff definitions.
+        exported (array): Energy fed into the grid each step, in kWh.
+        step_hours (float): Length of a step in hours; inferred from times by default.
+
+    Returns:
+        DataFrame: One row per tariff and year with the hours covered, the
+            energy, demand, fixed and feed-in components and the total cost in $.
+    """
+    times = pd.DatetimeIndex(pd.to_datetime(times))
+    imported = np.asarray(imported, dtype=float)
+    exported = np.zeros_like(imported) if exported is None else np.asarray(exported, dtype=float)
+    step_hours = step_length(times) if step_hours is None else float(step_hours)
+    years, year_index = np.unique(times.year.to_numpy(), return_inverse=True)
+    slots = hour_slots(times)
+
+    # Energy per (year, slot); every tariff is billed from these sums
+    cell = year_index * SLOTS + slots
+    import_by_slot = np.bincount(cell, weights=imported, minlength=len(years) * SLOTS).reshape(len(years), SLOTS)
+    export_by_slot = np.bincount(cell, weights=exported, minlength=len(years) * SLOTS).reshape(len(years), SLOTS)
+
+    energy_prices, feed_in_prices = price_vectors(tariffs)
+    energy_cost = import_by_slot @ energy_prices.T  # (years, tariffs)
+    feed_in_credit = export_by_slot @ feed_in_prices.T
+
+    # Monthly peak import as average kW over a step, and number of billed months
+    month_cell = year_index * 12 + times.month.to_numpy() - 1
+    peaks = np.zeros(len(years) * 12)
+    np.maximum.at(peaks, month_cell, imported / step_hours)
+    billed = np.zeros(len(years) * 12, dtype=bool)
+    billed[month_cell] = True
+    peak_sum = peaks.reshape(len(years), 12).sum(axis=1)
+    months = billed.reshape(len(years), 12).sum(axis=1)
+
+    demand_rates = np.array([tariff.demand_charge for tariff in tariffs])
+    fixed_rates = np.array([tariff.fixed_monthly for tariff in tariffs])
+    demand_cost = peak_sum[:, None] * demand_rates[None, :]
+    fixed_cost = months[:, None] * fixed_rates[None, :]
+
+    total = energy_cost + demand_cost + fixed_cost - feed_in_credit
+    hours = np.bincount(year_index, minlength=len(years)) * step_hours
+    shape = (len(years), len(tariffs))
+    return pd.DataFrame({
+        'Tariff': np.broadcast_to([tariff.name for tariff in tariffs], shape).ravel(),
+        'Year': np.broadcast_to(years[:, None], shape).ravel(),
+        'Hours': np.broadcast_to(hours[:, None], shape).ravel(),
+        'Imported (kWh)': np.broadcast_to(import_by_slot.sum(axis=1)[:, None], shape).ravel(),
+        'Exported (kWh)': np.broadcast_to(export_by_slot.sum(axis=1)[:, None], shape).ravel(),
+        'Energy Cost ($)': energy_cost.ravel(),
+        'Demand Cost ($)': demand_cost.ravel(),
+        'Fixed Cost ($)': fixed_cost.ravel(),
+        'Feed-in Credit ($)': feed_in_credit.ravel(),
+        'Total Cost ($)': total.ravel()
+    })
+
+
+def annual_costs(costs, by=('Tariff',)):
+    """
+    Average annual total cost from the per-year rows of tariff_costs.
+
+    Years covering at least HOURS_PER_YEAR are averaged and partial years,
+    such as a year just started by a live reading, are left out. Without any
+    complete year, the costs of all years are scaled to a year by the hours covered.
+
+    Parameters:
+        costs (DataFrame): Output of tariff_costs, possibly with extra columns.
+        by (list): Columns identifying a bill, e.g. ['Tariff', 'Scenario'].
+
+    Returns:
+        Series: Annual 'Total Cost ($)' per group, in order of appearance.
+    """
+    by = list(by)
+    complete = costs['Hours'] >= HOURS_PER_YEAR
+    if complete.any():
+        return costs[complete].groupby(by, sort=False)['Total Cost ($)'].mean()
+    totals = costs.groupby(by, sort=False)[['Total Cost ($)', 'Hours']].sum()
+    return totals['Total Cost ($)'] * HOURS_PER_YEAR / totals['Hours']
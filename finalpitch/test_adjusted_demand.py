@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from adjusted_demand import AdjustedDemandEngine, AreaIntensityModel, daily_adjusted_demand
+from data_loader import prepare_demand_data
+from state_machine import CONTRACTED_STATE, EXPANDED_STATE, with_states
+from synthetic_data import synthetic_demand
+
+MODEL = AreaIntensityModel(135.0, 65.0, reference_area=135.0, fixed_fraction=0.3)
+
+
+def hourly(weeks=6):
+    data = synthetic_demand()
+    data = data[data['Time'] < data['Time'].min() + pd.Timedelta(weeks=weeks)]
+    return with_states(prepare_demand_data(data.reset_index(drop=True)), 40, 60, 6)
+
+
+def test_appended_readings_recompute_only_the_days_they_touch():
+    data = hourly()
+    engine = AdjustedDemandEngine(MODEL)
+    # Cut in the middle of a day, so that day is recomputed when the rest of it arrives
+    cut = 24 * 20 + 10
+    engine.update(data.iloc[:cut])
+    assert engine.recomputed_days == 21
+    for end in (cut + 5, cut + 30, len(data)):
+        daily = engine.update(data.iloc[:end])
+        pd.testing.assert_frame_equal(daily, daily_adjusted_demand(data.iloc[:end], MODEL))
+    assert engine.recomputed_days == len(data) // 24 - 21
+
+
+def test_changed_states_recompute_their_days():
+    data = hourly()
+    engine = AdjustedDemandEngine(MODEL)
+    engine.update(data)
+    changed = data.copy()
+    rows = changed.index[(changed['Time'] >= '2025-01-15') & (changed['Time'] < '2025-01-17')]
+    changed['State'] = changed['State'].astype(object)
+    changed.loc[rows, 'State'] = np.where(
+        changed.loc[rows, 'State'] == EXPANDED_STATE, CONTRACTED_STATE, EXPANDED_STATE
+    )
+    changed['State'] = changed['State'].astype(data['State'].dtype)
+    daily = engine.update(changed)
+    assert engine.recomputed_days == 2
+    pd.testing.assert_frame_equal(daily, daily_adjusted_demand(changed, MODEL))
+    assert not daily['Adjusted Energy Demand (kWh)'].equals(daily_adjusted_demand(data, MODEL)[
+        'Adjusted Energy Demand (kWh)'
+    ])
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from battery_simulation import HOURS_PER_YEAR, simulate_self_consumption
+
+
+def profiles(hours, seed=0):
+    rng = np.random.default_rng(seed)
+    hour_of_day = np.arange(hours) % 24
+    load = 3 + 4 * rng.random(hours)
+    generation = np.clip(np.sin((hour_of_day - 6) / 14 * np.pi), 0, None) * 12 * rng.random(hours)
+    return load, generation
+
+
+def dispatched(load, generation, capacity, power=np.inf, charge_efficiency=0.95, discharge_efficiency=0.95,
+               initial_soc=0.0):
+    # The battery stepped hour by hour, as the scan replaces
+    soc = min(initial_soc, capacity)
+    result = {name: np.zeros(len(load)) for name in ('soc', 'self_consumption', 'export', 'import')}
+    for t, (demand, pv) in enumerate(zip(load, generation)):
+        direct = min(demand, pv)
+        surplus, deficit = pv - direct, demand - direct
+        charge = min(surplus, power, (capacity - soc) / charge_efficiency)
+        discharge = min(deficit, power, soc * discharge_efficiency)
+        soc += charge * charge_efficiency - discharge / discharge_efficiency
+        result['soc'][t] = soc
+        result['self_consumption'][t] = direct + discharge
+        result['export'][t] = surplus - charge
+        result['import'][t] = deficit - discharge
+    return result
+
+
+def assert_matches(result, row, expected):
+    for name, values in expected.items():
+        np.testing.assert_allclose(result[name][row], values, atol=1e-9, err_msg=name)
+
+
+@pytest.mark.parametrize('capacity, power, initial_soc', [(0.0, None, 0.0), (10.0, 3.0, 0.0), (25.0, None, 40.0)])
+def test_scan_matches_hourly_dispatch(capacity, power, initial_soc):
+    load, generation = profiles(24 * 60)
+    result = simulate_self_consumption(load, generation, capacity=capacity, power=power, initial_soc=initial_soc)
+    expected = dispatched(load, generation, capacity, np.inf if power is None else power, initial_soc=initial_soc)
+    assert_matches(result, 0, expected)
+
+
+def test_batteries_are_simulated_side_by_side():
+    load, generation = profiles(24 * 30, seed=1)
+    capacities, powers = np.array([0.0, 5.0, 20.0]), np.array([2.0, 2.0, 8.0])
+    result = simulate_self_consumption(load, generation, capacity=capacities, power=powers)
+    assert result['soc'].shape == (3, len(load))
+    for row, (capacity, power) in enumerate(zip(capacities, powers)):
+        assert_matches(result, row, dispatched(load, generation, capacity, power))
+
+
+@pytest.mark.parametrize('chunk_hours', [1, 7, 24 * 9, HOURS_PER_YEAR])
+def test_chunks_carry_the_state_of_charge(chunk_hours):
+    load, generation = profiles(HOURS_PER_YEAR + 500, seed=2)
+    whole = simulate_self_consumption(load, generation, capacity=15.0, power=4.0, chunk_hours=len(load))
+    chunked = simulate_self_consumption(load, generation, capacity=15.0, power=4.0, chunk_hours=chunk_hours)
+    for name, values in whole.items():
+        np.testing.assert_allclose(chunked[name], values, atol=1e-9, err_msg=name)
+
+
+def test_energy_balances():
+    load, generation = profiles(24 * 90, seed=3)
+    result = simulate_self_consumption(load, generation, capacity=12.0, power=5.0)
+    np.testing.assert_allclose(result['self_consumption'] + result['import'], load[None, :], atol=1e-9)
+    np.testing.assert_allclose(
+        result['self_consumption'] - result['discharge'] + result['charge'] + result['export'], generation[None, :],
+        atol=1e-9
+    )
+    assert result['soc'].min() >= 0 and result['soc'].max() <= 12.0 + 1e-9
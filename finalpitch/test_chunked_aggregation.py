@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregate_cube import CUBE_KEYS, AggregateCube
+from chunked_aggregation import (
+    _RangeLead, aggregate_byte_range, aggregate_chunks, aggregate_files, csv_byte_ranges, fold_ranges, iter_chunks
+)
+from data_loader import prepare_demand_data
+from state_machine import LockoutWindow, StateTracker, with_states
+from synthetic_data import synthetic_demand
+
+SETTING = {'low': 40, 'high': 60, 'min_dwell': 6, 'lockout': (LockoutWindow(days=(6,), hours=(2, 3, 4)),)}
+RAW_COLUMNS = ['Time', 'Occupancy Level (%)', 'Energy Demand (kWh)']
+
+
+def meter_file(tmp_path, weeks=8, freq='1h', buildings=1, interleave=False):
+    data = synthetic_demand(freq=freq, buildings=buildings)
+    data = data[data['Time'] < data['Time'].min() + pd.Timedelta(weeks=weeks)]
+    if interleave:
+        data = data.sort_values('Time', kind='stable')
+    columns = ['Building', *RAW_COLUMNS] if buildings > 1 else RAW_COLUMNS
+    path = tmp_path / 'meter.csv'
+    data[columns].to_csv(path, index=False)
+    return str(path)
+
+
+def expected_cube(path, **setting):
+    return AggregateCube.from_data(with_states(prepare_demand_data(pd.read_csv(path)), **setting))
+
+
+def assert_same_cube(cube, expected):
+    def table(c):
+        t = c.table.assign(State=c.table['State'].astype(str), **{'Day Type': c.table['Day Type'].astype(str)})
+        return t.sort_values(CUBE_KEYS).reset_index(drop=True)
+
+    actual, wanted = table(cube), table(expected)
+    assert actual[CUBE_KEYS].astype(str).equals(wanted[CUBE_KEYS].astype(str))
+    for column in wanted.columns.difference(CUBE_KEYS):
+        np.testing.assert_allclose(actual[column].to_numpy(dtype=float), wanted[column].to_numpy(dtype=float))
+
+
+def ranges_cube(path, parts, block_bytes, **setting):
+    header, ranges = csv_byte_ranges(path, parts)
+    results = [aggregate_byte_range(path, start, end, header, None, block_bytes, **setting) for start, end in ranges]
+    return fold_ranges(results, **setting)
+
+
+@pytest.mark.parametrize('chunksize', [1, 97, 5000])
+def test_chunks_match_one_shot(tmp_path, chunksize):
+    path = meter_file(tmp_path, weeks=2 if chunksize == 1 else 8)
+    assert_same_cube(aggregate_files([path], chunksize=chunksize, **SETTING), expected_cube(path, **SETTING))
+
+
+@pytest.mark.parametrize('interleave', [False, True])
+def test_buildings_have_their_own_state(tmp_path, interleave):
+    path = meter_file(tmp_path, freq='15min', buildings=3, interleave=interleave)
+    expected = expected_cube(path, **SETTING)
+    assert_same_cube(aggregate_files([path], chunksize=1000, **SETTING), expected)
+    assert_same_cube(ranges_cube(path, 7, 30_000, **SETTING), expected)
+
+
+@pytest.mark.parametrize('parts, block_bytes', [(2, 1 << 20), (13, 4000), (40, 1500)])
+def test_byte_ranges_match_one_shot(tmp_path, parts, block_bytes):
+    path = meter_file(tmp_path)
+    assert_same_cube(ranges_cube(path, parts, block_bytes, **SETTING), expected_cube(path, **SETTING))
+
+
+def test_no_request_lasting_min_dwell(tmp_path):
+    # Occupancy flips every few hours, so with a long dwell only the first request is acted on
+    path = meter_file(tmp_path, buildings=2)
+    setting = {**SETTING, 'min_dwell': 500}
+    expected = expected_cube(path, **setting)
+    assert_same_cube(aggregate_files([path], chunksize=100, **setting), expected)
+    assert_same_cube(ranges_cube(path, 9, 2000, **setting), expected)
+
+
+def test_range_lead_stays_bounded(tmp_path):
+    path = meter_file(tmp_path)
+    lead = _RangeLead(StateTracker(min_dwell=10_000, **{k: SETTING[k] for k in ('low', 'high')}), None)
+    lead.measures = ['Energy Demand (kWh)']
+    for chunk in iter_chunks([path], chunksize=50, measures=lead.measures):
+        chunk = chunk.assign(Time=pd.to_datetime(chunk['Time']))
+        assert lead.feed(chunk) is None
+    assert [segment[0] for segment in lead.segments] == ['first', 'dropped', 'latest']
+    assert sum(segment[2] for segment in lead.segments) == len(pd.read_csv(path))
+
+
+def test_chunked_cube_follows_the_thresholds(tmp_path):
+    path = meter_file(tmp_path)
+    default = aggregate_chunks(iter_chunks([path], 1000))
+    assert_same_cube(default, expected_cube(path))
+    assert not default.table.equals(aggregate_chunks(iter_chunks([path], 1000), **SETTING).table)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cache import cached_frame, read_frame, write_frame
+
+
+def typed_frame(rows=500):
+    rng = np.random.default_rng(0)
+    times = pd.date_range('2025-01-01', periods=rows, freq='1h')
+    measure = rng.random(rows)
+    measure[::7] = np.nan
+    return pd.DataFrame({
+        'Time': times,
+        'Building': pd.Categorical(rng.choice(['B001', 'B002', 'B003'], rows)),
+        'State': pd.Categorical(rng.choice(['Expanded', 'Contracted'], rows), categories=['Contracted', 'Expanded']),
+        'Hour': times.hour.astype('int8'),
+        'Energy Demand (kWh)': rng.random(rows).astype('float32'),
+        'Occupancy Level (%)': measure,
+        'Count': pd.array(np.where(rng.random(rows) < 0.2, None, np.arange(rows)), dtype='Int64'),
+        'Label': [f'row {i}' for i in range(rows)],
+        'Date': times.date
+    })
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_round_trip_keeps_values_and_dtypes(tmp_path, mmap):
+    frame = typed_frame()
+    write_frame(frame, str(tmp_path / 'frame'), meta={'note': 'test'})
+    # Copied so memory-mapped columns compare as plain arrays
+    pd.testing.assert_frame_equal(read_frame(str(tmp_path / 'frame'), mmap=mmap).copy(), frame)
+
+
+def test_rewrite_replaces_the_frame(tmp_path):
+    directory = str(tmp_path / 'frame')
+    write_frame(typed_frame(), directory)
+    smaller = typed_frame(rows=20)
+    write_frame(smaller, directory)
+    pd.testing.assert_frame_equal(read_frame(directory).copy(), smaller)
+    assert [path.name for path in tmp_path.iterdir()] == ['frame']
+
+
+def test_cached_frame_rebuilds_when_the_source_or_key_changes(tmp_path):
+    source = tmp_path / 'source.csv'
+    source.write_text('a,b\n1,2\n')
+    builds = []
+
+    def build():
+        builds.append(1)
+        return pd.read_csv(source)
+
+    def load(key='1'):
+        return cached_frame('entry', [str(source)], build, key=key, cache_dir=str(tmp_path / 'cache'))
+
+    first = load()
+    pd.testing.assert_frame_equal(load(), first)
+    assert len(builds) == 1
+
+    source.write_text('a,b\n1,2\n3,4\n')
+    assert len(load()) == 2 and len(builds) == 2
+    load(key='2')
+    assert len(builds) == 3
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsampling import downsample, lttb_indices, minmax_indices
+
+
+def reference_lttb(x, y, threshold):
+    # Steinarsson's Largest-Triangle-Three-Buckets, one triangle at a time
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    selected, anchor = [0], 0
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = np.mean(x[next_start:next_end]), np.mean(y[next_start:next_end])
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((x[anchor] - avg_x) * (y[j] - y[anchor]) - (x[anchor] - x[j]) * (avg_y - y[anchor])) / 2
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        anchor = best
+    return np.array([*selected, n - 1])
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    return x, np.sin(x / 15) * 10 + rng.normal(0, 1, n)
+
+
+@pytest.mark.parametrize('n, max_points', [(1002, 102), (5002, 502), (302, 4)])
+def test_lttb_matches_reference(n, max_points):
+    x, y = series(n)
+    np.testing.assert_array_equal(lttb_indices(x, y, max_points), reference_lttb(x, y, max_points))
+
+
+def test_lttb_keeps_the_budget_and_the_endpoints():
+    x, y = series(10_000, seed=1)
+    for max_points in (3, 10, 777, 2000):
+        indices = lttb_indices(x, y, max_points)
+        assert len(indices) == max_points
+        assert indices[0] == 0 and indices[-1] == len(y) - 1
+        assert np.all(np.diff(indices) > 0)
+    np.testing.assert_array_equal(lttb_indices(x, y, len(y)), np.arange(len(y)))
+
+
+def test_lttb_on_datetimes_matches_numeric_x():
+    times = pd.date_range('2025-01-01', periods=4000, freq='15min')
+    _, y = series(len(times), seed=2)
+    numeric = (times - times[0]) / pd.Timedelta('1s')
+    np.testing.assert_array_equal(
+        lttb_indices(times.to_numpy(), y, 400), lttb_indices(numeric.to_numpy(), y, 400)
+    )
+
+
+def test_minmax_keeps_every_peak():
+    x, y = series(10_000, seed=3)
+    indices = minmax_indices(y, 200)
+    assert len(indices) <= 202
+    kept = y[indices]
+    assert kept.max() == y.max() and kept.min() == y.min()
+    for bucket in np.array_split(np.arange(len(y)), 100):
+        assert y[bucket].max() in kept and y[bucket].min() in kept
+
+
+def test_downsample_limits_to_the_visible_range():
+    times = pd.date_range('2025-01-01', periods=20_000, freq='15min')
+    x, y = series(len(times), seed=4)
+    data = pd.DataFrame({'Time': times, 'Energy': y, 'Occupancy': -y})
+    view = downsample(data, 'Time', ['Energy', 'Occupancy'], max_points=500, x_range=('2025-02-01', '2025-03-01'))
+    # Both series keep their shape, with one point either side of the view
+    assert len(view) <= 1000
+    assert view['Time'].iloc[0] < pd.Timestamp('2025-02-01') <= view['Time'].iloc[1]
+    assert view['Time'].iloc[-2] <= pd.Timestamp('2025-03-01') < view['Time'].iloc[-1]
+    assert view['Time'].is_monotonic_increasing
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from dashboard_data import create_registry
+from data_loader import prepare_demand_data
+from live_ingest import RunningAggregates, ingest_rows, refresh_live
+from synthetic_data import synthetic_demand
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = create_registry()
+    data = synthetic_demand(seed=3)
+    registry.set('demand_data', prepare_demand_data(data[data['Time'] < '2025-03-01'].reset_index(drop=True)))
+    frames = []
+    frame = RunningAggregates.frame
+    monkeypatch.setattr(RunningAggregates, 'frame', lambda self: frames.append(1) or frame(self))
+    registry.frames = frames
+    return registry
+
+
+def readings(start, hours):
+    times = pd.date_range(start, periods=hours, freq='1h')
+    return [{'Time': time, 'Occupancy Level (%)': 80.0, 'Energy Demand (kWh)': 10.0} for time in times]
+
+
+def test_append_does_not_rebuild_the_full_history(registry):
+    energy = registry.get('energy_demand')['total_building_energy']
+    cycles = registry.get('num_cycles')
+    history = registry.get('timeseries')
+    assert len(registry.frames) == 1
+
+    ingest_rows(registry.get('running'), readings('2025-03-01', 48), on_batch=lambda: refresh_live(registry),
+                batch_size=6)
+    # The cube-based totals follow every reading; the time series and its metrics wait
+    assert registry.get('energy_demand')['total_building_energy'] == pytest.approx(energy + 480)
+    assert registry.get('timeseries') is history
+    assert registry.get('num_cycles') == cycles
+    assert len(registry.frames) == 1
+
+    refresh_live(registry, history=True)
+    assert len(registry.get('timeseries')) == len(history) + 48
+    assert len(registry.frames) == 2
+
+
+def test_history_refresh_matches_a_fresh_registry(registry):
+    ingest_rows(registry.get('running'), readings('2025-03-01', 30), on_batch=lambda: refresh_live(registry))
+    refresh_live(registry, history=True)
+    fresh = create_registry()
+    fresh.set('demand_data', registry.get('timeseries').drop(columns='State'))
+    assert registry.get('num_cycles') == pytest.approx(fresh.get('num_cycles'))
+    pd.testing.assert_frame_equal(registry.get('cube').table, fresh.get('cube').table, check_dtype=False)
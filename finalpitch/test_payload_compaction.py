@@ -0,0 +1,65 @@
+import json
+import os
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+from dashboard_data import SOLAR_DATA_FILES, create_registry
+from data_loader import prepare_demand_data, prepare_solar_data
+from heatmap_energy_occupancy import heatmap_energy_occupancy
+from payload_compaction import compact_figure
+from scenario_engine import PARAMETERS, scenario_inputs
+from scenario_panel import DEFAULT_METRIC, DEFAULT_X, DEFAULT_Y, scenario_heatmap
+from solar_energy import solar_energy_chart
+from stacked_bar_chart import stacked_bar_chart
+from synthetic_data import synthetic_demand, synthetic_weather, write_radiation_dir
+
+REGISTRY_FIGURES = [
+    'occupancy_figure', 'area_figure', 'energy_pie_figure', 'solar_pie_figure', 'demand_comparison_figure'
+]
+
+
+@pytest.fixture(scope='module')
+def registry(tmp_path_factory):
+    # A synthetic quarter of demand and weather; nothing is read from or cached into the repo
+    directory = str(tmp_path_factory.mktemp('data'))
+    write_radiation_dir(directory, points=120)
+    demand = synthetic_demand()
+    registry = create_registry(directory)
+    registry.set('demand_data', prepare_demand_data(demand[demand['Time'] < '2025-04-01'].reset_index(drop=True)))
+    registry.set('combined_data', prepare_solar_data({
+        month: os.path.join(directory, file_name) for month, file_name in SOLAR_DATA_FILES.items()
+    }))
+    registry.set('solar_weather', synthetic_weather())
+    return registry
+
+
+def dashboard_figures(registry):
+    # Every figure the dashboard callbacks serve, with the default selector values
+    cube = registry.get('cube')
+    figures = {name: registry.get(name) for name in REGISTRY_FIGURES}
+    figures['solar_energy'] = solar_energy_chart(registry.get('combined_data'))
+    for level in ('Weekly', 'Monthly'):
+        figures[f'stacked_bar_{level}'] = stacked_bar_chart(level, cube.weekly_by_state(), cube.monthly_by_state())
+    for metric in ('Energy Demand (kWh)', 'Occupancy Level (%)'):
+        figures[f'heatmap_{metric}'] = heatmap_energy_occupancy(cube, metric=metric)
+    settings = {name: registry.get(name) for name in PARAMETERS}
+    figures['scenario_heatmap'] = scenario_heatmap(
+        scenario_inputs(registry), settings, DEFAULT_X, DEFAULT_Y, DEFAULT_METRIC
+    )
+    return figures
+
+
+def test_compact_figure_accepts_every_dashboard_figure(registry):
+    for name, figure in dashboard_figures(registry).items():
+        compact = compact_figure(figure)
+        # The result is plain JSON and still a valid figure with the same traces
+        json.loads(pio.to_json(compact, validate=False))
+        assert len(go.Figure(compact).data) == len(go.Figure(figure).data), name
+
+
+def test_compact_figure_keeps_graph_object_layout(registry):
+    compact = compact_figure(registry.get('demand_comparison_figure'))
+    assert compact['layout']['title']['text'] == "Energy Demand vs Adjusted Energy Demand"
+    assert all(isinstance(trace, dict) for trace in compact['data'])
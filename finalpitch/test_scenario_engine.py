@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from battery_simulation import balance_curve, simulate_self_consumption
+from scenario_engine import PARAMETERS, balance_yields, compute_costs, cost_inputs, evaluate_scenarios
+from tariff_engine import annual_costs, flat_tariff, tariff_costs
+
+PARAMS = {
+    'motor_energy_per_cycle': 160, 'num_cycles': 60, 'pannel_area': 64, 'solar_panel_efficiency': 0.2,
+    'reduction_tilt_angle': 0.8, 'cost_per_kwh': 0.2, 'feed_in_rate': 0.08
+}
+ANNUAL_RADIATION = 1200.0
+
+
+def site(capacity=0.0):
+    times = pd.date_range('2025-01-01', periods=8760, freq='1h')
+    hours = times.hour.to_numpy()
+    load = 5 + 3 * ((hours >= 8) & (hours < 18))
+    profile = np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None)
+    yield_ = ANNUAL_RADIATION * PARAMS['pannel_area'] * PARAMS['solar_panel_efficiency'] * PARAMS['reduction_tilt_angle']
+    curve = balance_curve(load, profile, balance_yields(ANNUAL_RADIATION, yield_), capacity=capacity, power=5.0)
+    adjusted = pd.DataFrame({'Energy Demand (kWh)': [load.sum()], 'Adjusted Energy Demand (kWh)': [0.8 * load.sum()]})
+    inputs = cost_inputs(load.sum(), ANNUAL_RADIATION, adjusted, curve)
+    generation = profile * yield_ / profile.sum()
+    return times, load, generation, inputs
+
+
+@pytest.mark.parametrize('capacity', [0.0, 10.0])
+def test_pv_is_credited_like_the_flat_tariff_bill(capacity):
+    times, load, generation, inputs = site(capacity)
+    costs = compute_costs(inputs, PARAMS)
+    result = simulate_self_consumption(load, generation, capacity=capacity, power=5.0)
+    tariff = [flat_tariff(PARAMS['cost_per_kwh'], PARAMS['feed_in_rate'])]
+    without_pv = annual_costs(tariff_costs(times, load, tariff), by=['Tariff']).iloc[0]
+    with_pv = tariff_costs(times, result['import'][0], tariff, exported=result['export'][0])
+    assert float(costs['solar_energy_covered']) == pytest.approx(result['self_consumption'].sum())
+    assert float(costs['solar_export']) == pytest.approx(result['export'].sum())
+    assert float(costs['cost_solar_energy_covered']) == pytest.approx(
+        without_pv - annual_costs(with_pv, by=['Tariff']).iloc[0]
+    )
+    assert float(costs['accurate_cost_savings']) == pytest.approx(
+        float(costs['cost_difference_energy']) + float(costs['cost_solar_energy_covered'])
+    )
+
+
+def test_swept_yields_follow_the_simulated_balance():
+    times, load, generation, inputs = site()
+    areas = np.array([0, 20, 64, 150, 200])
+    results = evaluate_scenarios(inputs, PARAMS, pannel_area=areas)
+    for area, row in zip(areas, results.itertuples()):
+        scaled = generation * area / PARAMS['pannel_area']
+        exact = simulate_self_consumption(load, scaled)
+        assert row.solar_energy_covered == pytest.approx(exact['self_consumption'].sum(), rel=2e-3)
+        assert row.solar_export == pytest.approx(exact['export'].sum(), rel=2e-3, abs=1.0)
+    # Self-consumption saturates, so the cost saving per m² falls once the array outgrows the load
+    savings = np.diff(results['accurate_cost_savings']) / np.diff(areas)
+    assert (np.diff(savings) < 1e-9).all() and savings[-1] < savings[0]
+
+
+def test_pv_beyond_the_simulated_yields_is_exported():
+    _, _, generation, inputs = site()
+    largest = evaluate_scenarios(inputs, PARAMS, pannel_area=[inputs['balance_generation'][-1] / generation.sum()
+                                                              * PARAMS['pannel_area']])
+    beyond = evaluate_scenarios(inputs, PARAMS, pannel_area=[1000])
+    assert beyond['solar_energy_covered'].iloc[0] == pytest.approx(largest['solar_energy_covered'].iloc[0])
+    assert beyond['solar_energy_covered'].iloc[0] + beyond['solar_export'].iloc[0] == pytest.approx(
+        beyond['solar_generation'].iloc[0]
+    )
+    assert set(PARAMETERS) <= set(beyond.columns) | set(PARAMS)
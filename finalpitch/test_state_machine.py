@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import prepare_demand_data
+from state_machine import (
+    EXPANDED_STATE, LockoutWindow, StateTracker, annual_cycles, sweep_thresholds, transition_counts, with_states
+)
+from synthetic_data import synthetic_demand
+
+SETTING = {'low': 40, 'high': 60, 'min_dwell': 6, 'lockout': (LockoutWindow(days=(6,), hours=(2, 3, 4)),)}
+
+
+def demand(weeks=6, freq='1h', buildings=1, seed=0):
+    data = synthetic_demand(years=int(np.ceil(weeks / 52)), freq=freq, buildings=buildings, seed=seed)
+    end = data['Time'].min() + pd.Timedelta(weeks=weeks)
+    return prepare_demand_data(data[data['Time'] < end].reset_index(drop=True))
+
+
+def expanded(data):
+    return (data['State'] == EXPANDED_STATE).to_numpy()
+
+
+def tracked(data, bounds, **setting):
+    # States of a StateTracker fed the rows in pieces split at bounds
+    tracker = StateTracker(setting['low'], setting['high'], setting['min_dwell'], setting['lockout'])
+    pieces = np.split(np.arange(len(data)), bounds)
+    decided = [
+        tracker.feed(data['Time'].iloc[piece], data['Occupancy Level (%)'].iloc[piece])
+        for piece in pieces if len(piece)
+    ]
+    return np.concatenate([*decided, tracker.flush()])
+
+
+@pytest.mark.parametrize('freq', ['1h', '15min'])
+def test_tracker_in_chunks_matches_one_shot(freq):
+    data = demand(freq=freq)
+    expected = expanded(with_states(data, **SETTING))
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        bounds = np.sort(rng.choice(np.arange(1, len(data)), size=rng.integers(1, 40), replace=False))
+        np.testing.assert_array_equal(tracked(data, bounds, **SETTING), expected)
+
+
+def test_tracker_matches_one_shot_at_every_chunk_boundary():
+    data = demand(weeks=1)
+    expected = expanded(with_states(data, **SETTING))
+    for bound in range(1, len(data)):
+        np.testing.assert_array_equal(tracked(data, [bound], **SETTING), expected)
+
+
+def test_tracker_one_reading_at_a_time():
+    data = demand(weeks=2, freq='15min')
+    expected = expanded(with_states(data, **SETTING))
+    np.testing.assert_array_equal(tracked(data, np.arange(1, len(data)), **SETTING), expected)
+
+
+def test_min_dwell_is_in_hours_for_sub_hourly_data():
+    hourly = demand(weeks=4)
+    # The same readings every 15 minutes: the states repeat, and dwell covers the same hours
+    quarter = hourly.loc[hourly.index.repeat(4)].reset_index(drop=True)
+    quarter['Time'] = hourly['Time'].iloc[0] + pd.to_timedelta(np.arange(len(quarter)) * 15, unit='min')
+    setting = {**SETTING, 'lockout': ()}
+    np.testing.assert_array_equal(
+        expanded(with_states(quarter, **setting)), np.repeat(expanded(with_states(hourly, **setting)), 4)
+    )
+    counts = transition_counts(quarter['Time'], expanded(with_states(quarter, **setting)))
+    assert counts['Hours'].sum() == pytest.approx(len(hourly))
+
+
+def test_buildings_are_separate_series():
+    data = demand(buildings=3)
+    combined = expanded(with_states(data, **SETTING))
+    for building, rows in data.groupby('Building', observed=True):
+        single = with_states(rows.drop(columns='Building').reset_index(drop=True), **SETTING)
+        np.testing.assert_array_equal(combined[rows.index], expanded(single))
+
+
+def test_sweep_uses_the_annual_rule_of_cycles_per_year():
+    data = demand(weeks=70)  # One complete year and a partial one
+    sweep = sweep_thresholds(data['Time'], data['Occupancy Level (%)'].to_numpy(), [40], [60], min_dwell=6)
+    states = with_states(data, 40, 60, 6)
+    assert sweep['Cycles'].iloc[0] == pytest.approx(annual_cycles(data['Time'], expanded(states)))
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tariff_engine import EXAMPLE_TARIFFS, Tariff, TariffPeriod, annual_costs, hour_slots, tariff_costs
+
+# Overlapping periods with a weekend rule, a feed-in schedule and every bill component
+WEEKEND_TARIFF = Tariff('Weekend', 0.25, periods=(
+    TariffPeriod(0.10, days=(5, 6)),
+    TariffPeriod(0.40, months=(1, 2), days=(6,), hours=(18, 19))
+), demand_charge=8.0, fixed_monthly=10.0, feed_in_rate=0.05, feed_in_periods=(TariffPeriod(0.12, hours=(17, 18)),))
+TARIFFS = [*EXAMPLE_TARIFFS, WEEKEND_TARIFF]
+
+
+def matches(period, time):
+    return all(values is None or value in values for values, value in (
+        (period.months, time.month), (period.days, time.dayofweek), (period.hours, time.hour)
+    ))
+
+
+def price(default, periods, time):
+    rate = default
+    for period in periods:
+        if matches(period, time):
+            rate = period.rate
+    return rate
+
+
+def billed(times, imported, exported, tariff, step_hours):
+    # Each step priced by its own timestamp, one year at a time
+    rows = {}
+    for year in sorted(set(times.year)):
+        in_year = times.year == year
+        energy = credit = 0.0
+        peaks = {}
+        for time, drawn, fed in zip(times[in_year], imported[in_year], exported[in_year]):
+            energy += drawn * price(tariff.energy_rate, tariff.periods, time)
+            credit += fed * price(tariff.feed_in_rate, tariff.feed_in_periods, time)
+            peaks[time.month] = max(peaks.get(time.month, 0.0), drawn / step_hours)
+        rows[year] = (energy + tariff.demand_charge * sum(peaks.values()) + tariff.fixed_monthly * len(peaks)
+                      - credit)
+    return rows
+
+
+def exchange(start, end, freq, seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(start, end, freq=freq, inclusive='left')
+    step_hours = pd.Timedelta(freq) / pd.Timedelta('1h')
+    return times, rng.uniform(0, 5, len(times)) * step_hours, rng.uniform(0, 2, len(times)) * step_hours, step_hours
+
+
+@pytest.mark.parametrize('start, end, freq', [
+    ('2025-01-01', '2025-03-15', '1h'),
+    ('2024-02-20', '2024-03-05', '15min'),  # Across the leap day
+    ('2023-11-01', '2025-02-01', '1h')  # Three calendar years, weekdays shifting between them
+])
+def test_slotted_bills_match_pricing_every_step(start, end, freq):
+    times, imported, exported, step_hours = exchange(start, end, freq)
+    costs = tariff_costs(pd.Series(times), imported, TARIFFS, exported=exported)
+    for tariff in TARIFFS:
+        rows = costs[costs['Tariff'] == tariff.name].set_index('Year')
+        for year, total in billed(times, imported, exported, tariff, step_hours).items():
+            assert rows.loc[year, 'Total Cost ($)'] == pytest.approx(total, rel=1e-9), (tariff.name, year)
+            assert rows.loc[year, 'Hours'] == pytest.approx((times.year == year).sum() * step_hours)
+
+
+def test_slots_follow_the_weekday_of_each_year():
+    # 1 January is a Monday in 2024 and a Wednesday in 2025
+    slots = hour_slots(pd.to_datetime(['2024-01-01 09:00', '2025-01-01 09:00', '2025-01-06 09:00']))
+    assert slots[0] == slots[2] != slots[1]
+
+
+def test_annual_costs_skip_partial_years():
+    times, imported, exported, _ = exchange('2024-01-01', '2025-01-02', '1h')
+    costs = tariff_costs(pd.Series(times), imported, TARIFFS[:2], exported=exported)
+    complete = costs[costs['Year'] == 2024].set_index('Tariff')['Total Cost ($)']
+    pd.testing.assert_series_equal(annual_costs(costs), complete, check_names=False)
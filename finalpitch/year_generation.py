@@ -1,5 +1,7 @@
 # year_generation.py
 
+import os
+
 import pandas as pd
 
 
@@ -27,17 +29,15 @@ def estimate_annual_radiation(february_radiation, june_radiation, september_radi
     )
 
 
-def calculate_radiation():
+def calculate_radiation(data_dir=None):
     """Load data, calculate daily radiation, and estimate annual generation."""
+    data_dir = data_dir or os.path.dirname(os.path.abspath(__file__))
+
     # Load radiation data
-    february_data = pd.read_csv(
-        r'C:\Users\HP\OneDrive\Documentos\martin\martin\Uni\3 semester\Schmidt\finalpitch\incident_radiation_21_02_fixed.csv')
-    june_data = pd.read_csv(
-        r'C:\Users\HP\OneDrive\Documentos\martin\martin\Uni\3 semester\Schmidt\finalpitch\incident_radiation_21_06_fixed.csv')
-    september_data = pd.read_csv(
-        r'C:\Users\HP\OneDrive\Documentos\martin\martin\Uni\3 semester\Schmidt\finalpitch\incident_radiation_21_09_fixed.csv')
-    december_data = pd.read_csv(
-        r'C:\Users\HP\OneDrive\Documentos\martin\martin\Uni\3 semester\Schmidt\finalpitch\incident_radiation_21_12_fixed.csv')
+    february_data = pd.read_csv(os.path.join(data_dir, 'incident_radiation_21_02_fixed.csv'))
+    june_data = pd.read_csv(os.path.join(data_dir, 'incident_radiation_21_06_fixed.csv'))
+    september_data = pd.read_csv(os.path.join(data_dir, 'incident_radiation_21_09_fixed.csv'))
+    december_data = pd.read_csv(os.path.join(data_dir, 'incident_radiation_21_12_fixed.csv'))
 
     # Calculate daily radiation
     february_daily = calculate_daily_radiation(february_data)